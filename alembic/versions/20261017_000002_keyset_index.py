@@ -0,0 +1,26 @@
+"""composite (published_at, id) index for keyset pagination
+
+Revision ID: 20261017_000002
+Revises: 20250907_000001
+Create Date: 2026-10-17 00:00:02
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000002'
+down_revision = '20250907_000001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_videos_published_at_id ON videos (published_at, id)")
+
+
+def downgrade() -> None:
+    op.drop_index('idx_videos_published_at_id', table_name='videos')
@@ -0,0 +1,71 @@
+"""stored weighted search_vector with trigger maintenance
+
+Revision ID: 20261017_000003
+Revises: 20261017_000002
+Create Date: 2026-10-17 00:00:03
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000003'
+down_revision = '20261017_000002'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+SEARCH_VECTOR_EXPR = (
+    "setweight(to_tsvector('english', coalesce({row}title,'')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}description,'')), 'B')"
+)
+
+
+def upgrade() -> None:
+    # A nullable column without default is a catalog-only change (no table rewrite),
+    # unlike GENERATED ... STORED which rewrites videos under an exclusive lock
+    op.add_column('videos', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute(
+        "CREATE OR REPLACE FUNCTION videos_search_vector_update() RETURNS trigger AS $$ "
+        "BEGIN NEW.search_vector := " + SEARCH_VECTOR_EXPR.format(row="NEW.") + "; RETURN NEW; END "
+        "$$ LANGUAGE plpgsql"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_videos_search_vector ON videos")
+    op.execute(
+        "CREATE TRIGGER trg_videos_search_vector BEFORE INSERT OR UPDATE OF title, description "
+        "ON videos FOR EACH ROW EXECUTE FUNCTION videos_search_vector_update()"
+    )
+
+    # New writes are covered by the trigger from here on. Backfill existing rows in
+    # short, separately committed batches so row locks are held only briefly. Each
+    # batch is the next id range on the primary key, so no batch rescans filled rows.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last = 0
+        while True:
+            upper = bind.exec_driver_sql(
+                f"SELECT max(id) FROM (SELECT id FROM videos WHERE id > {last} ORDER BY id LIMIT {BATCH_SIZE}) batch"
+            ).scalar()
+            if upper is None:
+                break
+            bind.exec_driver_sql(
+                "UPDATE videos SET search_vector = " + SEARCH_VECTOR_EXPR.format(row="") + " "
+                f"WHERE id > {last} AND id <= {upper} AND search_vector IS NULL"
+            )
+            last = upper
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_videos_search_vector ON videos USING GIN (search_vector)")
+        # Matching and ranking now use search_vector; the expression index only costs writes
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_videos_fts")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_videos_fts ON videos USING GIN (to_tsvector('english', coalesce(title,'') || ' ' || coalesce(description,'')))")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_videos_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS trg_videos_search_vector ON videos")
+    op.execute("DROP FUNCTION IF EXISTS videos_search_vector_update()")
+    op.drop_column('videos', 'search_vector')
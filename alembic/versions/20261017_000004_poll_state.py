@@ -0,0 +1,30 @@
+"""poll_state table with per-query watermarks
+
+Revision ID: 20261017_000004
+Revises: 20261017_000003
+Create Date: 2026-10-17 00:00:04
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000004'
+down_revision = '20261017_000003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'poll_state',
+        sa.Column('query', sa.Text(), primary_key=True),
+        sa.Column('published_after', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('poll_state')
@@ -0,0 +1,34 @@
+"""video_queries association between poll queries and videos
+
+Revision ID: 20261017_000005
+Revises: 20261017_000004
+Create Date: 2026-10-17 00:00:05
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000005'
+down_revision = '20261017_000004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Starts empty: existing rows predate query tracking and are filled in as pollers re-see them
+    op.create_table(
+        'video_queries',
+        sa.Column('query', sa.Text(), primary_key=True),
+        sa.Column('video_id', sa.Text(), sa.ForeignKey('videos.video_id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('published_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('first_seen_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()')),
+    )
+    op.create_index('idx_video_queries_query_published_at', 'video_queries', ['query', 'published_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_video_queries_query_published_at', table_name='video_queries')
+    op.drop_table('video_queries')
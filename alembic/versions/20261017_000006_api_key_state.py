@@ -0,0 +1,32 @@
+"""api_key_state table with persisted key cooldowns and quota spend
+
+Revision ID: 20261017_000006
+Revises: 20261017_000005
+Create Date: 2026-10-17 00:00:06
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000006'
+down_revision = '20261017_000005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'api_key_state',
+        sa.Column('key_hash', sa.Text(), primary_key=True),
+        sa.Column('cooldown_until', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('quota_day', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('units_spent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('api_key_state')
@@ -0,0 +1,29 @@
+"""poll_state page token and last poll outcome
+
+Revision ID: 20261017_000007
+Revises: 20261017_000006
+Create Date: 2026-10-17 00:00:07
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000007'
+down_revision = '20261017_000006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('poll_state', sa.Column('page_token', sa.Text(), nullable=True))
+    op.add_column('poll_state', sa.Column('last_status', sa.Integer(), nullable=True))
+    op.add_column('poll_state', sa.Column('last_error', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('poll_state', 'last_error')
+    op.drop_column('poll_state', 'last_status')
+    op.drop_column('poll_state', 'page_token')
@@ -0,0 +1,30 @@
+"""poller_replicas lease table for query sharding
+
+Revision ID: 20261017_000008
+Revises: 20261017_000007
+Create Date: 2026-10-17 00:00:08
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000008'
+down_revision = '20261017_000007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'poller_replicas',
+        sa.Column('replica_id', sa.Text(), primary_key=True),
+        sa.Column('heartbeat_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('poller_replicas')
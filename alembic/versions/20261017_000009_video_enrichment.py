@@ -0,0 +1,32 @@
+"""videos.list enrichment columns (duration, statistics, tags)
+
+Revision ID: 20261017_000009
+Revises: 20261017_000008
+Create Date: 2026-10-17 00:00:09
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000009'
+down_revision = '20261017_000008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable without defaults: a metadata-only change on Postgres, no table rewrite
+    op.add_column('videos', sa.Column('duration_seconds', sa.Integer(), nullable=True))
+    op.add_column('videos', sa.Column('view_count', sa.BigInteger(), nullable=True))
+    op.add_column('videos', sa.Column('like_count', sa.BigInteger(), nullable=True))
+    op.add_column('videos', sa.Column('tags', postgresql.JSONB(), nullable=True))
+    op.add_column('videos', sa.Column('enriched_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    for column in ('enriched_at', 'tags', 'like_count', 'view_count', 'duration_seconds'):
+        op.drop_column('videos', column)
@@ -0,0 +1,60 @@
+"""video statistics samples, rollups and sampling state
+
+Revision ID: 20261017_000010
+Revises: 20261017_000009
+Create Date: 2026-10-17 00:00:10
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000010'
+down_revision = '20261017_000009'
+branch_labels = None
+depends_on = None
+
+
+def _video_ref() -> sa.Column:
+    return sa.Column(
+        'video_ref', sa.Integer(), sa.ForeignKey('videos.id', ondelete='CASCADE'), primary_key=True
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        'video_stat_samples',
+        _video_ref(),
+        sa.Column('sampled_at', sa.TIMESTAMP(timezone=True), primary_key=True),
+        sa.Column('view_count', sa.BigInteger(), nullable=True),
+        sa.Column('like_count', sa.BigInteger(), nullable=True),
+    )
+    op.create_table(
+        'video_stat_rollups',
+        _video_ref(),
+        sa.Column('granularity', sa.Text(), primary_key=True),
+        sa.Column('bucket_start', sa.TIMESTAMP(timezone=True), primary_key=True),
+        sa.Column('views_min', sa.BigInteger(), nullable=True),
+        sa.Column('views_max', sa.BigInteger(), nullable=True),
+        sa.Column('samples', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'video_stat_state',
+        _video_ref(),
+        sa.Column('next_sample_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('last_sampled_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('last_view_count', sa.BigInteger(), nullable=True),
+        sa.Column('views_per_hour', sa.Float(), nullable=True),
+    )
+    op.create_index('idx_video_stat_state_next_sample_at', 'video_stat_state', ['next_sample_at'])
+    op.create_index('idx_video_stat_state_views_per_hour', 'video_stat_state', ['views_per_hour'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_video_stat_state_views_per_hour', table_name='video_stat_state')
+    op.drop_index('idx_video_stat_state_next_sample_at', table_name='video_stat_state')
+    op.drop_table('video_stat_state')
+    op.drop_table('video_stat_rollups')
+    op.drop_table('video_stat_samples')
@@ -0,0 +1,29 @@
+"""videos.content_hash and content_revision for change-detecting upserts
+
+Revision ID: 20261017_000011
+Revises: 20261017_000010
+Create Date: 2026-10-17 00:00:11
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000011'
+down_revision = '20261017_000010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows keep a NULL hash; the first time each is seen again it is
+    # rewritten once and gets its hash. A constant default needs no table rewrite.
+    op.add_column('videos', sa.Column('content_hash', sa.Text(), nullable=True))
+    op.add_column('videos', sa.Column('content_revision', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'content_revision')
+    op.drop_column('videos', 'content_hash')
@@ -0,0 +1,32 @@
+"""backfill_windows checkpoints for the historical backfill CLI
+
+Revision ID: 20261017_000012
+Revises: 20261017_000011
+Create Date: 2026-10-17 00:00:12
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000012'
+down_revision = '20261017_000011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'backfill_windows',
+        sa.Column('query', sa.Text(), primary_key=True),
+        sa.Column('window_start', sa.TIMESTAMP(timezone=True), primary_key=True),
+        sa.Column('window_end', sa.TIMESTAMP(timezone=True), primary_key=True),
+        sa.Column('fetched', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('completed_at', sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('backfill_windows')
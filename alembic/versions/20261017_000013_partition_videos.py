@@ -0,0 +1,161 @@
+"""range-partition videos by month on published_at, with a video_ids lookup table
+
+Revision ID: 20261017_000013
+Revises: 20261017_000012
+Create Date: 2026-10-17 00:00:13
+
+Requires PostgreSQL 15+ (UNIQUE NULLS NOT DISTINCT). The table is rebuilt, so
+run it in a maintenance window and restart the app afterwards: processes detect
+the partitioned layout once at startup.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261017_000013'
+down_revision = '20261017_000012'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+SEARCH_VECTOR_TRIGGER = (
+    "CREATE TRIGGER trg_videos_search_vector BEFORE INSERT OR UPDATE OF title, description "
+    "ON videos FOR EACH ROW EXECUTE FUNCTION videos_search_vector_update()"
+)
+
+# A partitioned table can only enforce uniqueness on keys that include published_at,
+# so video_ids is where video_id stays globally unique. Rows whose video is already
+# stored under a different published_at (i.e. would land in a second partition) are
+# rejected; the app pins published_at to the stored value before writing.
+REGISTER_VIDEO_ID = """
+CREATE OR REPLACE FUNCTION videos_register_video_id() RETURNS trigger AS $$
+DECLARE
+    stored timestamptz;
+BEGIN
+    INSERT INTO video_ids (video_id, id, published_at) VALUES (NEW.video_id, NEW.id, NEW.published_at)
+    ON CONFLICT (video_id) DO NOTHING;
+    IF NOT FOUND THEN
+        SELECT published_at INTO stored FROM video_ids WHERE video_id = NEW.video_id;
+        IF stored IS DISTINCT FROM NEW.published_at THEN
+            RAISE EXCEPTION 'video % is stored with published_at %', NEW.video_id, stored
+                USING ERRCODE = 'unique_violation';
+        END IF;
+    END IF;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# (table, column, referenced video_ids column) for every foreign key into videos
+REFERENCES = (
+    ('video_queries', 'video_id', 'video_id'),
+    ('video_stat_samples', 'video_ref', 'id'),
+    ('video_stat_rollups', 'video_ref', 'id'),
+    ('video_stat_state', 'video_ref', 'id'),
+)
+
+INDEXES = (
+    "CREATE UNIQUE INDEX uq_videos_video_id_published_at ON videos (video_id, published_at) NULLS NOT DISTINCT",
+    "CREATE INDEX ix_videos_video_id ON videos (video_id)",
+    "CREATE INDEX ix_videos_id ON videos (id)",
+    "CREATE INDEX idx_videos_published_at_desc ON videos (published_at)",
+    "CREATE INDEX idx_videos_published_at_id ON videos (published_at, id)",
+    "CREATE INDEX idx_videos_title_trgm ON videos USING GIN (title gin_trgm_ops)",
+    "CREATE INDEX idx_videos_description_trgm ON videos USING GIN (description gin_trgm_ops)",
+    "CREATE INDEX idx_videos_search_vector ON videos USING GIN (search_vector)",
+)
+
+
+def _month(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _drop_references() -> None:
+    for tbl, col, _ in REFERENCES:
+        op.execute(f"ALTER TABLE {tbl} DROP CONSTRAINT IF EXISTS {tbl}_{col}_fkey")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    op.execute(
+        "CREATE TABLE video_ids (video_id text PRIMARY KEY, id bigint NOT NULL UNIQUE, published_at timestamptz)"
+    )
+    op.execute("INSERT INTO video_ids (video_id, id, published_at) SELECT video_id, id, published_at FROM videos")
+    _drop_references()
+
+    # Keep the id sequence alive when the old table goes
+    op.execute("ALTER SEQUENCE videos_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE videos RENAME TO videos_unpartitioned")
+    op.execute("DROP TRIGGER IF EXISTS trg_videos_search_vector ON videos_unpartitioned")
+    op.execute(
+        "CREATE TABLE videos (LIKE videos_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (published_at)"
+    )
+    op.execute("CREATE TABLE videos_default PARTITION OF videos DEFAULT")
+
+    oldest = bind.exec_driver_sql("SELECT min(published_at) FROM videos_unpartitioned").scalar()
+    now = datetime.now(timezone.utc)
+    month = _month(oldest.astimezone(timezone.utc) if oldest else now)
+    last = _month(now)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        following = _next_month(month)
+        op.execute(
+            f"CREATE TABLE videos_p{month:%Y%m} PARTITION OF videos "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+
+    # Load before indexing; search_vector is already filled, so no trigger is needed yet
+    op.execute("INSERT INTO videos SELECT * FROM videos_unpartitioned")
+    op.execute("DROP TABLE videos_unpartitioned")
+    op.execute("ALTER SEQUENCE videos_id_seq OWNED BY videos.id")
+    for ddl in INDEXES:
+        op.execute(ddl)
+
+    op.execute(SEARCH_VECTOR_TRIGGER)
+    op.execute(REGISTER_VIDEO_ID)
+    op.execute(
+        "CREATE TRIGGER trg_videos_register_video_id BEFORE INSERT ON videos "
+        "FOR EACH ROW EXECUTE FUNCTION videos_register_video_id()"
+    )
+    for tbl, col, ref in REFERENCES:
+        op.execute(
+            f"ALTER TABLE {tbl} ADD CONSTRAINT {tbl}_{col}_fkey "
+            f"FOREIGN KEY ({col}) REFERENCES video_ids ({ref}) ON DELETE CASCADE"
+        )
+
+
+def downgrade() -> None:
+    _drop_references()
+    op.execute("ALTER SEQUENCE videos_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE videos RENAME TO videos_partitioned")
+    op.execute("CREATE TABLE videos (LIKE videos_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO videos SELECT * FROM videos_partitioned")
+    op.execute("DROP TABLE videos_partitioned CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS videos_register_video_id()")
+    op.execute("ALTER SEQUENCE videos_id_seq OWNED BY videos.id")
+
+    op.execute("ALTER TABLE videos ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE videos ADD CONSTRAINT videos_video_id_key UNIQUE (video_id)")
+    # The lookup-era indexes on video_id and id are covered by the constraints above
+    for ddl in INDEXES[3:]:
+        op.execute(ddl)
+    op.execute("CREATE INDEX ix_videos_published_at ON videos (published_at)")
+    op.execute(SEARCH_VECTOR_TRIGGER)
+    for tbl, col, _ in REFERENCES:
+        target = 'video_id' if col == 'video_id' else 'id'
+        op.execute(
+            f"ALTER TABLE {tbl} ADD CONSTRAINT {tbl}_{col}_fkey "
+            f"FOREIGN KEY ({col}) REFERENCES videos ({target}) ON DELETE CASCADE"
+        )
+    op.execute("DROP TABLE video_ids")
@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from ..db import pool_stats
+
+router = APIRouter(prefix="/api/db", tags=["db"])
+
+
+@router.get("/pool")
+async def db_pool():
+    """Connection pool occupancy and checkout wait for the primary and read engines."""
+    return pool_stats()
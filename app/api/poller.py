@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+
+from ..poller import get_poller
+
+router = APIRouter(prefix="/api/poller", tags=["poller"])
+
+
+@router.get("/stats")
+async def poller_stats():
+    """Ingestion pipeline health: stage latencies, queue depth and row counters."""
+    return get_poller().stats()
+
+
+@router.get("/plan")
+async def poller_plan():
+    """Current adaptive schedule: per-key quota spend and each query's interval and yield."""
+    return get_poller().scheduler.plan()
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 import os
 
 from ..config import get_settings
-from ..crud import list_videos, search_videos
-from ..db import get_session
-from ..schemas import PaginatedVideos, VideoOut
-from ..models import Video
+from ..counts import count_videos, is_approximate
+from ..crud import encode_cursor, get_video, list_videos, search_videos
+from ..db import get_read_session, get_session
+from ..hot_feed import get_hot_feed
+from ..poller import get_poller
+from ..schemas import PaginatedVideos, TrendingVideo, TrendingVideos, VideoDetail, VideoOut
+from ..search_cache import get_search_cache
+from ..stats import trending_videos
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import select, func
 
 router = APIRouter(prefix="/api/videos", tags=["videos"])
 
@@ -25,27 +28,48 @@ async def _pagination_params(
     return page, per_page
 
 
-@router.get("", response_model=PaginatedVideos)
-async def get_videos(
-    qp = Depends(_pagination_params),
-    channel: str | None = Query(None, description="Filter by channel title (contains)"),
-    sort: str = Query(
-        "published_desc",
-        description="Sort order for list view",
-        regex="^(published_desc|published_asc)$",
-    ),
-):
-    page, per_page = qp
-    async with get_session() as session:
-        total, items = await list_videos(
-            session, page=page, per_page=per_page, channel=channel, sort=sort
-        )
+_COUNT_MODE = Query(
+    "exact",
+    description="How to compute total: exact, estimate (capped/planner estimate) or none",
+    regex="^(exact|estimate|none)$",
+)
+
+
+def _page_response(
+    *,
+    total: int | None,
+    page: int,
+    per_page: int,
+    items,
+    cursor: str | None,
+    keyset_next: bool,
+    count_mode: str = "exact",
+    search_tier: str | None = None,
+) -> dict:
+    """Shape a PaginatedVideos payload.
+
+    ``keyset_next`` says whether ``items`` are in (published_at, id) order, i.e.
+    whether the last item can seed a cursor for the following page.
+    """
+    if cursor is not None or total is None:
+        # No trustworthy total to compare against: a full page suggests more
+        has_more = len(items) == per_page
+    else:
+        has_more = page * per_page < total
+    next_page = page + 1 if has_more and cursor is None else None
+    last = items[-1] if items else None
+    next_cursor = None
+    if keyset_next and has_more and last is not None and last.published_at is not None:
+        next_cursor = encode_cursor(last.published_at, last.id)
     return {
         "total": total,
+        "total_approximate": is_approximate(total, count_mode),
         "page": page,
         "per_page": per_page,
-        "next_page": page + 1 if page * per_page < total else None,
-        "prev_page": page - 1 if page > 1 else None,
+        "next_page": next_page,
+        "prev_page": page - 1 if page > 1 and cursor is None else None,
+        "next_cursor": next_cursor,
+        "search_tier": search_tier,
         "items": [
             VideoOut(
                 video_id=i.video_id,
@@ -55,12 +79,79 @@ async def get_videos(
                 thumbnails=i.thumbnails,
                 channel_id=i.channel_id,
                 channel_title=i.channel_title,
+                duration_seconds=i.duration_seconds,
+                view_count=i.view_count,
+                like_count=i.like_count,
+                tags=i.tags,
             )
             for i in items
         ],
     }
 
 
+@router.get("", response_model=PaginatedVideos)
+async def get_videos(
+    qp = Depends(_pagination_params),
+    channel: str | None = Query(None, description="Filter by channel title (contains)"),
+    sort: str = Query(
+        "published_desc",
+        description="Sort order for list view",
+        regex="^(published_desc|published_asc)$",
+    ),
+    cursor: str | None = Query(
+        None, description="Keyset cursor from a previous next_cursor (empty for the first page); overrides page"
+    ),
+    count_mode: str = _COUNT_MODE,
+    query: str | None = Query(None, description="Only videos fetched by this poll query (exact match)"),
+):
+    page, per_page = qp
+    feed = get_hot_feed()
+    if channel is None and query is None and sort == "published_desc" and cursor is None:
+        # Unfiltered newest-first pages come from the in-memory feed while it covers them
+        async with get_read_session() as session:
+            # One request re-warms an aged-out feed; others read the database meanwhile
+            # instead of queueing to repeat the same query
+            if not feed.fresh() and not feed.warming:
+                await feed.warm(session)
+            items = feed.page(page, per_page) if feed.fresh() else None
+            if items is not None:
+                total = await count_videos(session, mode=count_mode)
+        if items is not None:
+            return _page_response(
+                total=total,
+                page=page,
+                per_page=per_page,
+                items=items,
+                cursor=None,
+                keyset_next=True,
+                count_mode=count_mode,
+            )
+
+    async with get_read_session() as session:
+        try:
+            total, items = await list_videos(
+                session,
+                page=page,
+                per_page=per_page,
+                channel=channel,
+                sort=sort,
+                cursor=cursor,
+                count_mode=count_mode,
+                query=query,
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return _page_response(
+        total=total,
+        page=page,
+        per_page=per_page,
+        items=items,
+        cursor=cursor,
+        keyset_next=True,
+        count_mode=count_mode,
+    )
+
+
 @router.api_route("/_seed", methods=["POST", "GET"])
 async def seed_demo():
     """Insert a few demo videos for local UI preview.
@@ -93,7 +184,7 @@ async def seed_demo():
         ]
         # Use existing upsert logic
         from ..crud import upsert_videos
-        inserted = await upsert_videos(session, samples)
+        inserted = (await upsert_videos(session, samples)).inserted
     return {"status": "ok", "inserted": inserted}
 
 
@@ -101,91 +192,14 @@ async def seed_demo():
 async def fetch_now(q: str | None = Query(None, description="Optional search query to fetch now")):
     """Manually fetch latest videos from YouTube and upsert.
 
-    Uses max(published_at) from DB as a starting point; falls back to 7 days.
-    Requires YOUTUBE_API_KEYS to be configured.
+    Runs on the background poller's client and key pool; concurrent calls for the
+    same query share one fetch (see ``BackgroundPoller.fetch_now``). Requires
+    YOUTUBE_API_KEYS to be configured.
     """
     settings = get_settings()
     if not settings.youtube_api_keys:
         raise HTTPException(status_code=400, detail="YOUTUBE_API_KEYS not configured.")
-
-    # Determine published_after cutoff(s)
-    async with get_session() as session:
-        res = await session.execute(select(func.max(Video.published_at)))
-        max_ts = res.scalar()
-        # Normalize DB timestamp to timezone-aware UTC if it's naive
-        if isinstance(max_ts, datetime) and (max_ts.tzinfo is None or max_ts.tzinfo.utcoffset(max_ts) is None):
-            max_ts = max_ts.replace(tzinfo=timezone.utc)
-
-    from ..youtube_client import YouTubeClient
-    client = YouTubeClient()
-    try:
-        now_utc = datetime.now(timezone.utc)
-        # Try multiple cutoffs to avoid too-tight windows (e.g., demo data near now)
-        cutoffs: list[datetime] = []
-        if q:
-            cutoffs = [
-                now_utc - timedelta(days=2),
-                now_utc - timedelta(days=7),
-                now_utc - timedelta(days=30),
-                now_utc - timedelta(days=90),
-            ]
-        else:
-            base = max_ts or (now_utc - timedelta(days=7))
-            # Ensure base is timezone-aware UTC
-            if isinstance(base, datetime) and (base.tzinfo is None or base.tzinfo.utcoffset(base) is None):
-                base = base.replace(tzinfo=timezone.utc)
-            # Clamp base to past and provide looser fallbacks
-            if base > now_utc:
-                base = now_utc - timedelta(days=2)
-            cutoffs = [
-                base - timedelta(hours=1),
-                now_utc - timedelta(days=2),
-                now_utc - timedelta(days=7),
-                now_utc - timedelta(days=30),
-                now_utc - timedelta(days=90),
-            ]
-
-        items = []
-        tried_cutoff = None
-        # Minimal debug: helps check keys presence and cutoff strategy (no secrets)
-        try:
-            print(f"[fetch_now] q={'set' if q else 'default'}; keys={len(settings.youtube_api_keys)}; tries={len(cutoffs)}")
-        except Exception:
-            pass
-        for co in cutoffs:
-            tried_cutoff = co
-            items = await client.search_latest(published_after=co, query=q)
-            if items:
-                break
-        # If still nothing, attempt without publishedAfter as a last resort
-        if not items:
-            tried_cutoff = None
-            items = await client.search_latest(published_after=None, query=q, include_published_after=False)
-        payloads = YouTubeClient.transform_items(items)
-        # Normalize published_at to timezone-aware datetime
-        norm: list[dict] = []
-        for p in payloads:
-            try:
-                if isinstance(p.get("published_at"), str):
-                    p["published_at"] = datetime.fromisoformat(p["published_at"].replace("Z", "+00:00"))
-                norm.append(p)
-            except Exception:
-                # skip malformed rows
-                continue
-        from ..crud import upsert_videos
-        async with get_session() as session:
-            await upsert_videos(session, norm)
-        return {
-            "status": "ok",
-            "fetched": len(items),
-            "inserted": len(norm),
-            "query": q or get_settings().youtube_query,
-            "published_after": tried_cutoff.isoformat().replace("+00:00", "Z") if tried_cutoff else None,
-            "last_status": client.last_status_code,
-            "last_error": client.last_error,
-        }
-    finally:
-        await client.close()
+    return await get_poller().fetch_now(q or settings.youtube_query)
 
 
 @router.get("/search", response_model=PaginatedVideos)
@@ -198,28 +212,75 @@ async def search(
         description="Sort order (applied as a secondary order after relevance)",
         regex="^(published_desc|published_asc)$",
     ),
+    cursor: str | None = Query(
+        None,
+        description="Keyset cursor (empty for the first page); walks matches by published_at instead of relevance",
+    ),
+    count_mode: str = _COUNT_MODE,
 ):
     page, per_page = qp
-    async with get_session() as session:
-        total, items = await search_videos(
-            session, query=q, page=page, per_page=per_page, channel=channel, sort=sort
-        )
-    return {
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "next_page": page + 1 if page * per_page < total else None,
-        "prev_page": page - 1 if page > 1 else None,
-        "items": [
-            VideoOut(
-                video_id=i.video_id,
-                title=i.title,
-                description=i.description,
-                published_at=i.published_at,
-                thumbnails=i.thumbnails,
-                channel_id=i.channel_id,
-                channel_title=i.channel_title,
+    cache = get_search_cache()
+    position = ("cursor", cursor) if cursor is not None else ("page", page)
+    cache_key = (q, channel, sort, position, per_page, count_mode)
+    body = cache.get(cache_key)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+    # Read before querying so rows inserted mid-query cannot be cached as current
+    generation = cache.generation
+    async with get_read_session() as session:
+        try:
+            result = await search_videos(
+                session,
+                query=q,
+                page=page,
+                per_page=per_page,
+                channel=channel,
+                sort=sort,
+                cursor=cursor,
+                count_mode=count_mode,
             )
-            for i in items
-        ],
-    }
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+    # Relevance-ordered pages cannot seed a keyset cursor; only cursor walks can
+    payload = _page_response(
+        total=result.total,
+        page=page,
+        per_page=per_page,
+        items=result.items,
+        cursor=cursor,
+        keyset_next=cursor is not None,
+        count_mode=count_mode,
+        search_tier=result.tier,
+    )
+    body = PaginatedVideos(**payload).model_dump_json().encode()
+    cache.put(cache_key, body, generation)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": "MISS"})
+
+
+@router.get("/_search_cache")
+async def search_cache_stats():
+    """Hit/miss/eviction counters and size of the search result cache."""
+    return get_search_cache().stats()
+
+
+# Declared last so the static routes above take precedence over the path parameter
+@router.get("/trending", response_model=TrendingVideos)
+async def trending(
+    hours: int = Query(24, ge=1, le=24 * 30, description="Only videos published within this many hours"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Fastest-growing recent videos by views per hour, precomputed by the stats sampler."""
+    async with get_read_session() as session:
+        rows = await trending_videos(session, hours=hours, limit=limit)
+    return {"hours": hours, "items": [TrendingVideo.model_validate(r, from_attributes=True) for r in rows]}
+
+
+@router.get("/{video_id}", response_model=VideoDetail)
+async def get_video_detail(video_id: str):
+    """Return one video including its raw YouTube payload."""
+    async with get_read_session() as session:
+        video = await get_video(session, video_id)
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found.")
+    return VideoDetail.model_validate(video, from_attributes=True)
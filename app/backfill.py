@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import column, literal, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .crud import (
+    UpsertCounts,
+    as_utc,
+    get_backfill_windows,
+    on_video_conflict,
+    save_backfill_windows,
+    upsert_videos,
+    video_row,
+)
+from .db import get_session
+from .enrichment import Enricher, build_enricher
+from .models import Video, VideoQuery
+from .partitions import ensure_partitions, videos_partitioned
+from .poller import _parse_items, load_key_health, save_key_health
+from .youtube_client import YouTubeClient
+
+logger = logging.getLogger(__name__)
+
+# search.list stops paginating after roughly 500 results, i.e. 10 pages per window
+MAX_PAGES_PER_WINDOW = 10
+
+# Staging table layout, in COPY record order: exactly the columns video_row() produces
+STAGE_COLUMNS = tuple(video_row({}))
+_JSON_COLUMNS = {"thumbnails", "raw_json", "tags"}
+
+
+class Window(NamedTuple):
+    start: datetime
+    end: datetime
+
+
+def plan_windows(
+    since: datetime, until: datetime, width: timedelta, done: list[tuple[datetime, datetime]]
+) -> list[Window]:
+    """Split ``[since, until)`` into windows of at most ``width``, newest first.
+
+    Ranges in ``done`` (completed checkpoints, possibly from runs with a
+    different width) are cut out first, so a resumed run only fetches the gaps.
+    """
+    gaps = [(since, until)]
+    for done_start, done_end in sorted(done):
+        remaining = []
+        for start, end in gaps:
+            if done_end <= start or done_start >= end:
+                remaining.append((start, end))
+                continue
+            if start < done_start:
+                remaining.append((start, done_start))
+            if done_end < end:
+                remaining.append((done_end, end))
+        gaps = remaining
+    windows = []
+    for start, end in gaps:
+        while end > start:
+            windows.append(Window(max(start, end - width), end))
+            end = windows[-1].start
+    windows.sort(key=lambda w: w.end, reverse=True)
+    return windows
+
+
+def _copy_value(name: str, value):
+    # asyncpg's COPY encoder takes json/jsonb as text
+    if name in _JSON_COLUMNS and value is not None:
+        return json.dumps(value)
+    return value
+
+
+async def copy_merge(session: AsyncSession, rows: list[dict], query: Optional[str]) -> UpsertCounts:
+    """Postgres bulk load: COPY into a temporary staging table, then one merge into ``videos``.
+
+    The merge is the same change-detecting ON CONFLICT as ``upsert_videos``
+    (``on_video_conflict``); ``rows`` must already be unique by ``video_id``.
+    """
+    conn = await session.connection()
+    cols = ", ".join(STAGE_COLUMNS)
+    await conn.execute(
+        text(f"CREATE TEMP TABLE backfill_stage ON COMMIT DROP AS SELECT {cols} FROM videos WITH NO DATA")
+    )
+    records = [tuple(_copy_value(c, row[c]) for c in STAGE_COLUMNS) for row in rows]
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table("backfill_stage", records=records, columns=list(STAGE_COLUMNS))
+
+    partitioned = await videos_partitioned(session)
+    if partitioned:
+        # Same as pin_published_at: known videos keep the partition they were stored in
+        await conn.execute(
+            text(
+                "UPDATE backfill_stage s SET published_at = v.published_at FROM video_ids v "
+                "WHERE v.video_id = s.video_id AND v.published_at IS DISTINCT FROM s.published_at"
+            )
+        )
+    stage = table("backfill_stage", *(column(c) for c in STAGE_COLUMNS))
+    merge = on_video_conflict(
+        pg_insert(Video.__table__).from_select(list(STAGE_COLUMNS), select(*stage.c)), partitioned=partitioned
+    )
+    revisions = (await session.execute(merge.returning(Video.content_revision))).scalars().all()
+    # Links of every query keep their copy of published_at in step with the merged rows
+    await conn.execute(
+        text(
+            "UPDATE video_queries q SET published_at = s.published_at FROM backfill_stage s "
+            "WHERE q.video_id = s.video_id AND q.published_at IS DISTINCT FROM s.published_at"
+        )
+    )
+    if query:
+        links = pg_insert(VideoQuery.__table__).from_select(
+            ["query", "video_id", "published_at"], select(literal(query), stage.c.video_id, stage.c.published_at)
+        )
+        await session.execute(links.on_conflict_do_nothing(index_elements=[VideoQuery.query, VideoQuery.video_id]))
+    inserted = sum(1 for r in revisions if r == 1)
+    return UpsertCounts(inserted, len(revisions) - inserted, len(rows) - len(revisions))
+
+
+async def load_videos(session: AsyncSession, rows: list[dict], query: Optional[str], batch_size: int) -> UpsertCounts:
+    """COPY + merge on Postgres; elsewhere ``upsert_videos`` (one executemany) per ``batch_size`` rows."""
+    if session.bind is not None and session.bind.dialect.name == "postgresql":
+        return await copy_merge(session, [video_row(r) for r in rows], query)
+    totals = UpsertCounts(0, 0, 0)
+    for i in range(0, len(rows), batch_size):
+        counts = await upsert_videos(session, rows[i:i + batch_size], query=query)
+        totals = UpsertCounts(*(a + b for a, b in zip(totals, counts)))
+    return totals
+
+
+class Backfill:
+    """Loads a date range of search results for one query, window by window.
+
+    ``concurrency`` workers walk windows through the shared client and key
+    pool. A window that runs out of pages before reaching its start is
+    checkpointed up to the oldest video seen and its remainder re-queued; a
+    window whose call failed is not checkpointed and is retried by the next
+    run. A single loader writes whatever has arrived once it is idle (capped
+    near ``batch_size`` rows), committing rows and checkpoints together.
+    """
+
+    def __init__(
+        self,
+        query: str,
+        client: YouTubeClient,
+        *,
+        concurrency: int,
+        batch_size: int,
+        max_pages: int = MAX_PAGES_PER_WINDOW,
+        enricher: Optional[Enricher] = None,
+    ):
+        self.query = query
+        self.client = client
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_pages = max_pages
+        self.enricher = enricher
+        self.windows_planned = 0
+        self.windows_done = 0
+        self.windows_failed = 0
+        self.fetched = 0
+        self.loaded = UpsertCounts(0, 0, 0)
+        self.load_seconds = 0.0
+        self._started: float | None = None
+
+    async def run(self, since: datetime, until: datetime, width: timedelta) -> dict:
+        async with get_session() as session:
+            # Partitioned videos: months being backfilled get partitions rather than the default one
+            await ensure_partitions(session, since, until)
+            done = await get_backfill_windows(session, self.query)
+        windows = plan_windows(since, until, width, done)
+        self.windows_planned = len(windows)
+        self._started = time.monotonic()
+
+        todo: asyncio.Queue[Window] = asyncio.Queue()
+        for window in windows:
+            todo.put_nowait(window)
+        loads: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        loader = asyncio.create_task(self._load_loop(loads))
+        workers = [asyncio.create_task(self._fetch_worker(todo, loads)) for _ in range(self.concurrency)]
+        # Workers re-queue window remainders, so wait on the queue rather than the workers
+        drained = asyncio.create_task(todo.join())
+        try:
+            await asyncio.wait({drained, loader}, return_when=asyncio.FIRST_COMPLETED)
+            if loader.done():
+                loader.result()  # a failed load aborts the run; its windows are not checkpointed
+            await loads.put(None)
+            await loader
+        finally:
+            for task in (*workers, drained, loader):
+                task.cancel()
+            await asyncio.gather(*workers, drained, loader, return_exceptions=True)
+        return self.report()
+
+    async def _fetch_worker(self, todo: asyncio.Queue, loads: asyncio.Queue) -> None:
+        while True:
+            window = await todo.get()
+            try:
+                await self._fetch_window(window, todo, loads)
+            except Exception as e:
+                self.windows_failed += 1
+                logger.warning("backfill window %s..%s failed: %s", window.start, window.end, e)
+            finally:
+                todo.task_done()
+
+    async def _fetch_window(self, window: Window, todo: asyncio.Queue, loads: asyncio.Queue) -> None:
+        rows: list[dict] = []
+        failed, token = None, None
+        async for page in self.client.iter_search_pages(
+            published_after=window.start,
+            published_before=window.end,
+            query=self.query,
+            max_pages=self.max_pages,
+        ):
+            if page.error is not None and not page.items:
+                failed = page.error
+                break
+            rows.extend(r for r in _parse_items(page.items) if r.get("video_id"))
+            token = page.next_page_token
+        self.fetched += len(rows)
+        if self.enricher is not None and rows:
+            await self.enricher.enrich(rows)
+
+        checkpoint = None
+        if failed is not None:
+            self.windows_failed += 1
+            logger.warning("backfill window %s..%s stopped: %s", window.start, window.end, failed)
+        else:
+            oldest = min((as_utc(r["published_at"]) for r in rows if r.get("published_at")), default=None)
+            if token and oldest is not None and window.start < oldest < window.end:
+                # Out of pages before reaching the window start: keep what is covered, re-queue the rest
+                checkpoint = (Window(oldest, window.end), len(rows))
+                todo.put_nowait(Window(window.start, oldest))
+            else:
+                checkpoint = (window, len(rows))
+        await loads.put((rows, checkpoint))
+
+    async def _load_loop(self, loads: asyncio.Queue) -> None:
+        rows: dict[str, dict] = {}
+        checkpoints: list[tuple[Window, int]] = []
+        while True:
+            item = await loads.get()
+            if item is not None:
+                window_rows, checkpoint = item
+                for row in window_rows:
+                    rows[row["video_id"]] = row
+                if checkpoint is not None:
+                    checkpoints.append(checkpoint)
+            if (rows or checkpoints) and (item is None or len(rows) >= self.batch_size or loads.empty()):
+                await self._flush(list(rows.values()), checkpoints)
+                rows, checkpoints = {}, []
+            if item is None:
+                return
+
+    async def _flush(self, rows: list[dict], checkpoints: list[tuple[Window, int]]) -> None:
+        started = time.monotonic()
+        async with get_session() as session:
+            counts = await load_videos(session, rows, self.query, self.batch_size)
+            await save_backfill_windows(
+                session,
+                [
+                    {"query": self.query, "window_start": w.start, "window_end": w.end, "fetched": n}
+                    for w, n in checkpoints
+                ],
+            )
+        self.load_seconds += time.monotonic() - started
+        self.loaded = UpsertCounts(*(a + b for a, b in zip(self.loaded, counts)))
+        self.windows_done += len(checkpoints)
+        logger.info(
+            "backfill %r: loaded %d rows (%d new, %d updated), %d windows done",
+            self.query, len(rows), counts.inserted, counts.updated, self.windows_done,
+        )
+
+    def report(self) -> dict:
+        elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        loaded = sum(self.loaded)
+        return {
+            "query": self.query,
+            "windows_planned": self.windows_planned,
+            "windows_done": self.windows_done,
+            "windows_failed": self.windows_failed,
+            "fetched": self.fetched,
+            **self.loaded._asdict(),
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(self.fetched / elapsed, 1) if elapsed else 0.0,
+            "load_rows_per_second": round(loaded / self.load_seconds, 1) if self.load_seconds else 0.0,
+        }
+
+
+def _parse_time(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    client = YouTubeClient()
+    if not len(client.key_rotator):
+        await client.close()
+        raise SystemExit("YOUTUBE_API_KEYS is not configured")
+    await load_key_health(client.key_rotator, client.quota)
+    backfill = Backfill(
+        args.query,
+        client,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        max_pages=args.max_pages,
+        enricher=None if args.no_enrich else build_enricher(client),
+    )
+    try:
+        return await backfill.run(args.since, args.until or datetime.now(timezone.utc), timedelta(days=args.window_days))
+    finally:
+        await save_key_health(client.key_rotator, client.quota)
+        await client.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        prog="python -m app.backfill",
+        description="Load historical search results for a query, resuming from saved checkpoints.",
+    )
+    parser.add_argument("--query", default=settings.youtube_query)
+    parser.add_argument("--since", type=_parse_time, required=True, help="oldest publish time (ISO 8601, UTC if no offset)")
+    parser.add_argument("--until", type=_parse_time, help="newest publish time (default: now)")
+    parser.add_argument("--window-days", type=float, default=settings.backfill_window_days)
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    parser.add_argument("--batch-size", type=int, default=settings.backfill_batch_size)
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES_PER_WINDOW, help="search.list pages per window")
+    parser.add_argument("--no-enrich", action="store_true", help="skip videos.list lookups")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=settings.log_level.upper(), format="%(asctime)s %(levelname)s %(message)s")
+    print(json.dumps(asyncio.run(_main(args))))
+
+
+if __name__ == "__main__":
+    main()
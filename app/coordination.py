@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import socket
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from .config import get_settings
+from .crud import heartbeat_replica, live_replicas, remove_replica
+from .db import get_engine, get_session
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the SQLite stand-in degrades to single-instance
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary but fixed key for pg_try_advisory_lock, shared by every replica
+POLLER_LOCK_KEY = 7_301_884_216_554_001
+
+
+class _AdvisoryLock:
+    """Session-level Postgres advisory lock held on a dedicated connection.
+
+    Postgres drops the lock when that connection dies, so a crashed leader is
+    replaced on the next check by another replica.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self._conn = None
+
+    async def acquire(self) -> bool:
+        if self._conn is not None:
+            try:
+                await self._conn.execute(text("SELECT 1"))
+                return True
+            except Exception:
+                # Connection (and with it the lock) is gone; compete again below
+                await self._discard()
+        conn = await get_engine().connect()
+        try:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            got = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+        except Exception:
+            await conn.close()
+            raise
+        if not got:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def _discard(self) -> None:
+        conn, self._conn = self._conn, None
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            await self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        except Exception:
+            pass
+        await self._discard()
+
+
+class _FileLock:
+    """flock() on a file next to the SQLite database, the stand-in for an advisory lock."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = None
+
+    async def acquire(self) -> bool:
+        if self._fh is not None:
+            return True
+        if fcntl is None:
+            return True
+        fh = open(self.path, "a+")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        self._fh = fh
+        return True
+
+    async def release(self) -> None:
+        if self._fh is None:
+            return
+        try:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+def sqlite_lock_path(database_url: str) -> str:
+    database = make_url(database_url).database
+    if not database or database == ":memory:":
+        return os.path.join(tempfile.gettempdir(), "serri-poller.lock")
+    return os.path.abspath(database) + ".poller.lock"
+
+
+class Coordinator:
+    """Decides which of the configured queries this process polls (mode ``none``: all)."""
+
+    mode = "none"
+
+    def __init__(self, replica_id: str, lease_seconds: float):
+        self.replica_id = replica_id
+        self.lease_seconds = lease_seconds
+        self.owned_queries: list[str] = []
+
+    @property
+    def check_interval(self) -> float:
+        # Renew well inside the lease so a slow tick does not look like a dead replica
+        return max(1.0, self.lease_seconds / 3)
+
+    async def owned(self, queries: list[str]) -> list[str]:
+        self.owned_queries = list(queries)
+        return self.owned_queries
+
+    def owns(self, job: str) -> bool:
+        """Whether this replica runs the cluster-wide background ``job`` (e.g. stats sampling)."""
+        return True
+
+    async def release(self) -> None:
+        self.owned_queries = []
+
+    def describe(self) -> dict:
+        return {"mode": self.mode, "replica_id": self.replica_id, "owned_queries": self.owned_queries}
+
+
+class LeaderCoordinator(Coordinator):
+    """Only the replica holding the poller lock polls, and it polls every query."""
+
+    mode = "leader"
+
+    def __init__(self, replica_id: str, lease_seconds: float, lock):
+        super().__init__(replica_id, lease_seconds)
+        self._lock = lock
+        self.is_leader = False
+
+    async def owned(self, queries: list[str]) -> list[str]:
+        was_leader, self.is_leader = self.is_leader, await self._lock.acquire()
+        if self.is_leader != was_leader:
+            logger.info("poller %s %s leadership", self.replica_id, "acquired" if self.is_leader else "lost")
+        self.owned_queries = list(queries) if self.is_leader else []
+        return self.owned_queries
+
+    def owns(self, job: str) -> bool:
+        return self.is_leader
+
+    async def release(self) -> None:
+        await self._lock.release()
+        self.is_leader = False
+        await super().release()
+
+    def describe(self) -> dict:
+        return {**super().describe(), "is_leader": self.is_leader}
+
+
+def _owner(query: str, replicas: list[str]) -> str:
+    # Rendezvous hashing: when a replica joins or leaves only its own queries move
+    return max(replicas, key=lambda r: hashlib.sha1(f"{r}\x00{query}".encode()).digest())
+
+
+class ShardCoordinator(Coordinator):
+    """Queries are split across replicas that renewed their lease in ``poller_replicas``.
+
+    A replica that stops heartbeating drops out after ``POLL_LEASE_SECONDS`` and
+    its queries are picked up by the survivors on their next check.
+    """
+
+    mode = "shard"
+
+    def __init__(self, replica_id: str, lease_seconds: float):
+        super().__init__(replica_id, lease_seconds)
+        self.replicas: list[str] = []
+
+    async def owned(self, queries: list[str]) -> list[str]:
+        now = datetime.now(timezone.utc)
+        async with get_session() as session:
+            await heartbeat_replica(session, self.replica_id, now)
+            replicas = await live_replicas(session, now - timedelta(seconds=self.lease_seconds))
+        if self.replica_id not in replicas:
+            replicas.append(self.replica_id)
+        if replicas != self.replicas:
+            logger.info("poller %s sees %d live replicas", self.replica_id, len(replicas))
+        self.replicas = replicas
+        self.owned_queries = [q for q in queries if _owner(q, replicas) == self.replica_id]
+        return self.owned_queries
+
+    def owns(self, job: str) -> bool:
+        return bool(self.replicas) and _owner(job, self.replicas) == self.replica_id
+
+    async def release(self) -> None:
+        # Leave promptly so the survivors rebalance now rather than after the lease lapses
+        try:
+            async with get_session() as session:
+                await remove_replica(session, self.replica_id)
+        except Exception:
+            pass
+        await super().release()
+
+    def describe(self) -> dict:
+        return {**super().describe(), "live_replicas": self.replicas}
+
+
+def build_coordinator(replica_id: Optional[str] = None) -> Coordinator:
+    settings = get_settings()
+    replica_id = replica_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    mode = settings.poll_coordination
+    if mode == "shard":
+        return ShardCoordinator(replica_id, settings.poll_lease_seconds)
+    if mode == "leader":
+        if make_url(settings.database_url).get_backend_name() == "postgresql":
+            lock = _AdvisoryLock(POLLER_LOCK_KEY)
+        else:
+            lock = _FileLock(sqlite_lock_path(settings.database_url))
+        return LeaderCoordinator(replica_id, settings.poll_lease_seconds, lock)
+    return Coordinator(replica_id, settings.poll_lease_seconds)
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from .config import get_settings
+from .models import Video
+
+logger = logging.getLogger(__name__)
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+class CountCache:
+    """Small TTL cache of totals keyed on the filter that produced them."""
+
+    def __init__(self, ttl: float, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, int]] = OrderedDict()
+
+    def get(self, key: Hashable) -> int | None:
+        hit = self._entries.get(key)
+        if hit is None:
+            return None
+        expires_at, value = hit
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        return value
+
+    def put(self, key: Hashable, value: int) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class _UnfilteredTotal:
+    """Row count of ``videos`` kept current by the ingest path.
+
+    Seeded from one ``count(*)``, then bumped by ``note_inserted``; a periodic
+    resync absorbs writes made by other processes.
+    """
+
+    def __init__(self):
+        self.value: int | None = None
+        self.synced_at = 0.0
+
+    def stale(self, resync_seconds: float) -> bool:
+        return self.value is None or time.monotonic() - self.synced_at >= resync_seconds
+
+    def set(self, value: int) -> None:
+        self.value = value
+        self.synced_at = time.monotonic()
+
+
+_cache: CountCache | None = None
+_unfiltered = _UnfilteredTotal()
+
+
+def _get_cache() -> CountCache:
+    global _cache
+    if _cache is None:
+        _cache = CountCache(get_settings().count_cache_ttl)
+    return _cache
+
+
+def note_inserted(n: int) -> None:
+    """Called when an ``upsert_videos`` transaction commits, with the number of rows it inserted."""
+    if n and _unfiltered.value is not None:
+        _unfiltered.value += n
+
+
+def is_approximate(total: int | None, mode: str) -> bool:
+    # Estimate mode is exact below the cap; at or above it the value is a floor or a planner guess
+    return mode == "estimate" and total is not None and total >= get_settings().count_cap
+
+
+async def _exact(session: AsyncSession, where, params: dict[str, Any]) -> int:
+    stmt = select(func.count()).select_from(Video).where(where)
+    return int(await session.scalar(stmt.params(**params)) or 0)
+
+
+async def count_capped(session: AsyncSession, where, params: dict[str, Any], cap: int) -> int:
+    """Count matches of ``where`` but stop once ``cap`` rows have been seen."""
+    inner = select(Video.id).where(where).limit(cap).subquery()
+    stmt = select(func.count()).select_from(inner)
+    return int(await session.scalar(stmt.params(**params)) or 0)
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a statement, compiled with its bound parameters.
+
+    Rendering the inner statement with literal binds would fail on the untyped
+    ``:q`` binds of the ``text()`` search predicates.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def _planner_estimate(session: AsyncSession, where, params: dict[str, Any]) -> int:
+    stmt = select(Video.id).where(where).params(**params)
+    conn = await session.connection()
+    # Savepoint so a failed EXPLAIN does not abort the caller's transaction
+    async with conn.begin_nested():
+        plan = (await conn.execute(Explain(stmt))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_videos(
+    session: AsyncSession,
+    where=None,
+    *,
+    mode: str = "exact",
+    key: Hashable = None,
+    params: dict[str, Any] | None = None,
+) -> int | None:
+    """Total for ``where`` under the requested count mode.
+
+    - ``none``: skip counting and return None.
+    - ``exact``: unfiltered totals come from the ingest-maintained counter,
+      filtered ones from a TTL-cached ``count(*)``.
+    - ``estimate``: like exact for unfiltered; filtered totals are exact up to
+      ``COUNT_CAP`` and beyond that a Postgres planner estimate or the cap itself.
+    """
+    if mode == "none":
+        return None
+    settings = get_settings()
+    params = params or {}
+    if where is None:
+        if _unfiltered.stale(settings.count_resync_seconds):
+            _unfiltered.set(int(await session.scalar(select(func.count()).select_from(Video)) or 0))
+        return _unfiltered.value
+
+    cache = _get_cache()
+    cache_key = (mode, key)
+    cached = cache.get(cache_key) if key is not None else None
+    if cached is not None:
+        return cached
+
+    if mode == "exact":
+        total = await _exact(session, where, params)
+    else:
+        cap = settings.count_cap
+        total = None
+        if session.bind is not None and session.bind.dialect.name == "postgresql":
+            try:
+                estimate = await _planner_estimate(session, where, params)
+            except Exception as e:
+                logger.warning("planner estimate failed, falling back to a capped count: %s", e)
+                estimate = None
+            # Planner guesses are poor for small sets, so only trust them past the cap
+            if estimate is not None and estimate > cap:
+                total = estimate
+        if total is None:
+            total = await count_capped(session, where, params, cap)
+    if key is not None:
+        cache.put(cache_key, total)
+    return total
@@ -1,67 +1,416 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, Sequence
+import base64
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple, Sequence
 
-from sqlalchemy import select, func, or_, and_, text
+from sqlalchemy import Row, bindparam, case, event, column, select, func, or_, and_, table, text, tuple_, update
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, undefer
 
-from .models import Video
+from . import counts
+from .db import fts_known_ready, mark_fts_ready
+from .enrichment import ENRICHED_FIELDS
+from .hot_feed import get_hot_feed
+from .models import ApiKeyState, BackfillWindow, PollerReplica, PollState, Video, VideoQuery
+from .partitions import video_ids, videos_partitioned
+from .search_cache import get_search_cache
+from .trigram_index import get_trigram_index
 
+logger = logging.getLogger(__name__)
 
-async def upsert_videos(session: AsyncSession, videos: list[dict]) -> int:
-    """Insert videos idempotently based on unique video_id.
 
-    Returns number of records inserted (ignores duplicates).
+def as_utc(value: datetime | None) -> datetime | None:
+    """SQLite hands back naive datetimes; stored values are always UTC."""
+    if value is not None and (value.tzinfo is None or value.tzinfo.utcoffset(value) is None):
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+async def get_watermarks(session: AsyncSession) -> dict[str, datetime | None]:
+    rows = (await session.execute(select(PollState.query, PollState.published_after))).all()
+    return {r.query: as_utc(r.published_after) for r in rows}
+
+
+async def get_page_tokens(session: AsyncSession) -> dict[str, str]:
+    """Where each query's last cut-short walk stopped, for resuming it from the same watermark."""
+    stmt = select(PollState.query, PollState.page_token).where(PollState.page_token.is_not(None))
+    return {r.query: r.page_token for r in (await session.execute(stmt)).all()}
+
+
+class PollOutcome(NamedTuple):
+    """What one poll of a query left behind, persisted to ``poll_state``."""
+
+    published_after: datetime | None = None
+    page_token: str | None = None
+    last_status: int | None = None
+    last_error: str | None = None
+
+
+async def get_poll_state(session: AsyncSession, query: str) -> PollState | None:
+    return await session.get(PollState, query)
+
+
+async def save_poll_state(session: AsyncSession, outcomes: dict[str, PollOutcome]) -> None:
+    """Record poll outcomes per query; the watermark never moves backwards.
+
+    Callers run this in the session that upserts the poll's rows, so the state
+    commits together with the batch it describes.
+    """
+    if not outcomes:
+        return
+    values = [{"query": q, **o._asdict()} for q, o in outcomes.items()]
+    dialect_name = session.bind.dialect.name if session.bind is not None else ""
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(PollState.__table__).values(values)
+    advance = or_(
+        PollState.published_after.is_(None),
+        PollState.published_after < stmt.excluded.published_after,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PollState.query],
+        set_={
+            "published_after": case((advance, stmt.excluded.published_after), else_=PollState.published_after),
+            "page_token": stmt.excluded.page_token,
+            "last_status": stmt.excluded.last_status,
+            "last_error": stmt.excluded.last_error,
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def get_key_states(session: AsyncSession) -> dict[str, ApiKeyState]:
+    rows = (await session.execute(select(ApiKeyState))).scalars().all()
+    return {r.key_hash: r for r in rows}
+
+
+async def save_key_states(session: AsyncSession, states: list[dict]) -> None:
+    """Upsert ``api_key_state`` rows (key_hash, cooldown_until, quota_day, units_spent).
+
+    ``units_spent`` is what the caller spent since its last save: it is added
+    to the stored figure for the same quota day, so processes sharing keys
+    accumulate one total instead of overwriting each other's.
+    """
+    if not states:
+        return
+    dialect_name = session.bind.dialect.name if session.bind is not None else ""
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(ApiKeyState.__table__).values(states)
+    same_day = ApiKeyState.quota_day == stmt.excluded.quota_day
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ApiKeyState.key_hash],
+        set_={
+            "cooldown_until": stmt.excluded.cooldown_until,
+            "quota_day": stmt.excluded.quota_day,
+            "units_spent": case(
+                (same_day, ApiKeyState.units_spent + stmt.excluded.units_spent), else_=stmt.excluded.units_spent
+            ),
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def heartbeat_replica(session: AsyncSession, replica_id: str, now: datetime) -> None:
+    dialect_name = session.bind.dialect.name if session.bind is not None else ""
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(PollerReplica.__table__).values(replica_id=replica_id, heartbeat_at=now, started_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PollerReplica.replica_id], set_={"heartbeat_at": stmt.excluded.heartbeat_at}
+    )
+    await session.execute(stmt)
+
+
+async def live_replicas(session: AsyncSession, since: datetime) -> list[str]:
+    """Replicas whose lease was renewed at or after ``since``; older rows are pruned."""
+    await session.execute(PollerReplica.__table__.delete().where(PollerReplica.heartbeat_at < since))
+    stmt = select(PollerReplica.replica_id).order_by(PollerReplica.replica_id)
+    return list((await session.execute(stmt)).scalars())
+
+
+async def remove_replica(session: AsyncSession, replica_id: str) -> None:
+    await session.execute(PollerReplica.__table__.delete().where(PollerReplica.replica_id == replica_id))
+
+
+async def get_backfill_windows(session: AsyncSession, query: str) -> list[tuple[datetime, datetime]]:
+    stmt = select(BackfillWindow.window_start, BackfillWindow.window_end).where(BackfillWindow.query == query)
+    return [(as_utc(start), as_utc(end)) for start, end in (await session.execute(stmt)).all()]
+
+
+async def save_backfill_windows(session: AsyncSession, windows: list[dict]) -> None:
+    """Record completed backfill windows (``query``, ``window_start``, ``window_end``, ``fetched``)."""
+    if not windows:
+        return
+    dialect_name = session.bind.dialect.name if session.bind is not None else ""
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    stmt = insert(BackfillWindow.__table__).values(windows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BackfillWindow.query, BackfillWindow.window_start, BackfillWindow.window_end],
+        set_={"fetched": stmt.excluded.fetched, "completed_at": func.now()},
+    )
+    await session.execute(stmt)
+
+
+# Columns VideoOut needs (plus id for cursors). Read paths project these so the
+# raw_json blob never leaves the database on list/search calls.
+OUT_COLUMNS = (
+    Video.id,
+    Video.video_id,
+    Video.title,
+    Video.description,
+    Video.published_at,
+    Video.thumbnails,
+    Video.channel_id,
+    Video.channel_title,
+    Video.duration_seconds,
+    Video.view_count,
+    Video.like_count,
+    Video.tags,
+)
+
+
+def _select_out():
+    return select(*OUT_COLUMNS)
+
+
+def _note_inserted(session: AsyncSession, rows: Sequence[Row]) -> None:
+    # Everything fed from written rows waits for the commit, so a rolled-back
+    # (and retried) batch is neither counted twice nor indexed under reusable ids
+    if rows:
+        session.info.setdefault("inserted_videos", []).extend(rows)
+        session.info.setdefault("changed_videos", []).extend(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    inserted = session.info.pop("inserted_videos", None)
+    if inserted:
+        counts.note_inserted(len(inserted))
+    rows = session.info.pop("changed_videos", None)
+    if rows:
+        # New and edited videos alike; an edit replaces what the trigram index holds for it
+        index = get_trigram_index()
+        for row in rows:
+            index.add(row.id, row.title, row.description, row.published_at)
+        get_search_cache().bump_generation()
+        get_hot_feed().push(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("inserted_videos", None)
+    session.info.pop("changed_videos", None)
+
+
+# Fields taken from search.list; a change in any of them makes an upsert rewrite the row
+HASHED_FIELDS = ("title", "description", "channel_id", "channel_title", "published_at", "thumbnails")
+
+
+def content_hash(video: dict) -> str:
+    def canonical(value):
+        return as_utc(value).isoformat() if isinstance(value, datetime) else value
+
+    payload = json.dumps([canonical(video.get(f)) for f in HASHED_FIELDS], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class UpsertCounts(NamedTuple):
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+async def needs_enrichment(session: AsyncSession, videos: list[dict]) -> list[dict]:
+    """The rows worth a videos.list lookup: new videos, edited ones and ones never enriched.
+
+    A re-seen unchanged video keeps its stored enrichment (``on_video_conflict``
+    never overwrites it with NULL), and the stats sampler refreshes view counts.
     """
-    if not videos:
-        return 0
-
-    # Normalize input dicts to model columns
-    cleaned = []
-    for v in videos:
-        cleaned.append(
-            {
-                "video_id": v.get("video_id"),
-                "title": v.get("title"),
-                "description": v.get("description"),
-                "channel_title": v.get("channel_title"),
-                "channel_id": v.get("channel_id"),
-                "published_at": v.get("published_at"),
-                "thumbnails": v.get("thumbnails"),
-                "raw_json": v.get("raw_json"),
-            }
+    ids = list(dict.fromkeys(v["video_id"] for v in videos if v.get("video_id")))
+    stored: dict[str, str] = {}
+    for i in range(0, len(ids), 500):
+        stmt = select(Video.video_id, Video.content_hash).where(
+            Video.video_id.in_(ids[i:i + 500]), Video.enriched_at.is_not(None)
         )
+        stored.update((await session.execute(stmt)).tuples().all())
+    return [v for v in videos if v.get("video_id") and stored.get(v["video_id"]) != content_hash(v)]
+
 
+def video_row(v: dict) -> dict:
+    """Normalize a parsed video dict to ``videos`` columns, including its ``content_hash``."""
+    return {
+        "video_id": v.get("video_id"),
+        "title": v.get("title"),
+        "description": v.get("description"),
+        "channel_title": v.get("channel_title"),
+        "channel_id": v.get("channel_id"),
+        "published_at": v.get("published_at"),
+        "thumbnails": v.get("thumbnails"),
+        "raw_json": v.get("raw_json"),
+        "content_hash": content_hash(v),
+        **{f: v.get(f) for f in ENRICHED_FIELDS},
+    }
+
+
+def on_video_conflict(stmt, *, partitioned: bool = False):
+    """Give a ``videos`` insert the change-detecting ON CONFLICT (video_id) clause.
+
+    The stored row is rewritten only when the content hash differs or the
+    incoming copy brings enrichment data it lacks; enrichment columns are never
+    overwritten with NULL. Works for both dialects' ``insert`` constructs.
+    A partitioned ``videos`` can only be unique on (video_id, published_at),
+    so rows must carry the stored published_at (see ``pin_published_at``).
+    """
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[Video.video_id, Video.published_at] if partitioned else [Video.video_id],
+        set_={
+            **{f: excluded[f] for f in (*HASHED_FIELDS, "raw_json", "content_hash")},
+            **{f: func.coalesce(excluded[f], Video.__table__.c[f]) for f in ENRICHED_FIELDS},
+            "content_revision": Video.content_revision + 1,
+            "updated_at": func.now(),
+        },
+        where=or_(
+            Video.content_hash.is_distinct_from(excluded.content_hash),
+            and_(Video.enriched_at.is_(None), excluded.enriched_at.is_not(None)),
+        ),
+    )
+
+
+async def pin_published_at(session: AsyncSession, rows: dict[str, dict]) -> None:
+    """Partitioned videos: give known videos the published_at they were first stored under.
+
+    That keeps an upstream change of publishedAt from routing a video to a
+    second partition; ``video_ids`` rejects such a duplicate anyway.
+    """
+    stmt = select(video_ids.c.video_id, video_ids.c.published_at).where(video_ids.c.video_id.in_(list(rows)))
+    for video_id, published_at in (await session.execute(stmt)).all():
+        rows[video_id]["published_at"] = published_at
+
+
+async def upsert_videos(session: AsyncSession, videos: list[dict], *, query: str | None = None) -> UpsertCounts:
+    """Insert new videos and update changed ones in one statement per batch.
+
+    Rows carry a ``content_hash`` of ``HASHED_FIELDS`` so re-seen unchanged
+    videos cost no write (see ``on_video_conflict``). When ``query`` is given
+    every video (new or already stored) is also linked to it in ``video_queries``.
+    """
+    # A repeated video_id keeps its last copy
+    cleaned = {v["video_id"]: video_row(v) for v in videos if v.get("video_id")}
     if not cleaned:
-        return 0
+        return UpsertCounts(0, 0, 0)
 
     dialect_name = session.bind.dialect.name if session.bind is not None else ""
-    if dialect_name == "postgresql":
-        stmt = (
-            pg_insert(Video.__table__)
-            .values(cleaned)
-            .on_conflict_do_nothing(index_elements=[Video.video_id])
-            .returning(Video.video_id)
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    partitioned = await videos_partitioned(session)
+    if partitioned:
+        await pin_published_at(session, cleaned)
+    stmt = on_video_conflict(insert(Video.__table__), partitioned=partitioned)
+    stmt = stmt.returning(*OUT_COLUMNS, Video.content_revision)
+    # Rows skipped by the WHERE clause are not returned; a fresh insert has revision 1
+    written = (await session.execute(stmt, list(cleaned.values()))).all()
+    inserted = [r for r in written if r.content_revision == 1]
+    _note_inserted(session, inserted)
+    updated = [r for r in written if r.content_revision != 1]
+    if updated:
+        session.info.setdefault("changed_videos", []).extend(updated)
+        await _sync_query_links(session, updated)
+    if query:
+        await _link_query(session, query, list(cleaned.values()), dialect_name)
+    return UpsertCounts(len(inserted), len(updated), len(cleaned) - len(written))
+
+
+async def _link_query(session: AsyncSession, query: str, videos: list[dict], dialect_name: str) -> None:
+    insert = pg_insert if dialect_name == "postgresql" else sqlite_insert
+    links = {
+        v["video_id"]: {"query": query, "video_id": v["video_id"], "published_at": v["published_at"]}
+        for v in videos
+        if v.get("video_id")
+    }
+    if not links:
+        return
+    stmt = insert(VideoQuery.__table__).values(list(links.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VideoQuery.query, VideoQuery.video_id],
+        set_={"published_at": stmt.excluded.published_at},
+        where=VideoQuery.published_at.is_distinct_from(stmt.excluded.published_at),
+    )
+    await session.execute(stmt)
+
+
+async def _sync_query_links(session: AsyncSession, rows: Sequence[Row]) -> None:
+    """Copy rewritten ``published_at`` values onto every ``video_queries`` link of those videos.
+
+    Per-query listings sort and page on the copy, so it must not go stale.
+    """
+    stmt = (
+        update(VideoQuery.__table__)
+        .where(
+            VideoQuery.video_id == bindparam("b_video_id"),
+            VideoQuery.published_at.is_distinct_from(bindparam("b_published_at")),
         )
-        result = await session.execute(stmt)
-        inserted_ids = result.scalars().all()
-        return len(inserted_ids)
-    else:
-        # SQLite: pre-check existing and bulk insert only new ones
-        ids = [v["video_id"] for v in cleaned]
-        existing = (
-            await session.execute(
-                select(Video.video_id).where(Video.video_id.in_(ids))
-            )
-        ).scalars().all()
-        existing_set = set(existing)
-        to_insert = [v for v in cleaned if v["video_id"] not in existing_set]
-        if not to_insert:
-            return 0
-        await session.execute(Video.__table__.insert(), to_insert)
-        return len(to_insert)
+        .values(published_at=bindparam("b_published_at"))
+    )
+    await session.execute(stmt, [{"b_video_id": r.video_id, "b_published_at": r.published_at} for r in rows])
+
+
+def encode_cursor(published_at: datetime | None, row_id: int) -> str:
+    """Build an opaque keyset cursor pointing just after ``(published_at, id)``."""
+    payload = {"p": published_at.isoformat() if published_at else None, "i": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``encode_cursor``. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        published_at = datetime.fromisoformat(payload["p"])
+        row_id = int(payload["i"])
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if published_at.tzinfo is not None:
+        published_at = published_at.astimezone(timezone.utc)
+    return published_at, row_id
+
+
+async def get_video(session: AsyncSession, video_id: str) -> Video | None:
+    """Load one video including the deferred raw_json payload."""
+    stmt = select(Video).options(undefer(Video.raw_json)).where(Video.video_id == video_id)
+    return (await session.execute(stmt)).scalar_one_or_none()
+
+
+def _order_by(sort: str, published=Video.published_at):
+    # id breaks ties between equal timestamps so keyset pages never overlap or skip
+    if sort == "published_asc":
+        return published.asc(), Video.id.asc()
+    return published.desc(), Video.id.desc()
+
+
+def _apply_keyset(stmt, *, cursor: str, per_page: int, sort: str, published=Video.published_at):
+    """Restrict ``stmt`` to the page that follows ``cursor`` in (published_at, id) order.
+
+    An empty cursor selects the first page. Rows without published_at have no
+    position in the keyset order and are not reachable in cursor mode.
+    ``published`` may name a copy of videos.published_at (e.g. on video_queries)
+    so the walk can follow that table's index.
+    """
+    stmt = stmt.where(published.is_not(None))
+    if cursor:
+        after_ts, after_id = decode_cursor(cursor)
+        position = tuple_(published, Video.id)
+        if sort == "published_asc":
+            stmt = stmt.where(position > tuple_(after_ts, after_id))
+        else:
+            stmt = stmt.where(position < tuple_(after_ts, after_id))
+    return stmt.order_by(*_order_by(sort, published)).limit(per_page)
 
 
 async def list_videos(
@@ -71,27 +420,125 @@ async def list_videos(
     per_page: int,
     channel: str | None = None,
     sort: str = "published_desc",
-) -> tuple[int, Sequence[Video]]:
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    query: str | None = None,
+) -> tuple[int | None, Sequence[Row]]:
+    """List videos newest (or oldest) first.
+
+    ``query`` restricts the list to videos a poll query returned (via
+    ``video_queries``), walking its ``(query, published_at)`` index.
+    With ``cursor`` set (``""`` for the first page) pages are fetched by keyset on
+    ``(published_at, id)`` so every page costs the same; ``page`` is ignored.
+    ``count_mode`` selects how ``total`` is produced (see ``counts.count_videos``);
+    it is None when ``count_mode="none"``.
+    """
     where = []
     if channel:
         like = f"%{channel}%"
         where.append(Video.channel_title.ilike(like))
-    stmt_total = select(func.count()).select_from(Video)
-    if where:
-        stmt_total = stmt_total.where(and_(*where))
-    total = await session.scalar(stmt_total)
-
-    order_clause = Video.published_at.desc()
-    if sort == "published_asc":
-        order_clause = Video.published_at.asc()
+    count_where = list(where)
+    if query:
+        members = select(VideoQuery.video_id).where(VideoQuery.query == query)
+        count_where.append(Video.video_id.in_(members))
+    total = await counts.count_videos(
+        session,
+        and_(*count_where) if count_where else None,
+        mode=count_mode,
+        key=("list", channel, query),
+    )
 
-    stmt_items = select(Video)
+    stmt_items = _select_out()
+    published = Video.published_at
+    if query:
+        stmt_items = stmt_items.join(VideoQuery, VideoQuery.video_id == Video.video_id).where(
+            VideoQuery.query == query
+        )
+        published = VideoQuery.published_at
     if where:
         stmt_items = stmt_items.where(and_(*where))
-    stmt_items = stmt_items.order_by(order_clause).offset((page - 1) * per_page).limit(per_page)
+    if cursor is not None:
+        stmt_items = _apply_keyset(stmt_items, cursor=cursor, per_page=per_page, sort=sort, published=published)
+    else:
+        stmt_items = stmt_items.order_by(*_order_by(sort, published)).offset((page - 1) * per_page).limit(per_page)
+
+    items = (await session.execute(stmt_items)).all()
+    return total, items
+
+
+_videos_fts = table("videos_fts", column("rowid"), column("title"), column("description"))
+
+
+async def _sqlite_fts_ready(session: AsyncSession) -> bool:
+    """Whether the FTS5 index created by ``db.ensure_sqlite_fts`` exists."""
+    url = session.bind.url
+    if not fts_known_ready(url):
+        found = await session.scalar(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='videos_fts'")
+        )
+        mark_fts_ready(url, bool(found))
+    return fts_known_ready(url)
+
+
+def _fts5_match_expr(query: str) -> str:
+    """Turn free text into an FTS5 query: every term must match, as a prefix.
+
+    Terms are quoted so user punctuation is never parsed as FTS5 syntax.
+    """
+    terms = ['"' + t.replace('"', '""') + '"*' for t in query.split()]
+    return " ".join(terms)
+
 
-    items = (await session.execute(stmt_items)).scalars().all()
-    return int(total or 0), items
+async def _fuzzy_candidates(
+    session: AsyncSession, query: str, *, sort: str, channel: str | None = None
+) -> list[Row]:
+    """Typo-tolerant matches from the in-process trigram index, best first."""
+    index = get_trigram_index()
+    await index.ensure_built(session)
+    scores = dict(index.search(query))
+    if not scores:
+        return []
+    stmt = _select_out().where(Video.id.in_(list(scores)))
+    if channel:
+        stmt = stmt.where(Video.channel_title.ilike(f"%{channel}%"))
+    rows = (await session.execute(stmt)).all()
+
+    def sort_key(v: Row):
+        pa = v.published_at or datetime.min
+        try:
+            ts = pa.timestamp()
+        except Exception:
+            ts = 0.0
+        # Primary: higher score first; Secondary: published_at per requested order
+        return (-scores[v.id], ts) if sort == "published_asc" else (-scores[v.id], -ts)
+
+    return sorted(rows, key=sort_key)
+
+
+class SearchResult(NamedTuple):
+    total: int | None
+    items: Sequence[Row]
+    # Which strategy produced the rows: fts, trigram, ilike or fuzzy
+    tier: str
+
+
+SEARCH_TIERS = ("fts", "trigram", "ilike")
+
+
+def _pg_search_tiers(query: str):
+    """Yield cumulative (tier, predicate) pairs for the Postgres search planner.
+
+    Every predicate is an OR of indexable terms (search_vector GIN, title and
+    description trigram GINs), so Postgres can BitmapOr the index scans instead
+    of falling back to a sequential scan.
+    """
+    fts = text("(search_vector \u0040\u0040 websearch_to_tsquery('english', :q))")
+    trigram = or_(Video.title.op("%")(bindparam("q")), Video.description.op("%")(bindparam("q")))
+    like = f"%{query}%"
+    ilike = or_(Video.title.ilike(like), Video.description.ilike(like))
+    yield "fts", fts
+    yield "trigram", or_(fts, trigram)
+    yield "ilike", or_(fts, trigram, ilike)
 
 
 async def search_videos(
@@ -102,149 +549,140 @@ async def search_videos(
     per_page: int,
     channel: str | None = None,
     sort: str = "published_desc",
-) -> tuple[int, Sequence[Video]]:
+    cursor: str | None = None,
+    count_mode: str = "exact",
+) -> SearchResult:
+    """Search titles/descriptions, ranked by relevance then published_at.
+
+    On Postgres a tiered planner picks the cheapest strategy that fills a page
+    (see ``SEARCH_TIERS``); SQLite uses its FTS5 index with bm25 ranking. The
+    chosen tier is returned with the results.
+    With ``cursor`` set the matching rows are walked by keyset on
+    ``(published_at, id)`` instead of relevance, so deep pages stay cheap.
+    ``count_mode`` works as in ``list_videos``.
+    """
     dialect_name = session.bind.dialect.name if session.bind is not None else ""
     if dialect_name == "postgresql":
-        # Full-text search with fallback to trigram similarity and ILIKE for stopwords/partials
-        ts_match = text(
-            "(to_tsvector('english', coalesce(title,'') || ' ' || coalesce(description,'')) \u0040\u0040 websearch_to_tsquery('english', :q))"
-        )
-        like_param = f"%{query}%"
-        # Dynamic trigram threshold: len<=4 -> 0.2 (typo friendly), len<=6 -> 0.25, else 0.3
+        # Tiered plan: indexed FTS first, escalating to trigram and then ILIKE only
+        # while the current tier cannot fill a page
         qlen = len(query)
+        # Dynamic trigram threshold: len<=4 -> 0.2 (typo friendly), len<=6 -> 0.25, else 0.3
         sim_threshold = 0.2 if qlen <= 4 else (0.25 if qlen <= 6 else 0.3)
-        trigram_match = text(
-            "(similarity(coalesce(title,''), :q) >= :simth OR similarity(coalesce(description,''), :q) >= :simth)"
+        # `%` honours this threshold and, unlike similarity() >= x, can use the GIN trigram indexes
+        await session.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :simth, true)"),
+            {"simth": str(sim_threshold)},
         )
-        ilike_match = or_(Video.title.ilike(like_param), Video.description.ilike(like_param))
-        or_group = or_(ts_match, trigram_match, ilike_match)
-        where_clause = or_group
-        if channel:
-            like = f"%{channel}%"
-            where_clause = and_(where_clause, Video.channel_title.ilike(like))
+        params = {"q": query}
+        tier, where_clause, hits = None, None, -1
+        for name, predicate in _pg_search_tiers(query):
+            candidate = and_(predicate, Video.channel_title.ilike(f"%{channel}%")) if channel else predicate
+            # Probing at most a page of ids keeps each tier check an index lookup
+            candidate_hits = await counts.count_capped(session, candidate, params, per_page)
+            # Tiers are cumulative, so a later tier is only worth it if it adds rows
+            if candidate_hits > hits:
+                tier, where_clause, hits = name, candidate, candidate_hits
+            if hits >= per_page:
+                break
+        logger.info("search q=%r channel=%r tier=%s probe_hits=%d", query, channel, tier, hits)
 
-        total_stmt = select(func.count()).select_from(Video).where(where_clause)
-        total_res = await session.execute(total_stmt.params(q=query, simth=sim_threshold))
-        total = total_res.scalar() or 0
+        total = await counts.count_videos(
+            session,
+            where_clause,
+            mode=count_mode,
+            key=("search", query, channel, tier),
+            params=params,
+        )
 
-        # Relevance: combine ts_rank + trigram similarity; fallbacks get lower but non-zero score
+        # Relevance: combine ts_rank over the stored, title-weighted vector + trigram
+        # similarity; fallbacks get lower but non-zero score
         score_expr = text(
-            "(0.6 * ts_rank(to_tsvector('english', coalesce(title,'') || ' ' || coalesce(description,'')), websearch_to_tsquery('english', :q)) + "
+            "(0.6 * ts_rank(search_vector, websearch_to_tsquery('english', :q)) + "
             "0.2 * similarity(coalesce(title,''), :q) + 0.2 * similarity(coalesce(description,''), :q))"
         )
+        if cursor is not None:
+            items = (
+                await session.execute(
+                    _apply_keyset(_select_out().where(where_clause), cursor=cursor, per_page=per_page, sort=sort)
+                    .params(**params)
+                )
+            ).all()
+            return SearchResult(total, items, tier)
+
         published_order = text("published_at ASC" if sort == "published_asc" else "published_at DESC")
         items = (
             await session.execute(
-                select(Video)
+                _select_out()
                 .where(where_clause)
                 .order_by(text(f"{score_expr.text} DESC"), published_order)
                 .offset((page - 1) * per_page)
                 .limit(per_page)
-                .params(q=query, simth=sim_threshold)
+                .params(**params)
             )
-        ).scalars().all()
+        ).all()
 
-        # Fallback for very short queries (typos like "crik"): do a fuzzy pass in Python
-        if (total == 0) and query.strip() and len(query) <= 4:
-            import difflib
-            # Pull recent window
-            window_rows = (
-                await session.execute(
-                    select(Video).order_by(Video.published_at.desc()).limit(500)
-                )
-            ).scalars().all()
-            ql = " ".join(query.lower().split())
-            def score(v: Video) -> float:
-                hay = f"{v.title or ''} {v.description or ''}".lower()
-                hay = " ".join(hay.split())
-                return float(difflib.SequenceMatcher(None, ql, hay).ratio())
-            ranked = sorted(window_rows, key=lambda v: (-score(v), (v.published_at or datetime.min).timestamp() if sort != "published_asc" else -(v.published_at or datetime.min).timestamp()))
-            # Filter by a minimal score to avoid random matches
-            filtered = [v for v in ranked if score(v) >= 0.18]
-            total = len(filtered)
+        # Fallback for very short queries (typos like "crik"): ask the trigram index
+        if not items and not total and query.strip() and len(query) <= 4:
+            filtered = await _fuzzy_candidates(session, query, sort=sort, channel=channel)
+            total = len(filtered) if count_mode != "none" else None
             start = (page - 1) * per_page
             items = filtered[start:start + per_page]
+            tier = "fuzzy"
+            logger.info("search q=%r channel=%r tier=fuzzy", query, channel)
     else:
-        # Fallback to SQLite: tokenized ILIKE filter + optional fuzzy ranking using difflib
-        import difflib
-
-        terms = [t for t in query.split() if t]
-        had_terms = bool(terms)
-        cond = None
-        for t in terms:
-            like = f"%{t}%"
-            term_cond = or_(Video.title.ilike(like), Video.description.ilike(like))
-            cond = term_cond if cond is None else (cond & term_cond)
-        cond = cond if cond is not None else text("1=1")
+        # SQLite: FTS5 index lookup ranked by bm25, or tokenized ILIKE where FTS5 is missing
+        params: dict = {}
+        match = _fts5_match_expr(query)
+        if match and await _sqlite_fts_ready(session):
+            tier = "fts"
+            params = {"m": match}
+            fts_rowids = select(_videos_fts.c.rowid).where(text("videos_fts MATCH :m"))
+            cond = Video.id.in_(fts_rowids)
+        else:
+            tier = "ilike"
+            cond = None
+            for t in query.split():
+                like = f"%{t}%"
+                term_cond = or_(Video.title.ilike(like), Video.description.ilike(like))
+                cond = term_cond if cond is None else (cond & term_cond)
+            cond = cond if cond is not None else text("1=1")
         if channel:
-            ch_like = f"%{channel}%"
-            ch_cond = Video.channel_title.ilike(ch_like)
-            cond = and_(cond, ch_cond)
+            cond = and_(cond, Video.channel_title.ilike(f"%{channel}%"))
 
-        # Count total matches for proper pagination metadata
-        total_count = await session.scalar(select(func.count()).select_from(Video).where(cond))
+        total = await counts.count_videos(
+            session, cond, mode=count_mode, key=("search", query, channel, tier), params=params
+        )
+        if cursor is not None:
+            items = (
+                await session.execute(
+                    _apply_keyset(_select_out().where(cond), cursor=cursor, per_page=per_page, sort=sort)
+                    .params(**params)
+                )
+            ).all()
+            return SearchResult(total, items, tier)
 
-        # Pull a window and, if query present, rank in Python for fuzzy matches
-        candidate_rows = (
+        if tier == "fts":
+            # bm25() only works against the MATCHing FTS row, so rank through a join.
+            # It is lower-is-better; title hits weigh 10x description hits.
+            stmt = _select_out().join(_videos_fts, _videos_fts.c.rowid == Video.id).where(text("videos_fts MATCH :m"))
+            if channel:
+                stmt = stmt.where(Video.channel_title.ilike(f"%{channel}%"))
+            stmt = stmt.order_by(text("bm25(videos_fts, 10.0, 1.0)"), *_order_by(sort))
+        else:
+            stmt = _select_out().where(cond).order_by(*_order_by(sort))
+        items = (
             await session.execute(
-                select(Video)
-                .where(cond)
-                .order_by(Video.published_at.desc())
-                .limit(500)  # safety window
+                stmt.offset((page - 1) * per_page).limit(per_page).params(**params)
             )
-        ).scalars().all()
+        ).all()
 
-    # If no candidates found (likely a typo), optionally broaden to recent window
-        broadened_total = None
-        if not candidate_rows and query.strip():
-            candidate_rows = (
-                await session.execute(
-                    select(Video)
-                    .order_by(Video.published_at.desc())
-                    .limit(1000)
-                )
-            ).scalars().all()
-            broadened_total = len(candidate_rows)
-
-        if query.strip() and candidate_rows:
-            ql = query.lower()
-
-            def score(v: Video) -> float:
-                hay = f"{v.title or ''} {v.description or ''}".lower()
-                # Token-ish normalization: collapse whitespace
-                hay = " ".join(hay.split())
-                qn = " ".join(ql.split())
-                return float(difflib.SequenceMatcher(None, qn, hay).ratio())
-
-            def sort_key(v: Video):
-                sc = score(v)
-                pa = v.published_at or datetime.min
-                try:
-                    ts = pa.timestamp()
-                except Exception:
-                    ts = 0.0
-                # Primary: higher score first; Secondary: published_at per requested order
-                if sort == "published_asc":
-                    return (-sc, ts)
-                else:
-                    return (-sc, -ts)
-
-            ranked = sorted(candidate_rows, key=sort_key)
-            total = total_count if had_terms and broadened_total is None else len(ranked)
+        # Nothing matched (likely a typo): fall back to the trigram index
+        if not items and not total and query.strip():
+            filtered = await _fuzzy_candidates(session, query, sort=sort, channel=channel)
+            total = len(filtered) if count_mode != "none" else None
             start = (page - 1) * per_page
-            items = ranked[start:start + per_page]
-        else:
-            # No RapidFuzz: simple contains filter and date order
-            total = total_count
-        order_clause = Video.published_at.desc() if sort != "published_asc" else Video.published_at.asc()
-        items = (
-                await session.execute(
-                    select(Video)
-                    .where(cond)
-            .order_by(order_clause)
-                    .offset((page - 1) * per_page)
-                    .limit(per_page)
-                )
-            ).scalars().all()
+            items = filtered[start:start + per_page]
+            tier = "fuzzy"
+        logger.info("search q=%r channel=%r tier=%s", query, channel, tier)
 
-    return int(total or 0), items
+    return SearchResult(total, items, tier)
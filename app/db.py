@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import DeclarativeBase
 
 from .config import get_settings
+from .metrics import StageTimer
 
 
 class Base(DeclarativeBase):
@@ -17,17 +20,55 @@ class Base(DeclarativeBase):
 
 _engine = None
 _Session: async_sessionmaker[AsyncSession] | None = None
+_read_engine = None
+_ReadSession: async_sessionmaker[AsyncSession] | None = None
+
+# Time spent waiting for a pooled connection (including pre-ping), per engine
+checkout_timers = {"primary": StageTimer(), "read": StageTimer()}
+
+
+def _create_engine(url: str, **kwargs):
+    settings = get_settings()
+    if make_url(url).get_backend_name() != "sqlite":
+        # SQLite keeps the dialect's own pool; these only apply to server databases
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return create_async_engine(url, echo=False, pool_pre_ping=True, **kwargs)
 
 
 def _get_engine():
     global _engine, _Session
     if _engine is None:
         settings = get_settings()
-        _engine = create_async_engine(settings.database_url, echo=False, pool_pre_ping=True)
+        _engine = _create_engine(settings.database_url)
         _Session = async_sessionmaker(_engine, expire_on_commit=False)
     return _engine
 
 
+def get_engine():
+    return _get_engine()
+
+
+def get_read_engine():
+    """Engine for read-only API traffic, with its own pool so reads never queue behind writers.
+
+    Points at ``DATABASE_READ_URL`` (a streaming replica) when set, else at the
+    primary. On Postgres its transactions are ``READ ONLY``.
+    """
+    global _read_engine, _ReadSession
+    if _read_engine is None:
+        settings = get_settings()
+        url = settings.database_read_url or settings.database_url
+        options = {"postgresql_readonly": True} if make_url(url).get_backend_name() == "postgresql" else {}
+        _read_engine = _create_engine(url, execution_options=options)
+        _ReadSession = async_sessionmaker(_read_engine, expire_on_commit=False)
+    return _read_engine
+
+
 def get_session_maker() -> async_sessionmaker[AsyncSession]:
     global _Session
     if _Session is None:
@@ -36,11 +77,19 @@ def get_session_maker() -> async_sessionmaker[AsyncSession]:
     return _Session
 
 
+async def _checkout(session: AsyncSession, engine: str) -> None:
+    # Take the connection up front so the pool wait is measured on its own
+    started = time.monotonic()
+    await session.connection()
+    checkout_timers[engine].observe(time.monotonic() - started)
+
+
 @asynccontextmanager
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     session_maker = get_session_maker()
     async with session_maker() as session:
         try:
+            await _checkout(session, "primary")
             yield session
             await session.commit()
         except Exception:
@@ -48,6 +97,98 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
             raise
 
 
+@asynccontextmanager
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for queries only: never commits, and is read-only on Postgres.
+
+    A replica may lag the primary by a moment, so code that must see its own
+    writes uses ``get_session``.
+    """
+    get_read_engine()
+    assert _ReadSession is not None
+    async with _ReadSession() as session:
+        await _checkout(session, "read")
+        yield session
+
+
+def _pool_status(engine) -> dict | None:
+    if engine is None:
+        return None
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    return status
+
+
+def pool_stats() -> dict:
+    """Pool occupancy and checkout wait for the primary and read engines."""
+    settings = get_settings()
+    return {
+        "read_replica": bool(settings.database_read_url),
+        "primary": {"pool": _pool_status(_engine), "checkout_wait": checkout_timers["primary"].snapshot()},
+        "read": {"pool": _pool_status(_read_engine), "checkout_wait": checkout_timers["read"].snapshot()},
+    }
+
+
+# External-content FTS5 index over videos(title, description). Triggers keep it in
+# step with the base table so search never has to rebuild it.
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5("
+    "title, description, content='videos', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS videos_fts_ai AFTER INSERT ON videos BEGIN "
+    "INSERT INTO videos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS videos_fts_ad AFTER DELETE ON videos BEGIN "
+    "INSERT INTO videos_fts(videos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS videos_fts_au AFTER UPDATE OF title, description ON videos BEGIN "
+    "INSERT INTO videos_fts(videos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO videos_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+
+
+# Databases (by URL) known to have the FTS5 index; cleared when the schema is dropped
+_fts_ready: set[str] = set()
+
+
+def fts_known_ready(url) -> bool:
+    return str(url) in _fts_ready
+
+
+def mark_fts_ready(url, ready: bool = True) -> None:
+    if ready:
+        _fts_ready.add(str(url))
+    else:
+        _fts_ready.discard(str(url))
+
+
+async def ensure_sqlite_fts(conn) -> bool:
+    """Create the FTS5 search index and its sync triggers on SQLite.
+
+    Rebuilds the index when it is first created so existing rows are searchable.
+    Returns False (and leaves search on the ILIKE path) when FTS5 is unavailable
+    or the backend is not SQLite.
+    """
+    if conn.dialect.name != "sqlite":
+        return False
+    mark_fts_ready(conn.engine.url, False)
+    exists = (
+        await conn.execute(text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='videos_fts'"))
+    ).first()
+    try:
+        for ddl in _SQLITE_FTS_DDL:
+            await conn.execute(text(ddl))
+    except Exception:
+        return False
+    if not exists:
+        await conn.execute(text("INSERT INTO videos_fts(videos_fts) VALUES ('rebuild')"))
+    mark_fts_ready(conn.engine.url)
+    return True
+
+
 async def create_all_for_testing(metadata) -> None:
     """Create tables for non-PostgreSQL testing environments (e.g., SQLite).
 
@@ -56,11 +197,15 @@ async def create_all_for_testing(metadata) -> None:
     engine = _get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(metadata.create_all)
+        await ensure_sqlite_fts(conn)
 
 
 async def drop_all_for_testing(metadata) -> None:
     engine = _get_engine()
     async with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            await conn.execute(text("DROP TABLE IF EXISTS videos_fts"))
+        mark_fts_ready(conn.engine.url, False)
         await conn.run_sync(metadata.drop_all)
 
 
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from .config import get_settings
+from .youtube_client import VIDEOS_LIST_MAX_IDS, YouTubeClient
+
+# Columns filled from videos.list; search.list returns none of them
+ENRICHED_FIELDS = ("duration_seconds", "view_count", "like_count", "tags", "enriched_at")
+
+_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+
+
+def parse_duration(value: Optional[str]) -> Optional[int]:
+    """ISO 8601 duration as used by contentDetails.duration ("PT1H2M3S") to seconds."""
+    m = _DURATION_RE.match(value or "")
+    if not m or not any(m.groupdict().values()):
+        return None
+    parts = {k: int(v or 0) for k, v in m.groupdict().items()}
+    return ((parts["days"] * 24 + parts["hours"]) * 60 + parts["minutes"]) * 60 + parts["seconds"]
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def video_stats(item: dict[str, Any]) -> dict[str, Any]:
+    stats = item.get("statistics", {})
+    return {
+        "duration_seconds": parse_duration(item.get("contentDetails", {}).get("duration")),
+        "view_count": _int_or_none(stats.get("viewCount")),
+        # Hidden like counts are simply absent
+        "like_count": _int_or_none(stats.get("likeCount")),
+        "tags": item.get("snippet", {}).get("tags") or [],
+    }
+
+
+class Enricher:
+    """Adds videos.list data to parsed search rows before they are stored.
+
+    Ids are looked up ``VIDEOS_LIST_MAX_IDS`` at a time, with up to
+    ``ENRICH_CONCURRENCY`` batches in flight over the shared client and key
+    pool. Batches whose call failed are re-batched and retried for
+    ``ENRICH_MAX_ROUNDS`` rounds; ids that succeeded are never fetched again.
+    Rows still missing data afterwards are stored without it.
+    """
+
+    def __init__(self, client: YouTubeClient, *, concurrency: int, max_rounds: int, retry_delay: float = 1.0):
+        self.client = client
+        self.max_rounds = max_rounds
+        self.retry_delay = retry_delay
+        self._slots = asyncio.Semaphore(concurrency)
+        self.calls = 0
+        self.enriched = 0
+        self.failed_ids = 0
+
+    async def _lookup(self, ids: list[str]) -> Optional[dict[str, dict[str, Any]]]:
+        async with self._slots:
+            self.calls += 1
+            try:
+                # One attempt per call: failed ids are retried in the next round instead
+                return await self.client.list_videos(ids, attempts=1)
+            except Exception:
+                return None
+
+    async def enrich(self, rows: list[dict[str, Any]]) -> int:
+        """Fill ``ENRICHED_FIELDS`` in place; returns how many rows got data."""
+        pending = list(dict.fromkeys(r["video_id"] for r in rows if r.get("video_id")))
+        found: dict[str, dict[str, Any]] = {}
+        for round_no in range(self.max_rounds):
+            if not pending:
+                break
+            if round_no:
+                await asyncio.sleep(self.retry_delay * 2 ** (round_no - 1))
+            batches = [pending[i:i + VIDEOS_LIST_MAX_IDS] for i in range(0, len(pending), VIDEOS_LIST_MAX_IDS)]
+            results = await asyncio.gather(*(self._lookup(b) for b in batches))
+            pending = []
+            for batch, result in zip(batches, results):
+                if result is None:
+                    pending.extend(batch)
+                else:
+                    found.update(result)
+        self.failed_ids += len(pending)
+
+        now = datetime.now(timezone.utc)
+        enriched = 0
+        for row in rows:
+            item = found.get(row.get("video_id"))
+            if item is not None:
+                row.update(video_stats(item), enriched_at=now)
+                enriched += 1
+        self.enriched += enriched
+        return enriched
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "enriched": self.enriched, "failed_ids": self.failed_ids}
+
+
+def build_enricher(client: YouTubeClient) -> Optional[Enricher]:
+    settings = get_settings()
+    if not settings.enrich_videos:
+        return None
+    return Enricher(client, concurrency=settings.enrich_concurrency, max_rounds=settings.enrich_max_rounds)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from datetime import timezone
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import Video
+
+
+class FeedItem:
+    """One video as served by the list endpoint; slots keep the buffer compact."""
+
+    __slots__ = (
+        "id",
+        "video_id",
+        "title",
+        "description",
+        "published_at",
+        "thumbnails",
+        "channel_id",
+        "channel_title",
+        "duration_seconds",
+        "view_count",
+        "like_count",
+        "tags",
+    )
+
+    def __init__(self, row: Any):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+
+    def sort_key(self) -> tuple[float, int]:
+        # Negated so ascending bisect order is newest-first; undated rows sink to the end
+        pa = self.published_at
+        if pa is None:
+            return (float("inf"), -self.id)
+        if pa.tzinfo is None:
+            pa = pa.replace(tzinfo=timezone.utc)
+        return (-pa.timestamp(), -self.id)
+
+
+class HotFeed:
+    """The newest ``size`` videos in (published_at, id) DESC order, held in memory.
+
+    Warmed from the database, then fed with rows from every committed
+    ``upsert_videos`` so unfiltered first pages of ``GET /api/videos`` never touch
+    the database. A periodic re-warm absorbs writes from other processes.
+    """
+
+    def __init__(self, size: int, refresh_seconds: float):
+        self.size = size
+        self.refresh_seconds = refresh_seconds
+        self._items: list[FeedItem] = []
+        self._keys: list[tuple[float, int]] = []
+        self._complete = False
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.refresh_seconds
+
+    @property
+    def warming(self) -> bool:
+        return self._lock.locked()
+
+    def push(self, rows: Iterable[Any]) -> None:
+        """Merge newly committed or updated rows, keeping only the newest ``size``."""
+        if self._loaded_at is None:
+            return
+        known = {item.id for item in self._items}
+        for row in rows:
+            if row.id in known:
+                # An edited video: drop the stale copy, then place the new one by its key
+                pos = next(i for i, item in enumerate(self._items) if item.id == row.id)
+                del self._items[pos]
+                del self._keys[pos]
+                known.discard(row.id)
+            item = FeedItem(row)
+            key = item.sort_key()
+            pos = bisect.bisect_left(self._keys, key)
+            if pos >= self.size:
+                continue
+            self._keys.insert(pos, key)
+            self._items.insert(pos, item)
+            known.add(row.id)
+        if len(self._items) > self.size:
+            del self._items[self.size:]
+            del self._keys[self.size:]
+            self._complete = False
+
+    def page(self, page: int, per_page: int) -> Sequence[FeedItem] | None:
+        """Items for a page, or None when the page extends past the buffer."""
+        start, end = (page - 1) * per_page, page * per_page
+        if end > len(self._items) and not self._complete:
+            return None
+        return self._items[start:end]
+
+    async def warm(self, session: AsyncSession) -> None:
+        async with self._lock:
+            # Whoever held the lock before us may just have refreshed it
+            if self.fresh():
+                return
+            cols = [getattr(Video, name) for name in FeedItem.__slots__]
+            stmt = select(*cols).order_by(Video.published_at.desc().nulls_last(), Video.id.desc()).limit(self.size)
+            rows = (await session.execute(stmt)).all()
+            items = sorted((FeedItem(r) for r in rows), key=FeedItem.sort_key)
+            self._items = items
+            self._keys = [i.sort_key() for i in items]
+            # Fewer rows than the buffer holds means the buffer is the whole table
+            self._complete = len(items) < self.size
+            self._loaded_at = time.monotonic()
+
+
+_feed: HotFeed | None = None
+
+
+def get_hot_feed() -> HotFeed:
+    global _feed
+    if _feed is None:
+        settings = get_settings()
+        _feed = HotFeed(settings.hot_feed_size, settings.hot_feed_refresh_seconds)
+    return _feed
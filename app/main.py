@@ -6,12 +6,16 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
 import os
+from .api.db import router as db_router
+from .api.poller import router as poller_router
 from .api.videos import router as videos_router
-from .poller import BackgroundPoller
-from .db import get_session_maker
+from .poller import get_poller
+from .db import get_read_session, get_session_maker
 from .db import create_all_for_testing, ensure_pg_extensions
 from .db import Base
 from .config import get_settings
+from .hot_feed import get_hot_feed
+from .trigram_index import get_trigram_index
 import app.models  # ensure models are registered on Base.metadata
 
 app = FastAPI(title="Serri Backend Assignment", version="1.0.0")
@@ -24,7 +28,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-poller = BackgroundPoller()
+poller = get_poller()
 templates = Jinja2Templates(directory="app/templates")
 
 
@@ -40,6 +44,13 @@ async def startup_event():
   except Exception:
     # Ignore startup schema errors; API will surface errors if any persist
     pass
+  # Warm the typo-tolerant search index and the latest feed; both recover lazily if this fails
+  try:
+    async with get_read_session() as session:
+      await get_hot_feed().warm(session)
+      await get_trigram_index().ensure_built(session)
+  except Exception:
+    pass
   if os.getenv("DISABLE_POLLER", "0") != "1":
     await poller.start()
 
@@ -55,3 +66,5 @@ async def index(request: Request):
 
 
 app.include_router(videos_router)
+app.include_router(poller_router)
+app.include_router(db_router)
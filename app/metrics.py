@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+
+class StageTimer:
+    """Running latency figures for one pipeline stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.last_seconds = seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "last_ms": round(self.last_seconds * 1000, 2),
+            "avg_ms": round(self.total_seconds / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
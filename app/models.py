@@ -3,8 +3,8 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import Integer, Index, JSON, Text, func, TIMESTAMP
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import DDL, BigInteger, Float, ForeignKey, Integer, Index, JSON, Text, event, func, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .db import Base
@@ -22,11 +22,172 @@ class Video(Base):
     thumbnails: Mapped[dict[str, Any] | None] = mapped_column(JSON().with_variant(JSONB, "postgresql"))
     channel_id: Mapped[str | None] = mapped_column(Text)
     channel_title: Mapped[str | None] = mapped_column(Text)
-    raw_json: Mapped[dict[str, Any] | None] = mapped_column(JSON().with_variant(JSONB, "postgresql"))
+    # From videos.list (see app.enrichment); NULL until a lookup succeeds
+    duration_seconds: Mapped[int | None] = mapped_column(Integer)
+    view_count: Mapped[int | None] = mapped_column(BigInteger)
+    like_count: Mapped[int | None] = mapped_column(BigInteger)
+    tags: Mapped[list[str] | None] = mapped_column(JSON().with_variant(JSONB, "postgresql"))
+    enriched_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # Deferred: only the detail endpoint needs the full API payload
+    raw_json: Mapped[dict[str, Any] | None] = mapped_column(
+        JSON().with_variant(JSONB, "postgresql"), deferred=True
+    )
+    # Weighted tsvector (title 'A', description 'B') kept current by a Postgres trigger;
+    # stays NULL on SQLite, where search does not use it
+    search_vector: Mapped[str | None] = mapped_column(
+        Text().with_variant(TSVECTOR, "postgresql"), deferred=True
+    )
+    # sha256 over the fields search.list returns (see crud.content_hash); upserts only
+    # rewrite a row when it changes, bumping content_revision (1 = never updated)
+    content_hash: Mapped[str | None] = mapped_column(Text)
+    content_revision: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
     created_at: Mapped[datetime] = mapped_column(default=func.now())
     updated_at: Mapped[datetime] = mapped_column(default=func.now(), onupdate=func.now())
 
     __table_args__ = (
         Index("idx_videos_published_at_desc", "published_at", postgresql_using="btree"),
+        # Keyset pagination walks (published_at, id); one composite index serves both directions
+        Index("idx_videos_published_at_id", "published_at", "id"),
         {"sqlite_autoincrement": True},
     )
+
+
+
+class VideoQuery(Base):
+    """Which poll queries returned a video; answers "latest for query X" without text search."""
+
+    __tablename__ = "video_queries"
+
+    query: Mapped[str] = mapped_column(Text, primary_key=True)
+    video_id: Mapped[str] = mapped_column(
+        Text, ForeignKey("videos.video_id", ondelete="CASCADE"), primary_key=True
+    )
+    # Copied from videos so per-query listings are one ordered scan of the composite index
+    published_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    first_seen_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=func.now())
+
+    __table_args__ = (
+        Index("idx_video_queries_query_published_at", "query", "published_at"),
+    )
+
+
+class PollState(Base):
+    """Per-query ingestion progress, so pollers resume where they stopped."""
+
+    __tablename__ = "poll_state"
+
+    query: Mapped[str] = mapped_column(Text, primary_key=True)
+    # Newest published_at committed for this query; the next poll asks for videos after it
+    published_after: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # nextPageToken of the last page fetched (set when a walk stopped with pages left)
+    page_token: Mapped[str | None] = mapped_column(Text)
+    # Outcome of the most recent poll, written in the same transaction as its rows
+    last_status: Mapped[int | None] = mapped_column(Integer)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(default=func.now(), onupdate=func.now())
+
+
+class ApiKeyState(Base):
+    """Health of one YouTube API key, so restarts do not re-hit exhausted keys.
+
+    Keys are stored as a fingerprint (see ``youtube_client.key_fingerprint``), never in clear.
+    """
+
+    __tablename__ = "api_key_state"
+
+    key_hash: Mapped[str] = mapped_column(Text, primary_key=True)
+    cooldown_until: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    # Start of the quota day units_spent belongs to; older days read as zero
+    quota_day: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    units_spent: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(default=func.now(), onupdate=func.now())
+
+
+class PollerReplica(Base):
+    """Heartbeat lease of one running poller, used to shard queries across replicas."""
+
+    __tablename__ = "poller_replicas"
+
+    replica_id: Mapped[str] = mapped_column(Text, primary_key=True)
+    heartbeat_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+
+
+class BackfillWindow(Base):
+    """A publishedAfter/publishedBefore range the backfill CLI has fully loaded for a query."""
+
+    __tablename__ = "backfill_windows"
+
+    query: Mapped[str] = mapped_column(Text, primary_key=True)
+    window_start: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    window_end: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    fetched: Mapped[int] = mapped_column(Integer, default=0)
+    completed_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=func.now())
+
+
+class VideoStatSample(Base):
+    """Append-only view/like samples; compacted into ``video_stat_rollups`` as they age."""
+
+    __tablename__ = "video_stat_samples"
+
+    # Integer reference keeps each sample row narrow
+    video_ref: Mapped[int] = mapped_column(
+        Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    sampled_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    view_count: Mapped[int | None] = mapped_column(BigInteger)
+    like_count: Mapped[int | None] = mapped_column(BigInteger)
+
+
+class VideoStatRollup(Base):
+    """Hourly or daily downsampled view counts per video."""
+
+    __tablename__ = "video_stat_rollups"
+
+    video_ref: Mapped[int] = mapped_column(
+        Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    granularity: Mapped[str] = mapped_column(Text, primary_key=True)  # 'hour' or 'day'
+    bucket_start: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), primary_key=True)
+    views_min: Mapped[int | None] = mapped_column(BigInteger)
+    views_max: Mapped[int | None] = mapped_column(BigInteger)
+    samples: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class VideoStatState(Base):
+    """Sampling schedule and precomputed velocity per tracked video; trending reads only this."""
+
+    __tablename__ = "video_stat_state"
+
+    video_ref: Mapped[int] = mapped_column(
+        Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    # NULL once the video is too old to keep sampling
+    next_sample_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    last_sampled_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    last_view_count: Mapped[int | None] = mapped_column(BigInteger)
+    views_per_hour: Mapped[float | None] = mapped_column(Float)
+
+    __table_args__ = (
+        Index("idx_video_stat_state_next_sample_at", "next_sample_at"),
+        Index("idx_video_stat_state_views_per_hour", "views_per_hour"),
+    )
+
+
+SEARCH_VECTOR_EXPR = (
+    "setweight(to_tsvector('english', coalesce({row}title,'')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}description,'')), 'B')"
+)
+
+# Schema bootstrapped with create_all (rather than Alembic) needs the same trigger
+# and GIN index the migration installs
+for _ddl in (
+    "CREATE OR REPLACE FUNCTION videos_search_vector_update() RETURNS trigger AS $$ "
+    "BEGIN NEW.search_vector := " + SEARCH_VECTOR_EXPR.format(row="NEW.") + "; RETURN NEW; END "
+    "$$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS trg_videos_search_vector ON videos",
+    "CREATE TRIGGER trg_videos_search_vector BEFORE INSERT OR UPDATE OF title, description "
+    "ON videos FOR EACH ROW EXECUTE FUNCTION videos_search_vector_update()",
+    "CREATE INDEX IF NOT EXISTS idx_videos_search_vector ON videos USING GIN (search_vector)",
+):
+    event.listen(Video.__table__, "after_create", DDL(_ddl).execute_if(dialect="postgresql"))
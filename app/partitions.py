@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import column, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Monthly partitions of videos are named videos_pYYYYMM; rows without published_at
+# (or outside every partition) land in videos_default
+PARTITION_PREFIX = "videos_p"
+DEFAULT_PARTITION = "videos_default"
+_PARTITION_RE = re.compile(r"^videos_p(\d{4})(\d{2})$")
+
+# Lookup table that keeps video_id globally unique once videos is partitioned (see
+# migration 20261017_000013); video_queries and the stats tables reference it
+video_ids = table("video_ids", column("video_id"), column("id"), column("published_at"))
+
+_partitioned: Optional[bool] = None
+
+
+async def videos_partitioned(session: AsyncSession) -> bool:
+    """Whether ``videos`` is the range-partitioned layout; checked once per process."""
+    global _partitioned
+    if _partitioned is None:
+        if session.bind is None or session.bind.dialect.name != "postgresql":
+            _partitioned = False
+        else:
+            _partitioned = bool(
+                await session.scalar(
+                    text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('videos'))")
+                )
+            )
+    return _partitioned
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, n: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    m = _PARTITION_RE.match(name)
+    return datetime(int(m.group(1)), int(m.group(2)), 1, tzinfo=timezone.utc) if m else None
+
+
+def months_between(start: datetime, end: datetime) -> list[datetime]:
+    """Every month from the one holding ``start`` to the one holding ``end``, inclusive."""
+    months, month = [], month_start(start)
+    while month <= end:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def expired_partitions(names: list[str], cutoff: datetime) -> list[str]:
+    """Monthly partitions whose whole range lies before ``cutoff``, oldest first."""
+    expired = [(month, name) for name in names if (month := partition_month(name)) and add_months(month, 1) <= cutoff]
+    return [name for _, name in sorted(expired)]
+
+
+async def list_partitions(session: AsyncSession) -> list[str]:
+    stmt = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('videos')"
+    )
+    return list((await session.execute(stmt)).scalars().all())
+
+
+def _bound(value: datetime) -> str:
+    return f"'{value.isoformat()}'"
+
+
+async def create_partition(session: AsyncSession, month: datetime) -> None:
+    """Add the partition for ``month``, first moving any of its rows out of the default partition.
+
+    Attaching a range the default partition already holds rows for would fail,
+    which happens when a backfill wrote months before their partition existed.
+    """
+    name, lo, hi = partition_name(month), _bound(month), _bound(add_months(month, 1))
+    await session.execute(text(f"CREATE TABLE {name} (LIKE videos INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE published_at >= {lo} AND published_at < {hi} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )
+    )
+    await session.execute(text(f"ALTER TABLE videos ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})"))
+
+
+async def ensure_partitions(session: AsyncSession, start: datetime, end: datetime) -> list[str]:
+    """Create the missing monthly partitions covering ``start``..``end``; returns their names."""
+    if not await videos_partitioned(session):
+        return []
+    existing = set(await list_partitions(session))
+    created = []
+    for month in months_between(start, end):
+        if partition_name(month) not in existing:
+            await create_partition(session, month)
+            created.append(partition_name(month))
+    return created
+
+
+async def retire_partition(session: AsyncSession, name: str, *, mode: str, archive_schema: str) -> None:
+    """Detach one monthly partition, then drop it or move it to ``archive_schema``.
+
+    Its ``video_ids`` entries are deleted first, which cascades to the query
+    links and stats rows of those videos; the partition itself goes in one
+    catalog operation instead of row-by-row deletes.
+    """
+    month = partition_month(name)
+    lo, hi = _bound(month), _bound(add_months(month, 1))
+    await session.execute(text(f"DELETE FROM video_ids WHERE published_at >= {lo} AND published_at < {hi}"))
+    await session.execute(text(f"ALTER TABLE videos DETACH PARTITION {name}"))
+    if mode == "archive":
+        await session.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"'))
+        await session.execute(text(f'ALTER TABLE {name} SET SCHEMA "{archive_schema}"'))
+    else:
+        await session.execute(text(f"DROP TABLE {name}"))
+
+
+async def maintain_partitions(session: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """Create partitions ``VIDEO_PARTITION_MONTHS_AHEAD`` months ahead and retire expired ones.
+
+    A no-op unless ``videos`` is partitioned. Partitions wholly older than
+    ``VIDEO_RETENTION_MONTHS`` (0 keeps everything) are dropped or archived per
+    ``VIDEO_RETENTION_MODE``.
+    """
+    if not await videos_partitioned(session):
+        return {"partitioned": False, "created": [], "retired": []}
+    settings = get_settings()
+    current = month_start(now or datetime.now(timezone.utc))
+    created = await ensure_partitions(session, current, add_months(current, settings.video_partition_months_ahead))
+    retired = []
+    if settings.video_retention_months > 0:
+        cutoff = add_months(current, -settings.video_retention_months)
+        for name in expired_partitions(await list_partitions(session), cutoff):
+            await retire_partition(
+                session, name, mode=settings.video_retention_mode, archive_schema=settings.video_archive_schema
+            )
+            retired.append(name)
+    if created or retired:
+        logger.info("videos partitions: created %s, retired %s", created, retired)
+    return {"partitioned": True, "created": created, "retired": retired}
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from .config import get_settings
+
+# search.list costs 100 units per call; the daily allowance resets at midnight Pacific
+SEARCH_COST = 100
+_QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+
+def _quota_day(now: datetime | None = None) -> datetime:
+    now = (now or datetime.now(_QUOTA_TZ)).astimezone(_QUOTA_TZ)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def mask_key(key: str) -> str:
+    return f"…{key[-4:]}" if len(key) > 4 else "…"
+
+
+class QuotaLedger:
+    """Quota units spent per API key during the current quota day.
+
+    Spend is shared by every process using the same keys: each persists only
+    what it spent since its last save (``take_unsaved``), which is added to the
+    stored total, and ``load`` folds that total back in.
+    """
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self._day = _quota_day()
+        self._spent: dict[str, int] = {}
+        self._unsaved: dict[str, int] = {}
+        self.dirty = False  # spend changed since the poller last persisted it
+
+    def _roll(self, now: datetime | None = None) -> None:
+        day = _quota_day(now)
+        if day != self._day:
+            self._day = day
+            self._spent.clear()
+            self._unsaved.clear()
+
+    def _add(self, key: str, units: int) -> None:
+        self._spent[key] = self._spent.get(key, 0) + units
+        self._unsaved[key] = self._unsaved.get(key, 0) + units
+        self.dirty = True
+
+    def record(self, key: str, units: int = SEARCH_COST) -> None:
+        self._roll()
+        self._add(key, units)
+
+    def mark_exhausted(self, key: str) -> None:
+        """YouTube refused the key for quota; treat its allowance as used up."""
+        self._roll()
+        self._add(key, max(0, self.daily_limit - self._spent.get(key, 0)))
+
+    def take_unsaved(self) -> dict[str, int]:
+        """Units spent here since the last call, for adding to the persisted total."""
+        self._roll()
+        unsaved, self._unsaved = self._unsaved, {}
+        return unsaved
+
+    def restore_unsaved(self, unsaved: dict[str, int]) -> None:
+        """Put back what ``take_unsaved`` returned when persisting it failed."""
+        for key, units in unsaved.items():
+            self._unsaved[key] = self._unsaved.get(key, 0) + units
+
+    def spent(self, key: str) -> int:
+        self._roll()
+        return self._spent.get(key, 0)
+
+    def remaining(self, keys: list[str]) -> int:
+        self._roll()
+        return sum(max(0, self.daily_limit - self._spent.get(k, 0)) for k in keys)
+
+    def seconds_until_reset(self, now: datetime | None = None) -> float:
+        now = (now or datetime.now(_QUOTA_TZ)).astimezone(_QUOTA_TZ)
+        self._roll(now)
+        return max(1.0, (self._day + timedelta(days=1) - now).total_seconds())
+
+    def reset_at(self) -> datetime:
+        self._roll()
+        return self._day + timedelta(days=1)
+
+    @property
+    def day(self) -> datetime:
+        self._roll()
+        return self._day
+
+    def load(self, key: str, day: datetime | None, units: int) -> None:
+        """Fold in the persisted total for ``key``; figures from an earlier quota day are ignored."""
+        self._roll()
+        if day is not None and day.astimezone(_QUOTA_TZ) == self._day:
+            # The stored total lacks only what this process has not saved yet
+            self._spent[key] = max(self._spent.get(key, 0), units + self._unsaved.get(key, 0))
+
+
+class _QueryYield:
+    __slots__ = ("items", "pages", "polls", "last_polled_at")
+
+    def __init__(self):
+        self.items = 0.0  # EWMA of new items per poll
+        self.pages = 1.0  # EWMA of search.list calls per poll
+        self.polls = 0
+        self.last_polled_at: float | None = None
+
+
+class PollScheduler:
+    """Adaptive per-query poll intervals under the shared daily quota.
+
+    The quota left across all keys is spread evenly over the time remaining in
+    the quota day and shared between queries in proportion to their recent
+    yield (an EWMA of new items per poll). Quiet topics drift toward
+    ``POLL_INTERVAL_MAX`` while busy ones are polled as often as
+    ``POLL_INTERVAL_MIN`` allows.
+    """
+
+    # Share of the budget a query gets even when its recent polls found nothing
+    YIELD_FLOOR = 0.5
+
+    def __init__(self, min_interval: float, max_interval: float, daily_limit: int, alpha: float = 0.3):
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.alpha = alpha
+        self.quota = QuotaLedger(daily_limit)
+        self._queries: dict[str, _QueryYield] = {}
+
+    def _state(self, query: str) -> _QueryYield:
+        state = self._queries.get(query)
+        if state is None:
+            state = self._queries[query] = _QueryYield()
+        return state
+
+    def observe(self, query: str, *, new_items: int, pages: int) -> None:
+        """Fold one completed poll of ``query`` into its yield estimate."""
+        state = self._state(query)
+        if state.polls == 0:
+            state.items = float(new_items)
+            state.pages = float(max(pages, 1))
+        else:
+            state.items += self.alpha * (new_items - state.items)
+            state.pages += self.alpha * (max(pages, 1) - state.pages)
+        state.polls += 1
+        state.last_polled_at = time.monotonic()
+
+    def interval(self, query: str, queries: list[str] | None = None, keys: list[str] | None = None) -> float:
+        """Seconds to wait before polling ``query`` again."""
+        settings = get_settings()
+        queries = queries if queries is not None else settings.youtube_queries
+        keys = keys if keys is not None else settings.youtube_api_keys
+        if not keys:
+            return self.min_interval
+        remaining = self.quota.remaining(keys)
+        if remaining <= 0:
+            # Nothing left today; check back when the allowance resets
+            return min(self.max_interval, self.quota.seconds_until_reset())
+        weights = {q: self._state(q).items + self.YIELD_FLOOR for q in set(queries) | {query}}
+        share = weights[query] / sum(weights.values())
+        units_per_second = remaining / self.quota.seconds_until_reset() * share
+        wanted = self._state(query).pages * SEARCH_COST / units_per_second
+        return min(self.max_interval, max(self.min_interval, wanted))
+
+    def plan(self) -> dict:
+        settings = get_settings()
+        keys = settings.youtube_api_keys
+        queries = settings.youtube_queries
+        now = time.monotonic()
+        plan_queries = {}
+        for q in queries:
+            state = self._state(q)
+            interval = self.interval(q, queries, keys)
+            next_in = None
+            if state.last_polled_at is not None:
+                next_in = round(max(0.0, state.last_polled_at + interval - now), 1)
+            plan_queries[q] = {
+                "interval_seconds": round(interval, 1),
+                "next_poll_in_seconds": next_in,
+                "yield_per_poll": round(state.items, 2),
+                "pages_per_poll": round(state.pages, 2),
+                "polls": state.polls,
+            }
+        return {
+            "min_interval_seconds": self.min_interval,
+            "max_interval_seconds": self.max_interval,
+            "quota": {
+                "daily_limit_per_key": self.quota.daily_limit,
+                "remaining": self.quota.remaining(keys),
+                "reset_at": self.quota.reset_at().isoformat(),
+                "keys": {mask_key(k): self.quota.spent(k) for k in keys},
+            },
+            "queries": plan_queries,
+        }
+
+
+_scheduler: PollScheduler | None = None
+
+
+def get_poll_scheduler() -> PollScheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = PollScheduler(
+            settings.poll_interval_min, settings.poll_interval_max, settings.youtube_daily_quota
+        )
+    return _scheduler
@@ -1,68 +1,681 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
+from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import NamedTuple, Optional
+
+from sqlalchemy import text
 
 from .config import get_settings
-from .crud import upsert_videos
+from .coordination import build_coordinator
+from .enrichment import build_enricher
+from .stats import StatsSampler
+from .crud import (
+    PollOutcome,
+    as_utc,
+    get_key_states,
+    get_page_tokens,
+    get_poll_state,
+    get_watermarks,
+    needs_enrichment,
+    save_key_states,
+    save_poll_state,
+    upsert_videos,
+)
 from .db import get_session
-from .youtube_client import YouTubeClient
-from sqlalchemy import select, func
-from .models import Video
+from .hot_feed import get_hot_feed
+from .metrics import StageTimer
+from .partitions import maintain_partitions
+from .poll_scheduler import QuotaLedger, get_poll_scheduler, mask_key
+from .spool import build_spool
+from .youtube_client import APIKeyRotator, YouTubeClient, key_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Partition maintenance only has work around month boundaries; hourly is plenty
+PARTITION_CHECK_SECONDS = 3600
+# fetch_now takes any query from the public endpoint; bound the results kept for reuse
+FETCH_NOW_MAX_RESULTS = 1024
+
+
+def _parse_items(items: list[dict]) -> list[dict]:
+    transformed = YouTubeClient.transform_items(items)
+    # Convert published_at to datetime
+    for t in transformed:
+        if isinstance(t.get("published_at"), str):
+            t["published_at"] = datetime.fromisoformat(t["published_at"].replace("Z", "+00:00"))
+    return transformed
+
+
+async def load_key_health(pool: APIKeyRotator, quota: QuotaLedger, *, cooldowns: bool = True) -> None:
+    """Resume key cooldowns and fold in today's persisted quota spend.
+
+    The spend is the total of every process sharing the keys, so pollers call
+    this with ``cooldowns=False`` on each coordination tick to budget against it.
+    """
+    try:
+        async with get_session() as session:
+            states = await get_key_states(session)
+    except Exception:
+        return
+    saved_cooldowns = {}
+    for key in pool.keys():
+        state = states.get(key_fingerprint(key))
+        if state is None:
+            continue
+        if state.cooldown_until is not None:
+            saved_cooldowns[key] = as_utc(state.cooldown_until).timestamp()
+        quota.load(key, as_utc(state.quota_day), state.units_spent or 0)
+    if cooldowns:
+        pool.load(saved_cooldowns)
+
+
+async def save_key_health(pool: APIKeyRotator, quota: QuotaLedger) -> None:
+    """Persist key cooldowns, and add the quota spent since the last save, when either changed."""
+    if not (pool.dirty or quota.dirty):
+        return
+    pool.dirty = quota.dirty = False
+    cooldowns = pool.cooldowns()
+    spent = quota.take_unsaved()
+    states = [
+        {
+            "key_hash": key_fingerprint(k),
+            "cooldown_until": (
+                datetime.fromtimestamp(cooldowns[k], timezone.utc) if k in cooldowns else None
+            ),
+            "quota_day": quota.day.astimezone(timezone.utc),
+            "units_spent": spent.get(k, 0),
+        }
+        for k in pool.keys()
+    ]
+    try:
+        async with get_session() as session:
+            await save_key_states(session, states)
+    except Exception:
+        # Try again after the next call
+        quota.restore_unsaved(spent)
+        pool.dirty = quota.dirty = True
+
+
+class FetchedPage(NamedTuple):
+    """Unit of work on the ingest queue.
+
+    A non-None ``outcome`` closes a fetch walk for ``query``: the writer saves it
+    to ``poll_state`` in the same transaction as the rows queued before it.
+    """
+
+    query: str
+    videos: list[dict]
+    outcome: Optional[PollOutcome] = None
+
+
+def _page_record(page: FetchedPage) -> dict:
+    return {"query": page.query, "videos": page.videos, "outcome": page.outcome}
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _page_from_record(record: dict) -> FetchedPage:
+    """Inverse of ``_page_record`` after a JSON round trip through the spool."""
+    videos = record.get("videos") or []
+    for v in videos:
+        if isinstance(v.get("published_at"), str):
+            v["published_at"] = _parse_time(v["published_at"])
+    outcome = record.get("outcome")
+    if outcome is not None:
+        published_after, page_token, last_status, last_error = outcome
+        outcome = PollOutcome(_parse_time(published_after), page_token, last_status, last_error)
+    return FetchedPage(record["query"], videos, outcome)
+
+
+def _merge_outcome(older: Optional[PollOutcome], newer: PollOutcome) -> PollOutcome:
+    """Later status wins; the watermark only moves forward."""
+    if older is None or older.published_after is None:
+        return newer
+    if newer.published_after is None or newer.published_after < older.published_after:
+        return newer._replace(published_after=older.published_after)
+    return newer
 
 
 class BackgroundPoller:
+    """Fetch → queue → batch-write ingestion pipeline.
+
+    One fetcher per configured query (``YOUTUBE_QUERIES``) runs concurrently,
+    at most ``POLL_CONCURRENCY`` of them talking to YouTube at once over the
+    shared client. Fetchers put parsed pages on a bounded ``asyncio.Queue``; a
+    single writer drains it and coalesces pages into one ``upsert_videos``
+    transaction per batch, flushing when ``INGEST_BATCH_SIZE`` rows are pending
+    or ``INGEST_FLUSH_SECONDS`` have passed. A slow database fills the queue,
+    which blocks fetchers (backpressure) instead of dropping pages.
+
+    With ``SPOOL_DIR`` set, fetchers instead append pages to a durable on-disk
+    ``Spool`` and move on once they are fsynced; the writer replays sealed
+    segments in batches of up to ``SPOOL_REPLAY_BATCH`` rows and deletes them
+    only after they commit. Pages fetched while the database is down, or before
+    a crash, are written later instead of being fetched (and paid for) again.
+
+    Between polls each fetcher sleeps for the interval the ``PollScheduler``
+    assigns its query from the remaining daily quota and the query's yield.
+
+    With several API replicas, a ``Coordinator`` (``POLL_COORDINATION``) decides
+    which queries this process polls; fetchers are started and stopped as that
+    share changes.
+    """
+
     def __init__(self):
-        self._task: Optional[asyncio.Task] = None
+        settings = get_settings()
+        self._tasks: list[asyncio.Task] = []
+        self._fetchers: dict[str, asyncio.Task] = {}
         self._client = YouTubeClient()
+        self.coordinator = build_coordinator()
+        self.enricher = build_enricher(self._client)
+        self.stats_sampler = (
+            StatsSampler(self.enricher) if settings.stats_sampling and self.enricher is not None else None
+        )
+        self.enrich_skipped = 0
+        self.stats_errors = 0
+        self.partitions: dict = {}
+        self.partition_errors = 0
+        self.coordination_errors = 0
         self._running = False
+        self._queue: asyncio.Queue[FetchedPage] = asyncio.Queue(maxsize=settings.ingest_queue_size)
+        self.spool = build_spool()
+        self._fetch_slots = asyncio.Semaphore(settings.poll_concurrency)
+        self.scheduler = get_poll_scheduler()
+        self.fetch_timer = StageTimer()
+        self.enqueue_timer = StageTimer()  # time fetchers spend blocked on a full queue
+        self.write_timer = StageTimer()
+        self.rows_written = 0
+        self.rows_inserted = 0
+        self.rows_updated = 0
+        self.rows_skipped = 0
+        self.skipped_video_ids: deque[str] = deque(maxlen=50)
+        self.write_errors = 0
+        self.spool_errors = 0
+        self.fetch_errors = 0
+        self.last_write_error: str | None = None
+        self.watermarks: dict[str, datetime] = {}
+        self._fetch_now_inflight: dict[str, asyncio.Task] = {}
+        self._fetch_now_results: dict[str, tuple[float, dict]] = {}
+        self.fetch_now_coalesced = 0
 
     async def start(self):
-        if self._task is None:
+        if not self._tasks:
             self._running = True
-            self._task = asyncio.create_task(self._run())
+            await self._load_key_health()
+            if self.spool is not None:
+                await self.spool.open()
+            self._tasks = [
+                asyncio.create_task(self._write_loop()),
+                asyncio.create_task(self._coordinate_loop()),
+            ]
+            if self.stats_sampler is not None:
+                self._tasks.append(asyncio.create_task(self._stats_loop()))
+            self._tasks.append(asyncio.create_task(self._partition_loop()))
 
     async def stop(self):
         self._running = False
-        if self._task:
-            self._task.cancel()
+        tasks = [*self._tasks, *self._fetchers.values()]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
             try:
-                await self._task
+                await task
             except asyncio.CancelledError:
                 pass
-            self._task = None
+        self._tasks = []
+        self._fetchers = {}
+        await self.coordinator.release()
+        if self.spool is not None:
+            await self.spool.close()
         await self._client.close()
 
-    async def _run(self):
+    async def _coordinate_loop(self):
+        """Keep one fetcher running per query this replica currently owns."""
         settings = get_settings()
-        poll_interval = settings.poll_interval
-        # Initialize from DB max published_at to avoid missing recent items on first run
+        while self._running:
+            try:
+                owned = set(await self.coordinator.owned(settings.youtube_queries))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Ownership cannot be confirmed: stand down rather than risk double polling
+                self.coordination_errors += 1
+                owned = set()
+            for query in [q for q in self._fetchers if q not in owned]:
+                self._fetchers.pop(query).cancel()
+            added = [q for q in settings.youtube_queries if q in owned and q not in self._fetchers]
+            if added:
+                # Resume from what the previous owner committed
+                positions = await self._initial_positions(added)
+                for query in added:
+                    self._fetchers[query] = asyncio.create_task(self._fetch_loop(query, *positions[query]))
+            # Other replicas spend the same keys' quota; budget against the shared total
+            await self._save_key_health()
+            await load_key_health(self._client.key_rotator, self.scheduler.quota, cooldowns=False)
+            await asyncio.sleep(self.coordinator.check_interval)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "spool": self.spool.stats() if self.spool is not None else None,
+            "fetch": self.fetch_timer.snapshot(),
+            "enqueue_wait": self.enqueue_timer.snapshot(),
+            "write": self.write_timer.snapshot(),
+            "rows_written": self.rows_written,
+            "rows_inserted": self.rows_inserted,
+            "rows_updated": self.rows_updated,
+            "rows_skipped": self.rows_skipped,
+            "skipped_video_ids": list(self.skipped_video_ids),
+            "fetch_errors": self.fetch_errors,
+            "write_errors": self.write_errors,
+            "spool_errors": self.spool_errors,
+            "last_write_error": self.last_write_error,
+            "last_status": self._client.last_status_code,
+            "last_error": self._client.last_error,
+            "watermarks": {q: ts.isoformat() for q, ts in self.watermarks.items()},
+            "fetch_now_coalesced": self.fetch_now_coalesced,
+            "coordination": self.coordinator.describe(),
+            "enrichment": self.enricher.stats() if self.enricher is not None else None,
+            "enrich_skipped": self.enrich_skipped,
+            "stats_sampler": self.stats_sampler.stats() if self.stats_sampler is not None else None,
+            "stats_errors": self.stats_errors,
+            "partitions": self.partitions,
+            "partition_errors": self.partition_errors,
+            "coordination_errors": self.coordination_errors,
+            "key_cooldowns": {
+                mask_key(k): round(until - time.time(), 1)
+                for k, until in self._client.key_rotator.cooldowns().items()
+            },
+        }
+
+    async def _stats_loop(self):
+        """Re-sample view counts on one replica (see ``StatsSampler``)."""
+        interval = get_settings().stats_tick_seconds
+        while self._running:
+            if self.coordinator.owns("stats-sampler"):
+                try:
+                    await self.stats_sampler.tick()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.stats_errors += 1
+            await asyncio.sleep(interval)
+
+    async def _partition_loop(self):
+        """Create upcoming ``videos`` partitions and retire expired ones on one replica."""
+        while self._running:
+            if self.coordinator.owns("partition-maintenance"):
+                try:
+                    async with get_session() as session:
+                        self.partitions = await maintain_partitions(session)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.partition_errors += 1
+                    self.partitions = {**self.partitions, "last_error": f"{type(e).__name__}: {e}"}
+                if not self.partitions.get("partitioned", True):
+                    return
+            await asyncio.sleep(PARTITION_CHECK_SECONDS)
+
+    async def fetch_now(self, query: str) -> dict:
+        """Fetch ``query`` immediately on the shared client, single-flight.
+
+        Callers arriving while a fetch for the same query is running await that
+        fetch instead of starting another, and a finished result is handed out
+        again for ``FETCH_NOW_CACHE_SECONDS``. The fetch runs as its own task, so
+        a caller that disconnects does not cancel it for the others.
+        """
+        cached = self._fetch_now_results.get(query)
+        if cached is not None and time.monotonic() < cached[0]:
+            self.fetch_now_coalesced += 1
+            return {**cached[1], "coalesced": True}
+        task = self._fetch_now_inflight.get(query)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.create_task(self._fetch_now(query))
+            self._fetch_now_inflight[query] = task
+            task.add_done_callback(lambda t: self._fetch_now_done(query, t))
+        else:
+            self.fetch_now_coalesced += 1
+        result = await asyncio.shield(task)
+        return {**result, "coalesced": coalesced}
+
+    def _fetch_now_done(self, query: str, task: asyncio.Task) -> None:
+        self._fetch_now_inflight.pop(query, None)
+        if not task.cancelled() and task.exception() is None:
+            now = time.monotonic()
+            results = self._fetch_now_results
+            results.pop(query, None)
+            results[query] = (now + get_settings().fetch_now_cache_seconds, task.result())
+            # Entries expire in insertion order, so pruning stops at the first live one
+            for q in list(results):
+                if results[q][0] > now and len(results) <= FETCH_NOW_MAX_RESULTS:
+                    break
+                del results[q]
+
+    async def _fetch_now(self, query: str) -> dict:
+        """One search.list call from the query's ``poll_state`` watermark; records its status there.
+
+        A single page of 50 may not reach back to the watermark, so only the
+        poller's complete walks move it (and the saved resume token is kept).
+        """
+        async with get_session() as session:
+            state = await get_poll_state(session, query)
+        published_after = as_utc(state.published_after) if state is not None else None
+        page_token = state.page_token if state is not None else None
+        if published_after is None:
+            published_after = datetime.now(timezone.utc) - timedelta(days=2)
+
+        async with self._fetch_slots:
+            items = await self._client.search_latest(published_after=published_after, query=query)
+            status, error = self._client.last_status_code, self._client.last_error
+        rows = _parse_items(items)
+        await self._enrich(rows)
+        async with get_session() as session:
+            counts = await upsert_videos(session, rows, query=query)
+            await save_poll_state(session, {query: PollOutcome(None, page_token, status, error)})
+        await self._save_key_health()
+        return {
+            "status": "ok",
+            "fetched": len(items),
+            "inserted": counts.inserted,
+            "updated": counts.updated,
+            "query": query,
+            "published_after": published_after.isoformat().replace("+00:00", "Z"),
+            "last_status": status,
+            "last_error": error,
+        }
+
+    async def _load_key_health(self) -> None:
+        await load_key_health(self._client.key_rotator, self.scheduler.quota)
+
+    async def _save_key_health(self) -> None:
+        await save_key_health(self._client.key_rotator, self.scheduler.quota)
+
+    async def _initial_positions(self, queries: list[str]) -> dict[str, tuple[datetime, Optional[str]]]:
+        """Persisted per-query watermarks and resume tokens from ``poll_state``; new queries look back two days."""
         try:
             async with get_session() as session:
-                res = await session.execute(select(func.max(Video.published_at)))
-                max_ts = res.scalar()
+                saved = await get_watermarks(session)
+                tokens = await get_page_tokens(session)
         except Exception:
-            max_ts = None
-        last_after = max_ts or (datetime.now(timezone.utc) - timedelta(days=2))
+            saved, tokens = {}, {}
+        fallback = datetime.now(timezone.utc) - timedelta(days=2)
+        # A token is only valid for the watermark its walk started from
+        return {q: (saved.get(q) or fallback, tokens.get(q) if saved.get(q) else None) for q in queries}
+
+    async def _fetch_loop(self, query: str, last_after: datetime, page_token: Optional[str] = None):
+        self.watermarks[query] = last_after
+        # Newest video seen since the current walk started, possibly over several polls
+        walk_max: Optional[datetime] = None
         while self._running:
+            pages = new_items = 0
+            outcome = None
             try:
-                items = await self._client.search_latest(published_after=last_after)
-                transformed = YouTubeClient.transform_items(items)
-                # Convert published_at to datetime
-                for t in transformed:
-                    if isinstance(t.get("published_at"), str):
-                        t["published_at"] = datetime.fromisoformat(t["published_at"].replace("Z", "+00:00"))
-                inserted = 0
-                if transformed:
-                    async with get_session() as session:
-                        inserted = await upsert_videos(session, transformed)
-                # Advance last_after to max published_at we saw (avoid missing newer)
-                if transformed:
-                    max_dt = max([t["published_at"] for t in transformed if t.get("published_at")])
-                    if max_dt and max_dt > last_after:
-                        last_after = max_dt
+                last = None
+                async with self._fetch_slots:
+                    started = time.monotonic()
+                    # Follow nextPageToken so bursts larger than one page are not dropped;
+                    # each page is handed to the writer as soon as it arrives
+                    async for page in self._client.iter_search_pages(
+                        published_after=last_after, query=query, page_token=page_token
+                    ):
+                        last = page
+                        transformed = _parse_items(page.items)
+                        self.fetch_timer.observe(time.monotonic() - started)
+                        pages += 1
+                        new_items += sum(1 for t in transformed if t.get("published_at") and t["published_at"] > last_after)
+                        if transformed:
+                            enqueue_started = time.monotonic()
+                            await self._enqueue(FetchedPage(query, transformed))
+                            self.enqueue_timer.observe(time.monotonic() - enqueue_started)
+                            page_max = max([t["published_at"] for t in transformed if t.get("published_at")], default=None)
+                            if page_max and (walk_max is None or page_max > walk_max):
+                                walk_max = page_max
+                        if page.next_page_token:
+                            page_token = page.next_page_token
+                        started = time.monotonic()
+                advanced = None
+                if last is not None and last.complete:
+                    # Only a walk that reached the watermark may move it, to the newest video it
+                    # saw. The writer persists it after the pages queued ahead of it, and retries
+                    # failed batches, so queued pages are not lost.
+                    if walk_max and walk_max > last_after:
+                        last_after = advanced = walk_max
+                        self.watermarks[query] = last_after
+                    walk_max = page_token = None
+                elif last is not None and not last.next_page_token and pages == 1:
+                    # The first call failed; a resume token may have expired, so walk again from the top
+                    page_token = None
+                # Otherwise the walk hit YOUTUBE_MAX_PAGES or failed midway: the next poll
+                # continues from page_token under the same watermark
+                if last is not None:
+                    outcome = PollOutcome(advanced, page_token, last.status, last.error)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Swallow to keep loop alive; failures are visible in stats() and poll_state
+                self.fetch_errors += 1
+                outcome = PollOutcome(None, page_token, self._client.last_status_code, f"{type(e).__name__}: {e}")
+            if outcome is not None:
+                await self._enqueue(FetchedPage(query, [], outcome=outcome))
+            self.scheduler.observe(query, new_items=new_items, pages=pages)
+            await self._save_key_health()
+            await asyncio.sleep(self.scheduler.interval(query))
+
+    async def _enqueue(self, page: FetchedPage) -> None:
+        """Hand a page to the writer: durably via the spool when configured, else the queue."""
+        if self.spool is None:
+            await self._queue.put(page)
+            return
+        backoff = 1.0
+        while True:
+            try:
+                await self.spool.append(_page_record(page))
+                return
+            except OSError as e:
+                # Disk full or failing: hold the fetcher (as a full queue would) rather than drop the page
+                self.spool_errors += 1
+                self.last_write_error = f"spool: {type(e).__name__}: {e}"
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def _write_loop(self):
+        if self.spool is not None:
+            await self._replay_loop()
+            return
+        settings = get_settings()
+        batch: list[FetchedPage] = []
+        pending = 0
+        marks: dict[str, PollOutcome] = {}
+        deadline: float | None = None
+        while self._running:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                page = await asyncio.wait_for(self._queue.get(), timeout)
+                if page.videos:
+                    batch.append(page)
+                    pending += len(page.videos)
+                if page.outcome is not None:
+                    marks[page.query] = _merge_outcome(marks.get(page.query), page.outcome)
+                if deadline is None:
+                    deadline = time.monotonic() + settings.ingest_flush_seconds
+                if pending < settings.ingest_batch_size:
+                    continue
+            except asyncio.TimeoutError:
+                pass
+            await self._flush(batch, marks)
+            batch, pending, marks, deadline = [], 0, {}, None
+
+    async def _replay_loop(self):
+        settings = get_settings()
+        while self._running:
+            await asyncio.sleep(settings.ingest_flush_seconds)
+            await self.replay_spool()
+
+    async def replay_spool(self) -> int:
+        """Write every sealed spool segment to the database, oldest first; returns rows replayed.
+
+        Whole segments are grouped into batches of about ``SPOOL_REPLAY_BATCH``
+        rows and removed once their batch is committed (``_flush`` retries until
+        it is). A crash in between replays them again, which the upsert absorbs.
+        """
+        settings = get_settings()
+        # Pick up slots of workers that have died since this one started
+        self.spool.adopt_orphans()
+        self.spool.seal()
+        segments = self.spool.sealed()
+        replayed = 0
+        while segments:
+            batch: list[FetchedPage] = []
+            marks: dict[str, PollOutcome] = {}
+            taken: list[str] = []
+            rows = 0
+            while segments and (not taken or rows < settings.spool_replay_batch):
+                path = segments.pop(0)
+                for page in map(_page_from_record, self.spool.read(path)):
+                    if page.videos:
+                        batch.append(page)
+                        rows += len(page.videos)
+                    if page.outcome is not None:
+                        marks[page.query] = _merge_outcome(marks.get(page.query), page.outcome)
+                taken.append(path)
+            await self._flush(batch, marks)
+            self.spool.remove(taken)
+            replayed += rows
+        return replayed
+
+    async def _flush(self, batch: list[FetchedPage], marks: dict[str, PollOutcome] | None = None) -> None:
+        """Write one coalesced batch and its poll outcomes, retrying with backoff until it lands.
+
+        After ``INGEST_WRITE_ATTEMPTS`` failures the batch is split to isolate
+        rows that can never be stored, which are skipped instead of stalling
+        the writer (and every fetcher behind it) forever.
+        """
+        # Overlapping fetch windows repeat videos; keep the last copy of each per query
+        by_query: dict[str, dict[str, dict]] = {}
+        for page in batch:
+            rows_for_query = by_query.setdefault(page.query, {})
+            for v in page.videos:
+                if v.get("video_id"):
+                    rows_for_query[v["video_id"]] = v
+        marks = marks or {}
+        # Once per batch, outside the write retries; rows whose lookup failed are stored without it
+        await self._enrich([row for rows in by_query.values() for row in rows.values()])
+        attempts = get_settings().ingest_write_attempts
+        failures = 0
+        backoff = 1.0
+        while by_query or marks:
+            started = time.monotonic()
+            try:
+                if failures < attempts:
+                    inserted, updated = await self._write(by_query, marks)
+                    skipped = 0
+                else:
+                    inserted, updated, skipped = await self._write_isolating(by_query, marks)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                self.write_errors += 1
+                self.last_write_error = f"{type(e).__name__}: {e}"
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            self.write_timer.observe(time.monotonic() - started)
+            self.rows_written += sum(len(rows) for rows in by_query.values()) - skipped
+            self.rows_inserted += inserted
+            self.rows_updated += updated
+            break
+        # Committed inserts are pushed into the hot feed; re-warm it here when it
+        # has aged out so API requests do not have to
+        feed = get_hot_feed()
+        if not feed.fresh():
+            try:
+                async with get_session() as session:
+                    await feed.warm(session)
             except Exception:
-                # Swallow to keep loop alive; logs could be added here
                 pass
-            await asyncio.sleep(poll_interval)
+
+    async def _enrich(self, rows: list[dict]) -> None:
+        """Add videos.list data to the rows that need it; re-seen unchanged videos cost no quota."""
+        if self.enricher is None or not rows:
+            return
+        try:
+            async with get_session() as session:
+                wanted = await needs_enrichment(session, rows)
+        except Exception:
+            wanted = rows
+        self.enrich_skipped += len(rows) - len(wanted)
+        if wanted:
+            await self.enricher.enrich(wanted)
+
+    async def _write(self, by_query: dict[str, dict[str, dict]], marks: dict[str, PollOutcome]) -> tuple[int, int]:
+        """Upsert rows per query and save poll outcomes in one transaction; returns (inserted, updated)."""
+        async with get_session() as session:
+            inserted = updated = 0
+            for query, rows in by_query.items():
+                counts = await upsert_videos(session, list(rows.values()), query=query)
+                inserted += counts.inserted
+                updated += counts.updated
+            await save_poll_state(session, marks)
+        return inserted, updated
+
+    async def _write_isolating(
+        self, by_query: dict[str, dict[str, dict]], marks: dict[str, PollOutcome]
+    ) -> tuple[int, int, int]:
+        """Write a batch that keeps failing in halves, skipping rows that fail on their own.
+
+        Returns (inserted, updated, skipped). Raises, for ``_flush`` to retry,
+        when the database itself is unreachable, so an outage never discards rows.
+        """
+        inserted = updated = skipped = 0
+        for query, rows in by_query.items():
+            todo = [list(rows.values())]
+            while todo:
+                part = todo.pop()
+                try:
+                    i, u = await self._write({query: {v["video_id"]: v for v in part}}, {})
+                except Exception as e:
+                    if len(part) > 1:
+                        mid = len(part) // 2
+                        todo += [part[mid:], part[:mid]]
+                        continue
+                    if not await self._database_reachable():
+                        raise
+                    skipped += 1
+                    self.rows_skipped += 1
+                    self.skipped_video_ids.append(part[0]["video_id"])
+                    self.last_write_error = f"skipped {part[0]['video_id']}: {type(e).__name__}: {e}"
+                    logger.warning("skipping video %s that cannot be stored: %s", part[0]["video_id"], e)
+                    continue
+                inserted += i
+                updated += u
+        await self._write({}, marks)
+        return inserted, updated, skipped
+
+    @staticmethod
+    async def _database_reachable() -> bool:
+        try:
+            async with get_session() as session:
+                await session.execute(text("SELECT 1"))
+        except Exception:
+            return False
+        return True
+
+_poller: BackgroundPoller | None = None
+
+
+def get_poller() -> BackgroundPoller:
+    global _poller
+    if _poller is None:
+        _poller = BackgroundPoller()
+    return _poller
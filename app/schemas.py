@@ -14,16 +14,38 @@ class VideoBase(BaseModel):
     thumbnails: Optional[dict[str, Any]] = None
     channel_id: Optional[str] = None
     channel_title: Optional[str] = None
+    duration_seconds: Optional[int] = None
+    view_count: Optional[int] = None
+    like_count: Optional[int] = None
+    tags: Optional[list[str]] = None
 
 
 class VideoOut(VideoBase):
     pass
 
 
+class VideoDetail(VideoOut):
+    raw_json: Optional[dict[str, Any]] = None
+
+
 class PaginatedVideos(BaseModel):
-    total: int
+    # None with count_mode=none; a floor or planner estimate when total_approximate
+    total: int | None
+    total_approximate: bool = False
     page: int
     per_page: int
     next_page: int | None
     prev_page: int | None
+    next_cursor: str | None = None
+    # Search only: which planner tier served the results (fts, trigram, ilike, fuzzy)
+    search_tier: str | None = None
     items: list[VideoOut]
+
+
+class TrendingVideo(VideoOut):
+    views_per_hour: Optional[float] = None
+
+
+class TrendingVideos(BaseModel):
+    hours: int
+    items: list[TrendingVideo]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from .config import get_settings
+
+
+class SearchCache:
+    """LRU + TTL cache of serialized search responses, bounded in bytes.
+
+    Every entry remembers the ingest generation it was computed under; once
+    ``bump_generation`` runs (new rows inserted) older entries read as misses.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, tuple[float, int, bytes]] = OrderedDict()
+
+    def bump_generation(self) -> None:
+        self.generation += 1
+
+    def _drop(self, key: Hashable) -> None:
+        _, _, body = self._entries.pop(key)
+        self.bytes -= len(body)
+
+    def get(self, key: Hashable) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, generation, body = entry
+        if generation != self.generation or time.monotonic() >= expires_at:
+            self._drop(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Hashable, body: bytes, generation: int) -> None:
+        """Store ``body`` computed under ``generation`` (read before the query ran)."""
+        if generation != self.generation or len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, generation, body)
+        self.bytes += len(body)
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+_cache: SearchCache | None = None
+
+
+def get_search_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = SearchCache(settings.search_cache_max_bytes, settings.search_cache_ttl)
+    return _cache
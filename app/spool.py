@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Iterator, Optional
+
+from .config import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, so concurrent processes must use distinct SPOOL_DIRs
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^(\d{12})\.ndjson$")
+# Slots let several processes share one SPOOL_DIR; each writes only to the slot it holds a lock on
+MAX_SLOTS = 64
+# How long close() waits for pending fsyncs; a failing disk may never finish them
+CLOSE_TIMEOUT_SECONDS = 5.0
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class Spool:
+    """Append-only on-disk log of records as numbered NDJSON segments.
+
+    ``append`` returns only once the record has been fsynced. Appends that
+    arrive while an fsync is pending (or within ``fsync_delay`` of the first)
+    share one fsync. The active segment is rotated once it reaches
+    ``segment_bytes``, or on ``seal``; sealed segments are what a replayer
+    reads and removes once their records are safely stored elsewhere. A
+    restarted process finds its previous segments sealed and drains them first.
+    Slots no live process holds (a worker that died, or fewer workers after a
+    restart) are adopted, and their segments drained too.
+    """
+
+    def __init__(self, directory: str, *, segment_bytes: int, fsync_delay: float = 0.0):
+        self.root = directory
+        self.segment_bytes = segment_bytes
+        self.fsync_delay = fsync_delay
+        self.directory: str | None = None
+        self._lock_fd: int | None = None
+        self._adopted: dict[str, int] = {}  # orphaned slot directory -> lock fd
+        self._seq = 0
+        self._fd: int | None = None
+        self._size = 0
+        self._closing: list[int] = []
+        self._waiters: list[asyncio.Future] = []
+        self._wake = asyncio.Event()
+        self._sync_task: asyncio.Task | None = None
+        self.appends = 0
+        self.fsyncs = 0
+
+    def _claim_slot(self) -> str:
+        for slot in range(MAX_SLOTS):
+            path = os.path.join(self.root, str(slot))
+            os.makedirs(path, exist_ok=True)
+            fd = os.open(os.path.join(path, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is None:
+                self._lock_fd = fd
+                return path
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            self._lock_fd = fd
+            return path
+        raise RuntimeError(f"all {MAX_SLOTS} spool slots under {self.root} are in use")
+
+    def _segments(self, directory: str | None = None) -> list[tuple[int, str]]:
+        directory = directory or self.directory
+        found = []
+        for name in os.listdir(directory):
+            m = _SEGMENT_RE.match(name)
+            if m:
+                found.append((int(m.group(1)), os.path.join(directory, name)))
+        return sorted(found)
+
+    def adopt_orphans(self) -> list[str]:
+        """Lock every other slot no process holds, so its segments are replayed here.
+
+        Adopted slots stay locked until ``close``; nothing appends to them, so all
+        their segments count as sealed. Returns the newly adopted directories.
+        """
+        if fcntl is None or self.directory is None:
+            # Without flock a live slot cannot be told from an orphaned one
+            return []
+        adopted = []
+        for name in sorted(os.listdir(self.root), key=lambda n: (len(n), n)):
+            path = os.path.join(self.root, name)
+            if not name.isdigit() or path == self.directory or path in self._adopted or not os.path.isdir(path):
+                continue
+            fd = os.open(os.path.join(path, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            self._adopted[path] = fd
+            adopted.append(path)
+        if adopted:
+            logger.info("adopted orphaned spool slots %s", adopted)
+        return adopted
+
+    async def open(self) -> None:
+        self.directory = self._claim_slot()
+        self.adopt_orphans()
+        existing = self._segments()
+        self._seq = existing[-1][0] if existing else 0
+        self._rotate()
+        self._sync_task = asyncio.create_task(self._sync_loop())
+
+    def _rotate(self) -> None:
+        if self._fd is not None:
+            # Fsynced and closed by the sync loop, so appends waiting on it are covered
+            self._closing.append(self._fd)
+            self._wake.set()
+        self._seq += 1
+        path = os.path.join(self.directory, f"{self._seq:012d}.ndjson")
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = 0
+
+    async def append(self, record: dict) -> None:
+        line = (json.dumps(record, default=_json_default, separators=(",", ":")) + "\n").encode()
+        # One write() per record: a crash leaves at most a torn last line, which read() skips
+        os.write(self._fd, line)
+        self._size += len(line)
+        self.appends += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._wake.set()
+        if self._size >= self.segment_bytes:
+            self._rotate()
+        await waiter
+
+    async def _sync_loop(self) -> None:
+        backoff = 0.1
+        while True:
+            await self._wake.wait()
+            if self.fsync_delay:
+                await asyncio.sleep(self.fsync_delay)
+            self._wake.clear()
+            # Everything written before this point is in one of these files
+            waiters, self._waiters = self._waiters, []
+            closing, self._closing = self._closing, []
+            fds = [*closing, self._fd]
+            try:
+                for fd in fds:
+                    await asyncio.to_thread(os.fsync, fd)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                self._closing = closing + self._closing
+                # Retry the unsynced files without waiting for another append
+                self._wake.set()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = 0.1
+            self.fsyncs += 1
+            for fd in closing:
+                os.close(fd)
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def seal(self) -> None:
+        """Rotate the active segment if it holds anything, so it becomes replayable."""
+        if self._fd is not None and self._size:
+            self._rotate()
+
+    def sealed(self) -> list[str]:
+        """Paths of segments no longer written to: adopted slots' first, then this slot's oldest first."""
+        orphaned = [path for directory in self._adopted for _, path in self._segments(directory)]
+        return orphaned + [path for seq, path in self._segments() if seq < self._seq]
+
+    @staticmethod
+    def read(path: str) -> Iterator[dict]:
+        with open(path, "rb") as fh:
+            for line in fh:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn write from a crash mid-append; that record was never acknowledged
+                    logger.warning("skipping unreadable spool record in %s", path)
+
+    @staticmethod
+    def remove(paths: list[str]) -> None:
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    async def close(self) -> None:
+        if self._sync_task is None:
+            return
+        # Let pending appends settle before stopping the sync loop, within a bound
+        deadline = time.monotonic() + CLOSE_TIMEOUT_SECONDS
+        while (self._waiters or self._closing) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        self._sync_task.cancel()
+        try:
+            await self._sync_task
+        except asyncio.CancelledError:
+            pass
+        self._sync_task = None
+        fds, self._closing, self._fd = [*self._closing, self._fd], [], None
+        for fd in fds:
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                # Unacknowledged records may be lost; acknowledged ones were fsynced already
+                logger.warning("spool fsync failed on close: %s", e)
+            os.close(fd)
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_exception(OSError("spool closed before the record was fsynced"))
+        for fd in self._adopted.values():
+            os.close(fd)
+        self._adopted = {}
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> dict:
+        pending = self._segments() if self.directory else []
+        pending += [seg for directory in self._adopted for seg in self._segments(directory)]
+        return {
+            "directory": self.directory,
+            "adopted": list(self._adopted),
+            "segments": len(pending),
+            "bytes": sum(os.path.getsize(path) for _, path in pending),
+            "appends": self.appends,
+            "fsyncs": self.fsyncs,
+        }
+
+
+def build_spool() -> Optional[Spool]:
+    settings = get_settings()
+    if not settings.spool_dir:
+        return None
+    return Spool(
+        settings.spool_dir,
+        segment_bytes=settings.spool_segment_bytes,
+        fsync_delay=settings.spool_fsync_ms / 1000,
+    )
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+from sqlalchemy import Row, TIMESTAMP, bindparam, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .crud import OUT_COLUMNS, as_utc
+from .db import get_session
+from .enrichment import Enricher
+from .models import Video, VideoStatRollup, VideoStatSample, VideoStatState
+
+_SQLITE_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+}
+
+
+def sample_interval(age: timedelta) -> timedelta:
+    """Decaying schedule: wait about an eighth of the video's age, within the configured bounds."""
+    settings = get_settings()
+    seconds = min(settings.stats_max_interval, max(settings.stats_min_interval, age.total_seconds() / 8))
+    return timedelta(seconds=seconds)
+
+
+def _dialect(session: AsyncSession) -> str:
+    return session.bind.dialect.name if session.bind is not None else ""
+
+
+def _bucket(dialect: str, column, granularity: str):
+    if dialect == "postgresql":
+        return func.date_trunc(granularity, column)
+    # Same text layout SQLAlchemy stores SQLite datetimes in, so buckets compare and parse as datetimes
+    return func.strftime(_SQLITE_BUCKET_FORMATS[granularity], column)
+
+
+async def seed_tracked(session: AsyncSession, now: datetime) -> None:
+    """Start tracking videos published within ``STATS_TRACK_DAYS`` that have no sampling state."""
+    since = now - timedelta(days=get_settings().stats_track_days)
+    untracked = (
+        select(Video.id, literal(now, TIMESTAMP(timezone=True)))
+        .outerjoin(VideoStatState, VideoStatState.video_ref == Video.id)
+        .where(Video.published_at >= since, VideoStatState.video_ref.is_(None))
+    )
+    stmt = VideoStatState.__table__.insert().from_select(["video_ref", "next_sample_at"], untracked)
+    await session.execute(stmt)
+
+
+async def due_videos(session: AsyncSession, now: datetime, limit: int) -> Sequence[Row]:
+    stmt = (
+        select(
+            VideoStatState.video_ref,
+            Video.video_id,
+            Video.published_at,
+            VideoStatState.last_sampled_at,
+            VideoStatState.last_view_count,
+        )
+        .join(Video, Video.id == VideoStatState.video_ref)
+        .where(VideoStatState.next_sample_at <= now)
+        .order_by(VideoStatState.next_sample_at)
+        .limit(limit)
+    )
+    return (await session.execute(stmt)).all()
+
+
+async def record_samples(
+    session: AsyncSession, due: Sequence[Row], found: dict[str, dict[str, Any]], now: datetime
+) -> int:
+    """Append samples for looked-up videos and reschedule every due video.
+
+    Velocity is the view delta since the previous sample per hour; a first
+    sample uses the lifetime average. Videos past ``STATS_TRACK_DAYS`` stop being
+    scheduled but keep their last velocity.
+    """
+    track = timedelta(days=get_settings().stats_track_days)
+    samples, states, latest = [], [], []
+    for row in due:
+        published = as_utc(row.published_at)
+        age = now - published if published is not None else track
+        next_at = now + sample_interval(age) if age < track else None
+        stats = found.get(row.video_id)
+        views = stats.get("view_count") if stats else None
+        if views is None:
+            # Deleted, private or a failed lookup: keep the old figures and try again later
+            states.append(
+                {"b_ref": row.video_ref, "b_next": next_at, "b_last": row.last_sampled_at,
+                 "b_views": row.last_view_count, "b_vph": None}
+            )
+            continue
+        last_at = as_utc(row.last_sampled_at)
+        if last_at is not None and row.last_view_count is not None and now > last_at:
+            vph = (views - row.last_view_count) / ((now - last_at).total_seconds() / 3600)
+        else:
+            vph = views / max(age.total_seconds() / 3600, 1 / 60)
+        samples.append(
+            {"video_ref": row.video_ref, "sampled_at": now, "view_count": views, "like_count": stats.get("like_count")}
+        )
+        states.append(
+            {"b_ref": row.video_ref, "b_next": next_at, "b_last": now, "b_views": views,
+             "b_vph": vph}
+        )
+        latest.append({"b_ref": row.video_ref, "b_views": views, "b_likes": stats.get("like_count")})
+
+    if samples:
+        await session.execute(VideoStatSample.__table__.insert(), samples)
+    if states:
+        t = VideoStatState.__table__
+        stmt = (
+            t.update()
+            .where(t.c.video_ref == bindparam("b_ref"))
+            .values(
+                next_sample_at=bindparam("b_next"),
+                last_sampled_at=bindparam("b_last"),
+                last_view_count=bindparam("b_views"),
+                # A NULL velocity (no new sample) keeps the previous one
+                views_per_hour=func.coalesce(bindparam("b_vph"), t.c.views_per_hour),
+            )
+        )
+        await session.execute(stmt, states)
+    if latest:
+        v = Video.__table__
+        stmt = (
+            v.update()
+            .where(v.c.id == bindparam("b_ref"))
+            .values(view_count=bindparam("b_views"), like_count=bindparam("b_likes"))
+        )
+        await session.execute(stmt, latest)
+    return len(samples)
+
+
+async def _rollup(session: AsyncSession, source, granularity: str, cutoff: datetime) -> None:
+    """Fold rows of ``source`` older than ``cutoff`` into ``granularity`` rollups, then delete them."""
+    dialect = _dialect(session)
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    if source is VideoStatSample:
+        time_col = VideoStatSample.sampled_at
+        aggregates = (func.min(VideoStatSample.view_count), func.max(VideoStatSample.view_count), func.count())
+        where = VideoStatSample.sampled_at < cutoff
+    else:
+        time_col = VideoStatRollup.bucket_start
+        aggregates = (
+            func.min(VideoStatRollup.views_min),
+            func.max(VideoStatRollup.views_max),
+            func.sum(VideoStatRollup.samples),
+        )
+        where = (VideoStatRollup.granularity == "hour") & (VideoStatRollup.bucket_start < cutoff)
+    bucket = _bucket(dialect, time_col, granularity)
+    grouped = (
+        select(source.video_ref, literal(granularity), bucket, *aggregates)
+        .where(where)
+        .group_by(source.video_ref, bucket)
+    )
+    R = VideoStatRollup
+    stmt = insert(R.__table__).from_select(
+        ["video_ref", "granularity", "bucket_start", "views_min", "views_max", "samples"], grouped
+    )
+    least = func.least if dialect == "postgresql" else func.min
+    greatest = func.greatest if dialect == "postgresql" else func.max
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[R.video_ref, R.granularity, R.bucket_start],
+        set_={
+            "views_min": least(
+                func.coalesce(R.views_min, stmt.excluded.views_min), func.coalesce(stmt.excluded.views_min, R.views_min)
+            ),
+            "views_max": greatest(
+                func.coalesce(R.views_max, stmt.excluded.views_max), func.coalesce(stmt.excluded.views_max, R.views_max)
+            ),
+            "samples": R.samples + stmt.excluded.samples,
+        },
+    )
+    await session.execute(stmt)
+    await session.execute(source.__table__.delete().where(where))
+
+
+async def compact(session: AsyncSession, now: datetime) -> None:
+    """Downsample raw samples into hourly rollups, and old hourly rollups into daily ones."""
+    settings = get_settings()
+    await _rollup(session, VideoStatSample, "hour", now - timedelta(hours=settings.stats_raw_retention_hours))
+    await _rollup(session, VideoStatRollup, "day", now - timedelta(days=settings.stats_hourly_retention_days))
+
+
+async def trending_videos(session: AsyncSession, *, hours: int, limit: int) -> Sequence[Row]:
+    """Fastest-growing videos published in the last ``hours``, by precomputed views per hour."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    stmt = (
+        select(*OUT_COLUMNS, VideoStatState.views_per_hour)
+        .join(VideoStatState, VideoStatState.video_ref == Video.id)
+        .where(Video.published_at >= since, VideoStatState.views_per_hour.is_not(None))
+        .order_by(VideoStatState.views_per_hour.desc(), Video.id.desc())
+        .limit(limit)
+    )
+    return (await session.execute(stmt)).all()
+
+
+class StatsSampler:
+    """Re-samples view counts of recent videos on a decaying schedule.
+
+    Each tick enrolls newly published videos, looks up the ones that are due
+    through the batched ``Enricher`` and stores samples plus velocity. Roughly
+    hourly it compacts old samples into rollups.
+    """
+
+    COMPACT_EVERY = timedelta(hours=1)
+
+    def __init__(self, enricher: Enricher):
+        self.enricher = enricher
+        self.samples_written = 0
+        self.last_compacted_at: datetime | None = None
+
+    async def tick(self, now: datetime | None = None) -> int:
+        settings = get_settings()
+        now = now or datetime.now(timezone.utc)
+        async with get_session() as session:
+            await seed_tracked(session, now)
+            due = await due_videos(session, now, settings.stats_batch_size)
+        written = 0
+        if due:
+            rows = [{"video_id": r.video_id} for r in due]
+            await self.enricher.enrich(rows)
+            found = {r["video_id"]: r for r in rows if "view_count" in r}
+            async with get_session() as session:
+                written = await record_samples(session, due, found, now)
+            self.samples_written += written
+        if self.last_compacted_at is None or now - self.last_compacted_at >= self.COMPACT_EVERY:
+            async with get_session() as session:
+                await compact(session, now)
+            self.last_compacted_at = now
+        return written
+
+    def stats(self) -> dict:
+        return {
+            "samples_written": self.samples_written,
+            "last_compacted_at": self.last_compacted_at.isoformat() if self.last_compacted_at else None,
+        }
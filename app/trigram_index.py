@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import re
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import get_settings
+from .models import Video
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: each lowercased word padded with two leading and one trailing space."""
+    grams: set[str] = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+def _timestamp(published_at: datetime | None) -> float:
+    if published_at is None:
+        return float("-inf")
+    if published_at.tzinfo is None:
+        published_at = published_at.replace(tzinfo=timezone.utc)
+    return published_at.timestamp()
+
+
+class TrigramIndex:
+    """In-memory inverted index from trigram to video ids, for typo-tolerant lookups.
+
+    Posting lists are ``array('I')`` of integer slots, each mapped to a video id.
+    Re-adding a video (an edited title or description) gives it a fresh slot, so
+    its old text stops matching without touching the old postings. Memory is
+    bounded by indexing at most ``max_chars`` of each description and keeping
+    the ``max_docs`` most recently published videos (by ``published_at``, then
+    id, so a backfill of old videos cannot push out new ones); dead slots are
+    dropped lazily and purged by an occasional compaction.
+    """
+
+    def __init__(self, max_docs: int, max_chars: int):
+        self.max_docs = max_docs
+        self.max_chars = max_chars
+        self.ready = False
+        self._postings: dict[str, array] = {}
+        self._live: set[int] = set()
+        self._slot_of: dict[int, int] = {}  # video id -> current slot
+        self._doc_of: dict[int, int] = {}  # live slot -> video id
+        self._next_slot = 0
+        # Min-heap of (published timestamp, video id, slot): the root is evicted first
+        self._by_age: list[tuple[float, int, int]] = []
+        self._dead = 0
+        self._build_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def add(
+        self, doc_id: int, title: str | None, description: str | None, published_at: datetime | None = None
+    ) -> None:
+        """Index a video, replacing what was indexed for it before; undated videos are evicted first."""
+        old = self._slot_of.get(doc_id)
+        if old is not None:
+            self._retire(old)
+        slot = self._next_slot
+        self._next_slot += 1
+        for gram in trigrams(f"{title or ''} {(description or '')[:self.max_chars]}"):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(slot)
+        self._live.add(slot)
+        self._slot_of[doc_id] = slot
+        self._doc_of[slot] = doc_id
+        heapq.heappush(self._by_age, (_timestamp(published_at), doc_id, slot))
+        while len(self._live) > self.max_docs:
+            oldest = heapq.heappop(self._by_age)[2]
+            if oldest in self._live:
+                self._retire(oldest)
+        if self._dead > max(1024, len(self._live)):
+            self._compact()
+
+    def _retire(self, slot: int) -> None:
+        self._live.discard(slot)
+        del self._slot_of[self._doc_of.pop(slot)]
+        self._dead += 1
+
+    def _compact(self) -> None:
+        live = self._live
+        for gram in list(self._postings):
+            kept = array("I", (i for i in self._postings[gram] if i in live))
+            if kept:
+                self._postings[gram] = kept
+            else:
+                del self._postings[gram]
+        self._by_age = [entry for entry in self._by_age if entry[2] in live]
+        heapq.heapify(self._by_age)
+        self._dead = 0
+
+    def search(self, query: str, *, min_score: float = 0.5, limit: int = 1000) -> list[tuple[int, float]]:
+        """Return ``(id, score)`` pairs, best first.
+
+        The score is the share of the query's trigrams found in the document, so a
+        misspelt short query ("crik") still scores well against "cricket".
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        hits: Counter[int] = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                hits.update(postings)
+        n = len(grams)
+        scored = [
+            (self._doc_of[slot], shared / n)
+            for slot, shared in hits.items()
+            if shared / n >= min_score and slot in self._live
+        ]
+        scored.sort(key=lambda pair: -pair[1])
+        return scored[:limit]
+
+    async def ensure_built(self, session: AsyncSession) -> None:
+        """Index every stored video once; later inserts and edits arrive through ``add``."""
+        if self.ready:
+            return
+        async with self._build_lock:
+            if self.ready:
+                return
+            stmt = select(Video.id, Video.title, Video.description, Video.published_at).order_by(Video.id)
+            result = await session.stream(stmt)
+            async for rows in result.partitions(2000):
+                for row in rows:
+                    self.add(row.id, row.title, row.description, row.published_at)
+                # Let request handlers run between partitions during warm-up
+                await asyncio.sleep(0)
+            self.ready = True
+
+
+_index: TrigramIndex | None = None
+
+
+def get_trigram_index() -> TrigramIndex:
+    global _index
+    if _index is None:
+        settings = get_settings()
+        _index = TrigramIndex(settings.trigram_index_max_docs, settings.trigram_index_max_chars)
+    return _index
@@ -1,78 +1,173 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import heapq
+import itertools
 import time
-from collections import deque
 from datetime import datetime, timezone, timedelta
-from typing import Any, Deque, Optional
+from typing import Any, AsyncIterator, NamedTuple, Optional
 
 import httpx
 
 from .config import get_settings
+from .poll_scheduler import SEARCH_COST, get_poll_scheduler
 
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+VIDEOS_LIST_MAX_IDS = 50
+VIDEOS_LIST_COST = 1
+# Longest a single call waits for a cooling key before giving up on this attempt
+MAX_KEY_WAIT_SECONDS = 30.0
+# 403 reasons meaning the key's daily allowance is spent (as opposed to a short rate limit)
+_QUOTA_REASONS = {"quotaExceeded", "dailyLimitExceeded"}
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class SearchPage(NamedTuple):
+    """One search.list response as seen by ``iter_search_pages``."""
+
+    items: list[dict[str, Any]]
+    next_page_token: Optional[str]
+    status: Optional[int]
+    error: Optional[str]
+    # Set on the last page of a walk that covered its whole window
+    complete: bool = False
+
+
+def key_fingerprint(key: str) -> str:
+    """Stable identifier for persisting key health without storing the key."""
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _quota_reason(resp: httpx.Response) -> tuple[Optional[str], Optional[str]]:
+    """(message, reason) from a YouTube error body, when it has one."""
+    try:
+        err = resp.json().get("error", {})
+        reason = (err.get("errors") or [{}])[0].get("reason")
+        return (err.get("message") or reason), reason
+    except Exception:
+        return None, None
 
 
 class APIKeyRotator:
-    def __init__(self, keys: list[str]):
-        self._queue: Deque[tuple[str, float]] = deque()
-        now = time.monotonic()
-        for k in keys:
-            self._queue.append((k, now))
-        self.cooldown_seconds = 600  # 10 minutes cooldown when exhausted
-
-    def next_key(self) -> Optional[str]:
-        if not self._queue:
+    """Pool of API keys ordered by the time each one is next usable (a min-heap).
+
+    ``pop_available`` hands out the ready key that has waited longest and
+    re-queues it behind the others, so ready keys are used round-robin;
+    ``mark_exhausted`` cools down the key that actually failed. Superseded heap
+    entries are skipped lazily, every operation is O(log n), and none of them
+    awaits, so concurrent callers on the event loop cannot interleave inside
+    one. Ready times are wall-clock so cooldowns can be persisted.
+    """
+
+    def __init__(self, keys: list[str], cooldown_seconds: float = 600):
+        self.cooldown_seconds = cooldown_seconds  # for rate limits; quota errors wait for the daily reset
+        self._heap: list[tuple[float, int, str]] = []
+        self._entry: dict[str, tuple[float, int]] = {}
+        self._seq = itertools.count()
+        self.dirty = False  # cooldowns changed since last persisted
+        now = time.time()
+        for k in dict.fromkeys(keys):
+            self._push(k, now)
+
+    def __len__(self) -> int:
+        return len(self._entry)
+
+    def keys(self) -> list[str]:
+        return list(self._entry)
+
+    def _push(self, key: str, ready_at: float) -> None:
+        seq = next(self._seq)
+        self._entry[key] = (ready_at, seq)
+        heapq.heappush(self._heap, (ready_at, seq, key))
+
+    def _peek(self) -> Optional[tuple[float, str]]:
+        while self._heap:
+            ready_at, seq, key = self._heap[0]
+            if self._entry.get(key) == (ready_at, seq):
+                return ready_at, key
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_available(self) -> Optional[str]:
+        """The next ready key, or None while every key is cooling down."""
+        top = self._peek()
+        now = time.time()
+        if top is None or top[0] > now:
             return None
-        key, last_used = self._queue[0]
-        return key
+        heapq.heappop(self._heap)
+        self._push(top[1], now)
+        return top[1]
 
-    def rotate(self) -> Optional[str]:
-        if not self._queue:
+    def seconds_until_ready(self) -> Optional[float]:
+        """How long until some key is usable; None when the pool is empty."""
+        top = self._peek()
+        if top is None:
             return None
-        k, _ = self._queue.popleft()
-        self._queue.append((k, time.monotonic()))
-        return k
+        return max(0.0, top[0] - time.time())
 
-    def mark_exhausted(self):
-        if not self._queue:
+    def mark_exhausted(self, key: str, until: Optional[float] = None) -> None:
+        """Cool ``key`` down until ``until`` (epoch seconds), by default ``cooldown_seconds``."""
+        if key not in self._entry:
             return
-        k, _ = self._queue.popleft()
-        # Put it back with a future timestamp indicating cooldown
-        self._queue.append((k, time.monotonic() + self.cooldown_seconds))
+        self._push(key, until if until is not None else time.time() + self.cooldown_seconds)
+        self.dirty = True
 
-    def pop_available(self) -> Optional[str]:
-        if not self._queue:
-            return None
-        # rotate until we find available one
-        for _ in range(len(self._queue)):
-            k, ready_at = self._queue[0]
-            if time.monotonic() >= ready_at:
-                return k
-            self._queue.rotate(-1)
-        return None
+    def cooldowns(self) -> dict[str, float]:
+        """Keys still cooling down, with the epoch time each becomes ready."""
+        now = time.time()
+        return {k: ready_at for k, (ready_at, _) in self._entry.items() if ready_at > now}
+
+    def load(self, cooldowns: dict[str, float]) -> None:
+        """Restore persisted cooldowns for keys in this pool."""
+        now = time.time()
+        for key, until in cooldowns.items():
+            if key in self._entry and until > now:
+                self._push(key, until)
+
+
+_pool: APIKeyRotator | None = None
+
+
+def get_key_pool() -> APIKeyRotator:
+    """Process-wide key pool shared by every YouTubeClient."""
+    global _pool
+    if _pool is None:
+        _pool = APIKeyRotator(get_settings().youtube_api_keys or [])
+    return _pool
 
 
 class YouTubeClient:
     def __init__(self):
         settings = get_settings()
         self.query = settings.youtube_query
-        self.key_rotator = APIKeyRotator(settings.youtube_api_keys or [])
+        self.key_rotator = get_key_pool()
+        self.api_base = settings.youtube_api_base.rstrip("/")
         self.client = httpx.AsyncClient(timeout=20)
         self.last_status_code = None
         self.last_error = None
+        # Shared per-key spend, read by the adaptive poll scheduler
+        self.quota = get_poll_scheduler().quota
     # Note: we don't store last_polled_at here; callers pass published_after or we use a safe recent default.
 
     async def close(self):
         await self.client.aclose()
 
-    async def search_latest(self, *, published_after: Optional[datetime] = None, query: Optional[str] = None, include_published_after: bool = True) -> list[dict[str, Any]]:
-        """Fetch latest videos since published_after using key rotation and backoff.
-        Returns raw items list from YouTube API.
-        """
-        # If no keys configured, skip external call gracefully
-        if not self.key_rotator._queue:
-            return []
+    def _search_params(
+        self,
+        *,
+        published_after: Optional[datetime],
+        query: Optional[str],
+        include_published_after: bool,
+        published_before: Optional[datetime] = None,
+    ) -> dict[str, Any]:
         params = {
             "part": "snippet",
             "type": "video",
@@ -85,36 +180,54 @@ class YouTubeClient:
                 # Default to a small recent window to avoid 'cached old' or empty results on first call
                 published_after = datetime.now(timezone.utc) - timedelta(days=2)
             params["publishedAfter"] = published_after.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+        if published_before is not None:
+            params["publishedBefore"] = published_before.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+        return params
+
+    async def _get_search_page(self, params: dict[str, Any]) -> Optional[dict[str, Any]]:
+        """One search.list call with key rotation and backoff."""
+        return await self._get_json(f"{self.api_base}/search", params, cost=SEARCH_COST)
+
+    async def _get_json(
+        self, url: str, params: dict[str, Any], *, cost: int, attempts: int = 5
+    ) -> Optional[dict[str, Any]]:
+        """One Data API call with key rotation and backoff, charged ``cost`` quota units.
 
+        Returns the decoded response body, or None when every attempt failed.
+        """
+        params = dict(params)
         backoff = 1.0
-        for attempt in range(5):
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 == attempts
             key = self.key_rotator.pop_available()
             if not key:
-                await asyncio.sleep(backoff)
-                backoff = min(backoff * 2, 30)
+                # Sleep exactly until the soonest cooldown ends, unless that is far off
+                wait = self.key_rotator.seconds_until_ready()
+                if wait is None or wait > MAX_KEY_WAIT_SECONDS:
+                    self.last_error = "All API keys are cooling down"
+                    return None
+                await asyncio.sleep(wait)
                 continue
             params["key"] = key
             try:
-                resp = await self.client.get(YOUTUBE_SEARCH_URL, params=params)
+                resp = await self.client.get(url, params=params)
                 self.last_status_code = resp.status_code
                 self.last_error = None
                 if resp.status_code in (403, 429):
                     # Capture error body if present
-                    try:
-                        err = resp.json().get("error", {})
-                        msg = err.get("message") or (err.get("errors", [{}])[0].get("reason"))
-                        if msg:
-                            self.last_error = str(msg)
-                    except Exception:
-                        pass
-                    self.key_rotator.mark_exhausted()
-                    await asyncio.sleep(backoff)
-                    backoff = min(backoff * 2, 30)
+                    msg, reason = _quota_reason(resp)
+                    if msg:
+                        self.last_error = str(msg)
+                    if reason in _QUOTA_REASONS:
+                        # Daily allowance spent: rest the key until the quota day rolls over
+                        self.quota.mark_exhausted(key)
+                        self.key_rotator.mark_exhausted(key, until=self.quota.reset_at().timestamp())
+                    else:
+                        self.key_rotator.mark_exhausted(key)
                     continue
+                self.quota.record(key, cost)
                 resp.raise_for_status()
-                data = resp.json()
-                items = data.get("items", [])
-                return items
+                return resp.json()
             except httpx.HTTPStatusError as e:
                 try:
                     self.last_status_code = e.response.status_code
@@ -128,16 +241,98 @@ class YouTubeClient:
                 except Exception:
                     self.last_error = "HTTP error"
                 if 500 <= e.response.status_code < 600:
-                    await asyncio.sleep(backoff)
-                    backoff = min(backoff * 2, 30)
+                    if not last_attempt:
+                        await asyncio.sleep(backoff)
+                        backoff = min(backoff * 2, 30)
                     continue
                 raise
             except httpx.RequestError as e:
                 self.last_error = f"Request error: {type(e).__name__}"
-                await asyncio.sleep(backoff)
-                backoff = min(backoff * 2, 30)
+                if not last_attempt:
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
                 continue
-        return []
+        return None
+
+    async def list_videos(self, video_ids: list[str], *, attempts: int = 5) -> Optional[dict[str, dict[str, Any]]]:
+        """videos.list for up to 50 ids (1 quota unit per call), keyed by video id.
+
+        Returns None when the call failed; ids absent from a successful response
+        (deleted or private videos) are simply missing from the result.
+        """
+        if not video_ids or not len(self.key_rotator):
+            return {}
+        params = {
+            "part": "contentDetails,statistics,snippet",
+            "id": ",".join(video_ids[:VIDEOS_LIST_MAX_IDS]),
+            "maxResults": VIDEOS_LIST_MAX_IDS,
+        }
+        data = await self._get_json(f"{self.api_base}/videos", params, cost=VIDEOS_LIST_COST, attempts=attempts)
+        if data is None:
+            return None
+        return {it["id"]: it for it in data.get("items", []) if it.get("id")}
+
+    async def search_latest(self, *, published_after: Optional[datetime] = None, query: Optional[str] = None, include_published_after: bool = True) -> list[dict[str, Any]]:
+        """Fetch latest videos since published_after using key rotation and backoff.
+        Returns raw items list from YouTube API (first page only; see iter_search_pages).
+        """
+        # If no keys configured, skip external call gracefully
+        if not len(self.key_rotator):
+            return []
+        params = self._search_params(
+            published_after=published_after, query=query, include_published_after=include_published_after
+        )
+        data = await self._get_search_page(params)
+        return data.get("items", []) if data else []
+
+    async def iter_search_pages(
+        self,
+        *,
+        published_after: Optional[datetime] = None,
+        query: Optional[str] = None,
+        max_pages: Optional[int] = None,
+        published_before: Optional[datetime] = None,
+        page_token: Optional[str] = None,
+    ) -> AsyncIterator[SearchPage]:
+        """Yield pages of raw items newest-first, following nextPageToken.
+
+        Stops when YouTube has no further page, when a page reaches back to the
+        ``published_after`` watermark, or after ``max_pages`` calls (each costs
+        100 quota units; defaults to ``YOUTUBE_MAX_PAGES``). ``published_before``
+        caps the window from above, for backfills of older history. Pages are yielded as
+        they arrive so callers can start writing before the walk finishes; a call
+        that fails for good yields a final empty page carrying its status and error.
+        Only a walk that reached the end of its window marks its last page
+        ``complete``; one cut short can be resumed by passing the last page's
+        ``next_page_token`` as ``page_token`` with the same window.
+        """
+        if not len(self.key_rotator):
+            return
+        if max_pages is None:
+            max_pages = get_settings().youtube_max_pages
+        params = self._search_params(
+            published_after=published_after,
+            query=query,
+            include_published_after=True,
+            published_before=published_before,
+        )
+        watermark = _parse_ts(params["publishedAfter"])
+        if page_token:
+            params["pageToken"] = page_token
+        for _ in range(max_pages):
+            data = await self._get_search_page(params)
+            if not data:
+                yield SearchPage([], None, self.last_status_code, self.last_error)
+                return
+            items = data.get("items", [])
+            token = data.get("nextPageToken")
+            stamps = [_parse_ts(it.get("snippet", {}).get("publishedAt")) for it in items]
+            oldest = min((ts for ts in stamps if ts is not None), default=None)
+            complete = not token or not items or (oldest is not None and oldest <= watermark)
+            yield SearchPage(items, token, self.last_status_code, self.last_error, complete)
+            if complete:
+                return
+            params["pageToken"] = token
 
     @staticmethod
     def transform_items(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -54,3 +54,296 @@ async def test_list_endpoint_returns_paginated_items():
         data = r.json()
         assert "items" in data and data["per_page"] == 1
         assert data["items"][0]["video_id"] == "seed-2"
+
+
+@pytest.mark.asyncio
+async def test_list_cursor_walk_visits_each_video_once():
+    now = datetime.now(timezone.utc)
+    async with get_session() as s:
+        await upsert_videos(
+            s,
+            [
+                {
+                    "video_id": f"cur-{n}",
+                    "title": f"Cursor video {n}",
+                    "description": "",
+                    # two rows share a timestamp so the id tie-break is exercised
+                    "published_at": now - timedelta(hours=min(n, 3)),
+                    "thumbnails": {},
+                    "channel_id": "cCur",
+                    "channel_title": "CursorChannel",
+                    "raw_json": {},
+                }
+                for n in range(1, 6)
+            ],
+        )
+
+    seen = []
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        params = {"per_page": 2, "channel": "CursorChannel", "cursor": ""}
+        while True:
+            r = await ac.get("/api/videos", params=params)
+            assert r.status_code == 200
+            data = r.json()
+            seen.extend(i["video_id"] for i in data["items"])
+            if not data["next_cursor"]:
+                break
+            params["cursor"] = data["next_cursor"]
+
+        assert sorted(seen) == [f"cur-{n}" for n in range(1, 6)]
+        assert seen[0] == "cur-1"
+
+        r = await ac.get("/api/videos", params={"cursor": "not-a-cursor"})
+        assert r.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_count_modes():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos", params={"per_page": 1, "count_mode": "none"})
+        assert r.status_code == 200
+        data = r.json()
+        assert data["total"] is None
+        assert data["next_page"] == 2
+
+        r = await ac.get("/api/videos", params={"channel": "Coach", "count_mode": "estimate"})
+        data = r.json()
+        assert data["total"] == 1
+        assert data["total_approximate"] is False
+
+        r = await ac.get("/api/videos", params={"count_mode": "bogus"})
+        assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_detail_returns_raw_json_but_list_does_not():
+    async with get_session() as s:
+        await upsert_videos(
+            s,
+            [
+                {
+                    "video_id": "detail-1",
+                    "title": "Detail video",
+                    "description": "",
+                    "published_at": datetime.now(timezone.utc),
+                    "thumbnails": {},
+                    "channel_id": "cD",
+                    "channel_title": "DetailChannel",
+                    "raw_json": {"etag": "abc"},
+                    "duration_seconds": 95,
+                    "view_count": 1200,
+                    "like_count": 40,
+                    "tags": ["detail"],
+                }
+            ],
+        )
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos", params={"channel": "DetailChannel"})
+        assert "raw_json" not in r.json()["items"][0]
+
+        r = await ac.get("/api/videos/detail-1")
+        assert r.status_code == 200
+        assert r.json()["raw_json"] == {"etag": "abc"}
+        # Enrichment fields are served on the detail endpoint too
+        assert (r.json()["duration_seconds"], r.json()["view_count"], r.json()["tags"]) == (95, 1200, ["detail"])
+
+        r = await ac.get("/api/videos/missing")
+        assert r.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_search_matches_title_words():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos/search", params={"q": "Detail video"})
+        assert r.status_code == 200
+        data = r.json()
+        assert [i["video_id"] for i in data["items"]] == ["detail-1"]
+        assert data["search_tier"] == "fts"
+        assert "raw_json" not in data["items"][0]
+
+
+@pytest.mark.asyncio
+async def test_search_fts_prefix_and_title_weighting():
+    now = datetime.now(timezone.utc)
+    async with get_session() as s:
+        await upsert_videos(
+            s,
+            [
+                {
+                    "video_id": "fts-desc",
+                    "title": "Evening show",
+                    "description": "Wicketkeeping drills",
+                    "published_at": now,
+                    "thumbnails": {},
+                    "channel_id": "cF",
+                    "channel_title": "FtsChannel",
+                    "raw_json": {},
+                },
+                {
+                    "video_id": "fts-title",
+                    "title": "Wicketkeeping masterclass",
+                    "description": "Evening show",
+                    "published_at": now - timedelta(days=3),
+                    "thumbnails": {},
+                    "channel_id": "cF",
+                    "channel_title": "FtsChannel",
+                    "raw_json": {},
+                },
+            ],
+        )
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos/search", params={"q": "wicketkeep"})
+        data = r.json()
+        assert data["search_tier"] == "fts"
+        assert data["total"] == 2
+        # Older title hit outranks the newer description-only hit
+        assert [i["video_id"] for i in data["items"]] == ["fts-title", "fts-desc"]
+
+
+@pytest.mark.asyncio
+async def test_search_typo_falls_back_to_trigram_index():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos/search", params={"q": "wiketkeeping"})
+        data = r.json()
+        assert data["search_tier"] == "fuzzy"
+        assert {"fts-title", "fts-desc"} <= {i["video_id"] for i in data["items"]}
+
+
+@pytest.mark.asyncio
+async def test_search_cache_hits_until_new_rows_arrive():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        params = {"q": "masterclass"}
+        assert (await ac.get("/api/videos/search", params=params)).headers["X-Cache"] == "MISS"
+        assert (await ac.get("/api/videos/search", params=params)).headers["X-Cache"] == "HIT"
+
+        async with get_session() as s:
+            await upsert_videos(
+                s,
+                [
+                    {
+                        "video_id": "cache-1",
+                        "title": "Batting masterclass",
+                        "description": "",
+                        "published_at": datetime.now(timezone.utc),
+                        "thumbnails": {},
+                        "channel_id": "cC",
+                        "channel_title": "CacheChannel",
+                        "raw_json": {},
+                    }
+                ],
+            )
+        r = await ac.get("/api/videos/search", params=params)
+        assert r.headers["X-Cache"] == "MISS"
+        assert "cache-1" in {i["video_id"] for i in r.json()["items"]}
+        assert (await ac.get("/api/videos/_search_cache")).json()["hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_list_filters_by_poll_query_membership():
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "video_id": f"topic-{n}",
+            "title": f"Topic video {n}",
+            "description": "",
+            "published_at": now - timedelta(minutes=n),
+            "thumbnails": {},
+            "channel_id": "cT",
+            "channel_title": "TopicChannel",
+            "raw_json": {},
+        }
+        for n in range(3)
+    ]
+    async with get_session() as s:
+        await upsert_videos(s, rows[:2], query="kabaddi")
+        # Re-seen by a second query: linked again without a duplicate insert
+        assert (await upsert_videos(s, rows[1:], query="pro kabaddi")).inserted == 1
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos", params={"query": "kabaddi"})
+        data = r.json()
+        assert data["total"] == 2
+        assert [i["video_id"] for i in data["items"]] == ["topic-0", "topic-1"]
+
+        r = await ac.get("/api/videos", params={"query": "pro kabaddi", "cursor": "", "per_page": 1})
+        data = r.json()
+        assert [i["video_id"] for i in data["items"]] == ["topic-1"]
+        r = await ac.get("/api/videos", params={"query": "pro kabaddi", "cursor": data["next_cursor"], "per_page": 1})
+        assert [i["video_id"] for i in r.json()["items"]] == ["topic-2"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_now_issues_one_request_from_poll_state(monkeypatch):
+    from app.config import get_settings
+    from app.crud import PollOutcome, get_poll_state, save_poll_state
+    from app.youtube_client import YouTubeClient
+
+    watermark = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    async with get_session() as s:
+        await save_poll_state(s, {"fetch-now-topic": PollOutcome(watermark)})
+
+    calls = []
+
+    async def fake_search_latest(self, *, published_after=None, query=None, include_published_after=True):
+        calls.append((published_after, query))
+        self.last_status_code = 200
+        return [
+            {
+                "id": {"kind": "youtube#video", "videoId": "fetch-now-1"},
+                "snippet": {"title": "Fresh", "publishedAt": "2026-03-02T00:00:00Z"},
+            }
+        ]
+
+    monkeypatch.setattr(get_settings(), "youtube_api_keys", ["K"])
+    monkeypatch.setattr(YouTubeClient, "search_latest", fake_search_latest)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/videos/_fetch_now", params={"q": "fetch-now-topic"})
+    assert r.status_code == 200
+    assert r.json()["inserted"] == 1
+    assert calls == [(watermark, "fetch-now-topic")]
+
+    async with get_session() as s:
+        state = await get_poll_state(s, "fetch-now-topic")
+    assert state.last_status == 200
+    # One page need not reach the watermark, so only the poller's complete walks move it
+    assert state.published_after.replace(tzinfo=timezone.utc) == watermark
+
+
+@pytest.mark.asyncio
+async def test_read_session_never_commits_and_pool_reports_checkouts():
+    from sqlalchemy import select, update
+
+    from app.db import get_read_session
+    from app.models import Video
+
+    async with get_session() as s:
+        await upsert_videos(
+            s,
+            [
+                {
+                    "video_id": "read-1",
+                    "title": "Read replica",
+                    "description": "",
+                    "published_at": datetime.now(timezone.utc),
+                    "thumbnails": {},
+                    "channel_id": "cR",
+                    "channel_title": "Reads",
+                    "raw_json": {},
+                }
+            ],
+        )
+    async with get_read_session() as s:
+        await s.execute(update(Video).where(Video.video_id == "read-1").values(title="Changed"))
+    async with get_read_session() as s:
+        title = await s.scalar(select(Video.title).where(Video.video_id == "read-1"))
+    assert title == "Read replica"
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/db/pool")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["read_replica"] is False
+    assert data["read"]["checkout_wait"]["count"] >= 2
+    assert data["primary"]["checkout_wait"]["count"] >= 1
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.backfill import Backfill, Window, plan_windows
+from app.crud import get_backfill_windows
+from app.db import get_session
+from app.models import Video, VideoQuery
+from app.youtube_client import SearchPage
+
+DAY = timedelta(days=1)
+T0 = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+def test_plan_windows_skips_completed_ranges():
+    done = [(T0 + 2 * DAY, T0 + 3 * DAY), (T0 + 5 * DAY, T0 + 9 * DAY)]
+    windows = plan_windows(T0, T0 + 7 * DAY, 2 * DAY, done)
+    assert windows == [
+        Window(T0 + 3 * DAY, T0 + 5 * DAY),
+        Window(T0, T0 + 2 * DAY),
+    ]
+    assert plan_windows(T0, T0 + 3 * DAY, 2 * DAY, []) == [Window(T0 + DAY, T0 + 3 * DAY), Window(T0, T0 + DAY)]
+
+
+class _FakeClient:
+    """search.list over a fixed set of videos, two per page; one day always fails."""
+
+    def __init__(self, published: dict[str, datetime], failing_day: datetime):
+        self.published = published
+        self.failing_day = failing_day
+        self.calls: list[tuple[datetime, datetime]] = []
+
+    async def iter_search_pages(self, *, published_after, published_before, query, max_pages):
+        self.calls.append((published_after, published_before))
+        if published_after <= self.failing_day < published_before:
+            yield SearchPage([], None, 403, "quotaExceeded")
+            return
+        matching = sorted(
+            (vid for vid, ts in self.published.items() if published_after <= ts <= published_before),
+            key=lambda vid: self.published[vid],
+            reverse=True,
+        )
+        for n in range(max_pages):
+            chunk = matching[n * 2:(n + 1) * 2]
+            token = "more" if len(matching) > (n + 1) * 2 else None
+            items = [
+                {
+                    "id": {"kind": "youtube#video", "videoId": vid},
+                    "snippet": {"title": vid, "publishedAt": self.published[vid].isoformat().replace("+00:00", "Z")},
+                }
+                for vid in chunk
+            ]
+            yield SearchPage(items, token, 200, None)
+            if not token:
+                return
+
+
+@pytest.mark.asyncio
+async def test_backfill_checkpoints_continues_truncated_windows_and_resumes():
+    # Five videos on day 0 (more than one window's page budget), one on day 1, day 2 fails
+    published = {f"bf-a{n}": T0 + timedelta(hours=n + 1) for n in range(5)}
+    published["bf-b0"] = T0 + DAY + timedelta(hours=6)
+    client = _FakeClient(published, failing_day=T0 + 2 * DAY + timedelta(hours=12))
+
+    backfill = Backfill("backfill-topic", client, concurrency=2, batch_size=100, max_pages=1)
+    report = await backfill.run(T0, T0 + 3 * DAY, DAY)
+
+    assert report["inserted"] == 6
+    assert report["windows_failed"] == 1
+    async with get_session() as s:
+        ids = (await s.execute(select(Video.video_id).where(Video.video_id.like("bf-%")))).scalars().all()
+        linked = (await s.execute(select(VideoQuery.video_id).where(VideoQuery.query == "backfill-topic"))).scalars().all()
+        done = await get_backfill_windows(s, "backfill-topic")
+    assert sorted(ids) == sorted(linked) == sorted(published)
+    # Day 0 was walked in three pieces, each checkpointed; the failed day was not
+    assert min(start for start, _ in done) == T0
+    assert all(end <= T0 + 2 * DAY for _, end in done)
+
+    client.calls.clear()
+    rerun = Backfill("backfill-topic", client, concurrency=2, batch_size=100, max_pages=1)
+    report = await rerun.run(T0, T0 + 3 * DAY, DAY)
+    assert client.calls == [(T0 + 2 * DAY, T0 + 3 * DAY)]
+    assert report["windows_planned"] == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from app.coordination import LeaderCoordinator, ShardCoordinator, _FileLock
+
+QUERIES = [f"topic-{n}" for n in range(12)]
+
+
+@pytest.mark.asyncio
+async def test_shards_partition_queries_and_rebalance_when_a_replica_leaves():
+    a = ShardCoordinator("replica-a", lease_seconds=30)
+    b = ShardCoordinator("replica-b", lease_seconds=30)
+    await a.owned(QUERIES)
+    owned_b = await b.owned(QUERIES)
+    owned_a = await a.owned(QUERIES)
+
+    assert sorted(owned_a + owned_b) == sorted(QUERIES)
+    assert owned_a and owned_b
+
+    await b.release()
+    assert await a.owned(QUERIES) == QUERIES
+    await a.release()
+
+
+@pytest.mark.asyncio
+async def test_file_lock_admits_one_leader(tmp_path):
+    path = str(tmp_path / "poller.lock")
+    first = LeaderCoordinator("replica-a", 30, _FileLock(path))
+    second = LeaderCoordinator("replica-b", 30, _FileLock(path))
+
+    assert await first.owned(QUERIES) == QUERIES
+    assert await second.owned(QUERIES) == []
+
+    # The standby takes over once the leader lets go (or its process dies)
+    await first.release()
+    assert await second.owned(QUERIES) == QUERIES
+    await second.release()
@@ -31,9 +31,125 @@ async def test_upsert_idempotent_and_sorted_listing():
     async with get_session() as s:
         c1 = await upsert_videos(s, [v1, v2])
         c2 = await upsert_videos(s, [v1, v2])
-        assert c1 >= 1
-        assert c2 == 0  # second insert should be idempotent (no duplicates)
+        assert c1.inserted == 2
+        assert c2 == (0, 0, 2)  # second insert should be idempotent (no duplicates)
         total, items = await list_videos(s, page=1, per_page=10)
         assert total >= 2
         # sorted desc by published_at
         assert items[0].video_id == "vid-2"
+
+
+@pytest.mark.asyncio
+async def test_upsert_rewrites_only_changed_videos():
+    from app.hot_feed import get_hot_feed
+    from app.models import Video
+    from sqlalchemy import select
+
+    base = {
+        "description": "d",
+        "published_at": datetime(2030, 1, 1, tzinfo=timezone.utc),
+        "thumbnails": {},
+        "channel_id": "cE",
+        "channel_title": "Edits",
+        "raw_json": {},
+    }
+    a = {**base, "video_id": "edit-a", "title": "Original"}
+    b = {**base, "video_id": "edit-b", "title": "Stable"}
+    async with get_session() as s:
+        await upsert_videos(s, [a, b])
+        await get_hot_feed().warm(s)
+
+    async with get_session() as s:
+        counts = await upsert_videos(s, [{**a, "title": "Retitled"}, b, {**base, "video_id": "edit-c", "title": "New"}])
+    assert counts == (1, 1, 1)
+
+    async with get_session() as s:
+        row = (await s.execute(select(Video.title, Video.content_revision).where(Video.video_id == "edit-a"))).one()
+    assert tuple(row) == ("Retitled", 2)
+    feed_titles = {item.video_id: item.title for item in get_hot_feed().page(1, 50) or []}
+    assert feed_titles["edit-a"] == "Retitled"
+
+
+@pytest.mark.asyncio
+async def test_rewritten_published_at_reaches_every_query_link():
+    from app.models import VideoQuery
+    from sqlalchemy import select
+
+    v = {
+        "video_id": "relink-1",
+        "title": "Moved",
+        "description": "",
+        "published_at": datetime(2030, 2, 1, tzinfo=timezone.utc),
+        "thumbnails": {},
+        "channel_id": "cL",
+        "channel_title": "Links",
+        "raw_json": {},
+    }
+    moved = datetime(2030, 2, 3, tzinfo=timezone.utc)
+    async with get_session() as s:
+        await upsert_videos(s, [v], query="relink-a")
+        await upsert_videos(s, [v], query="relink-b")
+    async with get_session() as s:
+        await upsert_videos(s, [{**v, "published_at": moved}], query="relink-a")
+    async with get_session() as s:
+        stamps = (
+            await s.execute(select(VideoQuery.published_at).where(VideoQuery.video_id == "relink-1"))
+        ).scalars().all()
+    assert [ts.replace(tzinfo=timezone.utc) for ts in stamps] == [moved, moved]
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_inserts_are_neither_counted_nor_indexed():
+    from app import counts
+    from app.trigram_index import get_trigram_index
+
+    counts._unfiltered.set(1000)
+    index = get_trigram_index()
+    row = {
+        "video_id": "rollback-1",
+        "title": "Zyxwvut rollback",
+        "description": "",
+        "published_at": datetime(2030, 3, 1, tzinfo=timezone.utc),
+        "thumbnails": {},
+        "channel_id": "cB",
+        "channel_title": "Rollbacks",
+        "raw_json": {},
+    }
+    with pytest.raises(RuntimeError):
+        async with get_session() as s:
+            await upsert_videos(s, [row])
+            raise RuntimeError("commit never happens")
+    assert counts._unfiltered.value == 1000
+    assert index.search("zyxwvut") == []
+
+    async with get_session() as s:
+        await upsert_videos(s, [row])
+    assert counts._unfiltered.value == 1001
+    assert len(index.search("zyxwvut")) == 1
+    counts._unfiltered.value = None
+
+
+@pytest.mark.asyncio
+async def test_edited_title_replaces_its_trigram_postings():
+    from app.trigram_index import get_trigram_index
+
+    v = {
+        "video_id": "retitle-1",
+        "title": "Quokkaphoto original",
+        "description": "",
+        "published_at": datetime(2030, 4, 1, tzinfo=timezone.utc),
+        "thumbnails": {},
+        "channel_id": "cT",
+        "channel_title": "Titles",
+        "raw_json": {},
+    }
+    index = get_trigram_index()
+    async with get_session() as s:
+        await upsert_videos(s, [v])
+    assert len(index.search("quokkaphoto")) == 1
+
+    async with get_session() as s:
+        await upsert_videos(s, [{**v, "title": "Wombatography renamed"}])
+    # A typo of the new word matches; the old word no longer does
+    assert len(index.search("wombatografy")) == 1
+    assert index.search("quokkaphoto") == []
@@ -0,0 +1,89 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.enrichment import Enricher, parse_duration
+from app.youtube_client import APIKeyRotator, YouTubeClient
+
+
+def test_parse_duration():
+    assert parse_duration("PT1H2M3S") == 3723
+    assert parse_duration("PT45S") == 45
+    assert parse_duration("P1DT1M") == 86460
+    assert parse_duration("P0D") == 0
+    assert parse_duration("") is None
+    assert parse_duration("bogus") is None
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Minimal videos.list: fails the first batch holding ``flaky`` ids, omits ``gone``."""
+
+    requests: list[list[str]] = []
+    failed_once = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        ids = parse_qs(url.query)["id"][0].split(",")
+        type(self).requests.append(ids)
+        if "flaky-0" in ids and not type(self).failed_once:
+            type(self).failed_once = True
+            self._reply(503, {"error": {"message": "backendError"}})
+            return
+        items = [
+            {
+                "id": vid,
+                "contentDetails": {"duration": "PT1M5S"},
+                "statistics": {"viewCount": "1000", "likeCount": "7"},
+                "snippet": {"tags": ["stand-in"]},
+            }
+            for vid in ids
+            if vid != "gone"
+        ]
+        self._reply(200, {"items": items})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    _StandIn.requests, _StandIn.failed_once = [], False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_enricher_batches_ids_and_retries_only_failed_ones(stand_in):
+    client = YouTubeClient()
+    client.key_rotator = APIKeyRotator(["K"])
+    client.api_base = stand_in
+    ids = [f"ok-{n}" for n in range(50)] + [f"flaky-{n}" for n in range(50)] + ["gone"]
+    rows = [{"video_id": vid} for vid in ids]
+    try:
+        enriched = await Enricher(client, concurrency=4, max_rounds=3, retry_delay=0).enrich(rows)
+    finally:
+        await client.close()
+
+    assert enriched == 100
+    assert sorted(len(r) for r in _StandIn.requests) == [1, 50, 50, 50]
+    # Only the batch that failed was fetched a second time
+    assert [r for r in _StandIn.requests if r[0] == "flaky-0"] == [ids[50:100]] * 2
+    by_id = {r["video_id"]: r for r in rows}
+    assert by_id["flaky-3"]["duration_seconds"] == 65
+    assert (by_id["ok-0"]["view_count"], by_id["ok-0"]["like_count"], by_id["ok-0"]["tags"]) == (1000, 7, ["stand-in"])
+    assert "duration_seconds" not in by_id["gone"]
@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.hot_feed import HotFeed
+
+
+def _row(row_id, hours_ago):
+    return SimpleNamespace(
+        id=row_id,
+        video_id=f"hf-{row_id}",
+        title=None,
+        description=None,
+        published_at=datetime(2026, 1, 1, tzinfo=timezone.utc) - timedelta(hours=hours_ago),
+        thumbnails=None,
+        channel_id=None,
+        channel_title=None,
+        duration_seconds=None,
+        view_count=None,
+        like_count=None,
+        tags=None,
+    )
+
+
+def test_push_keeps_newest_first_and_trims_to_size():
+    feed = HotFeed(size=3, refresh_seconds=60)
+    feed._loaded_at = time.monotonic()  # as if warmed from an empty table
+    feed._complete = True
+
+    feed.push([_row(1, 5), _row(2, 1)])
+    feed.push([_row(3, 3), _row(2, 1), _row(4, 0)])
+
+    assert [i.video_id for i in feed.page(1, 3)] == ["hf-4", "hf-2", "hf-3"]
+    # Trimming means older rows may exist only in the database
+    assert feed.page(2, 2) is None
+
+
+def test_concurrent_warms_query_the_database_once():
+    import asyncio
+
+    class Session:
+        queries = 0
+
+        async def execute(self, stmt):
+            Session.queries += 1
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(all=lambda: [_row(1, 1)])
+
+    async def scenario():
+        feed = HotFeed(size=3, refresh_seconds=60)
+        await asyncio.gather(*(feed.warm(Session()) for _ in range(5)))
+        return feed
+
+    feed = asyncio.run(scenario())
+    assert Session.queries == 1
+    assert [i.video_id for i in feed.page(1, 3)] == ["hf-1"]
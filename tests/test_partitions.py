@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.db import get_session
+from app.partitions import (
+    add_months,
+    expired_partitions,
+    maintain_partitions,
+    month_start,
+    months_between,
+    partition_name,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_arithmetic_and_names():
+    assert month_start(_utc(2026, 3, 31, 23, 59)) == _utc(2026, 3, 1)
+    assert add_months(_utc(2026, 11, 1), 3) == _utc(2027, 2, 1)
+    assert add_months(_utc(2026, 1, 1), -1) == _utc(2025, 12, 1)
+    assert [partition_name(m) for m in months_between(_utc(2025, 12, 15), _utc(2026, 2, 1))] == [
+        "videos_p202512",
+        "videos_p202601",
+        "videos_p202602",
+    ]
+
+
+def test_expired_partitions_only_whole_months_before_cutoff():
+    names = ["videos_p202603", "videos_default", "videos_p202512", "videos_p202601", "videos_p202602"]
+    assert expired_partitions(names, _utc(2026, 2, 1)) == ["videos_p202512", "videos_p202601"]
+
+
+@pytest.mark.asyncio
+async def test_maintenance_is_a_noop_without_partitioning():
+    async with get_session() as s:
+        assert await maintain_partitions(s) == {"partitioned": False, "created": [], "retired": []}
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+from app.poll_scheduler import _QUOTA_TZ, PollScheduler, QuotaLedger
+
+
+def test_busy_queries_poll_faster_than_quiet_ones():
+    s = PollScheduler(min_interval=10, max_interval=900, daily_limit=10000)
+    queries, keys = ["busy", "quiet"], ["k1"]
+    for _ in range(5):
+        s.observe("busy", new_items=40, pages=1)
+        s.observe("quiet", new_items=0, pages=1)
+
+    busy, quiet = s.interval("busy", queries, keys), s.interval("quiet", queries, keys)
+    assert 10 <= busy < quiet <= 900
+
+    # Spending most of the day's allowance stretches every interval
+    s.quota.record("k1", 9000)
+    assert s.interval("busy", queries, keys) > busy
+    s.quota.mark_exhausted("k1")
+    assert s.interval("busy", queries, keys) == 900
+
+
+def test_plenty_of_quota_clamps_to_min_interval():
+    s = PollScheduler(min_interval=10, max_interval=900, daily_limit=10_000_000)
+    s.observe("q", new_items=5, pages=2)
+    assert s.interval("q", ["q"], ["k1", "k2"]) == 10
+    # No keys configured: the poller has nothing to spend, keep the floor
+    assert s.interval("q", ["q"], []) == 10
+
+
+def test_ledger_resets_at_quota_day_boundary():
+    ledger = QuotaLedger(daily_limit=10000)
+    ledger.record("k1", 300)
+    assert ledger.remaining(["k1", "k2"]) == 19700
+
+    tomorrow = datetime.now(_QUOTA_TZ) + timedelta(days=1)
+    assert ledger.seconds_until_reset(tomorrow) > 0
+    assert ledger.spent("k1") == 0
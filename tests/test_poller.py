@@ -0,0 +1,252 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.crud import PollOutcome, get_poll_state, get_watermarks
+from app.db import get_session
+from app.models import Video
+from app.poller import BackgroundPoller, FetchedPage, _parse_items
+
+WATERMARK = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _page(*video_ids):
+    return _parse_items(
+        [
+            {
+                "id": {"kind": "youtube#video", "videoId": v},
+                "snippet": {"title": f"Poller {v}", "description": "", "publishedAt": "2026-01-01T00:00:00Z"},
+            }
+            for v in video_ids
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_pipeline_coalesces_pages_into_one_write(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ingest_flush_seconds", 0.05)
+    poller = BackgroundPoller()
+    poller._running = True
+    writer = asyncio.create_task(poller._write_loop())
+    try:
+        await poller._queue.put(FetchedPage("q", _page("pipe-1", "pipe-2")))
+        await poller._queue.put(FetchedPage("q", _page("pipe-2", "pipe-3")))
+        await poller._queue.put(FetchedPage("q", [], outcome=PollOutcome(WATERMARK, "tok", 200, None)))
+        # A later failed walk records its error but cannot move the watermark back
+        await poller._queue.put(FetchedPage("q", [], outcome=PollOutcome(None, None, 403, "quotaExceeded")))
+        for _ in range(50):
+            if poller.write_timer.count:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        poller._running = False
+        writer.cancel()
+        await poller._client.close()
+
+    stats = poller.stats()
+    assert stats["write"]["count"] == 1
+    assert stats["rows_inserted"] == 3
+    async with get_session() as s:
+        ids = (await s.execute(select(Video.video_id).where(Video.video_id.like("pipe-%")))).scalars().all()
+        marks = await get_watermarks(s)
+        state = await get_poll_state(s, "q")
+    assert sorted(ids) == ["pipe-1", "pipe-2", "pipe-3"]
+    # The watermark is committed with the rows queued ahead of it
+    assert marks["q"] == WATERMARK
+    assert (state.last_status, state.last_error, state.page_token) == (403, "quotaExceeded", None)
+
+
+@pytest.mark.asyncio
+async def test_key_health_survives_restart():
+    from app.youtube_client import APIKeyRotator
+
+    poller = BackgroundPoller()
+    poller._client.key_rotator = APIKeyRotator(["persist-key-1", "persist-key-2"])
+    poller._client.key_rotator.mark_exhausted("persist-key-1")
+    poller.scheduler.quota.record("persist-key-2", 300)
+    await poller._save_key_health()
+    await poller._client.close()
+
+    restarted = BackgroundPoller()
+    restarted._client.key_rotator = APIKeyRotator(["persist-key-1", "persist-key-2"])
+    restarted.scheduler.quota._spent.clear()
+    await restarted._load_key_health()
+    await restarted._client.close()
+
+    assert set(restarted._client.key_rotator.cooldowns()) == {"persist-key-1"}
+    assert restarted.scheduler.quota.spent("persist-key-2") == 300
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetch_now_calls_share_one_request(monkeypatch):
+    calls = []
+
+    async def slow_search_latest(*, published_after=None, query=None, include_published_after=True):
+        calls.append(query)
+        await asyncio.sleep(0.05)
+        return []
+
+    poller = BackgroundPoller()
+    monkeypatch.setattr(poller._client, "search_latest", slow_search_latest)
+    try:
+        results = await asyncio.gather(*(poller.fetch_now("single-flight") for _ in range(5)))
+        # Inside the result window a finished fetch is reused as well
+        again = await poller.fetch_now("single-flight")
+    finally:
+        await poller._client.close()
+
+    assert calls == ["single-flight"]
+    assert sorted(r["coalesced"] for r in results) == [False, True, True, True, True]
+    assert again["coalesced"] and poller.stats()["fetch_now_coalesced"] == 5
+
+
+@pytest.mark.asyncio
+async def test_walk_cut_short_by_page_cap_resumes_before_moving_watermark(monkeypatch):
+    import httpx
+
+    from app.youtube_client import APIKeyRotator
+
+    monkeypatch.setattr(get_settings(), "youtube_max_pages", 2)
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.url.params.get("pageToken")
+        calls.append((request.url.params.get("publishedAfter"), token))
+        n = int(token or 0)
+        item = {
+            "id": {"kind": "youtube#video", "videoId": f"cap-{n}"},
+            "snippet": {"title": f"Cap {n}", "publishedAt": f"2026-01-0{9 - n}T00:00:00Z"},
+        }
+        # Five pages newest first, one video each
+        return httpx.Response(200, json={"items": [item], **({"nextPageToken": str(n + 1)} if n < 4 else {})})
+
+    poller = BackgroundPoller()
+    poller._running = True
+    poller._client.key_rotator = APIKeyRotator(["K"])
+    await poller._client.client.aclose()
+    poller._client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(poller.scheduler, "interval", lambda query: 0)
+    fetcher = asyncio.create_task(poller._fetch_loop("cap-q", WATERMARK))
+    outcomes, videos = [], []
+    try:
+        while len(outcomes) < 3:
+            page = await asyncio.wait_for(poller._queue.get(), 5)
+            if page.outcome is not None:
+                outcomes.append(page.outcome)
+            videos += [v["video_id"] for v in page.videos]
+    finally:
+        poller._running = False
+        fetcher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await fetcher
+        await poller._client.close()
+
+    since = "2026-01-01T00:00:00Z"
+    assert calls[:5] == [(since, None), (since, "1"), (since, "2"), (since, "3"), (since, "4")]
+    assert videos == [f"cap-{n}" for n in range(5)]
+    # Capped walks keep the watermark and record where to resume
+    assert [(o.published_after, o.page_token) for o in outcomes[:2]] == [(None, "2"), (None, "4")]
+    # Once the walk reaches the old watermark it moves to the newest video of the whole walk
+    assert outcomes[2].published_after == datetime(2026, 1, 9, tzinfo=timezone.utc)
+    assert outcomes[2].page_token is None
+
+
+@pytest.mark.asyncio
+async def test_batch_that_keeps_failing_skips_only_unstorable_rows(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ingest_write_attempts", 1)
+    good = _page("poison-1", "poison-2", "poison-3")
+    # SQLite's DateTime type rejects anything but a datetime, on every attempt
+    bad = {**good[1], "video_id": "poison-bad", "published_at": "not a date"}
+    poller = BackgroundPoller()
+    try:
+        batch = [FetchedPage("poison-q", [good[0], bad, good[1], good[2]])]
+        await poller._flush(batch, {"poison-q": PollOutcome(WATERMARK, None, 200, None)})
+    finally:
+        await poller._client.close()
+
+    assert poller.rows_skipped == 1 and list(poller.skipped_video_ids) == ["poison-bad"]
+    assert poller.rows_written == 3
+    async with get_session() as s:
+        ids = (await s.execute(select(Video.video_id).where(Video.video_id.like("poison-%")))).scalars().all()
+        state = await get_poll_state(s, "poison-q")
+    assert sorted(ids) == ["poison-1", "poison-2", "poison-3"]
+    assert state.last_status == 200
+
+
+@pytest.mark.asyncio
+async def test_fetch_now_results_are_pruned(monkeypatch):
+    import app.poller as poller_module
+
+    async def search_latest(*, published_after=None, query=None, include_published_after=True):
+        return []
+
+    poller = BackgroundPoller()
+    monkeypatch.setattr(poller._client, "search_latest", search_latest)
+    monkeypatch.setattr(poller_module, "FETCH_NOW_MAX_RESULTS", 2)
+    try:
+        for n in range(4):
+            await poller.fetch_now(f"prune-{n}")
+        assert list(poller._fetch_now_results) == ["prune-2", "prune-3"]
+        for query, (_, result) in poller._fetch_now_results.items():
+            poller._fetch_now_results[query] = (0.0, result)
+        await poller.fetch_now("prune-4")
+    finally:
+        await poller._client.close()
+    # Expired entries go as soon as another result is stored
+    assert list(poller._fetch_now_results) == ["prune-4"]
+
+
+@pytest.mark.asyncio
+async def test_replicas_sharing_keys_budget_against_the_total_spend():
+    from app.poll_scheduler import QuotaLedger
+    from app.poller import load_key_health, save_key_health
+    from app.youtube_client import APIKeyRotator
+
+    keys = ["shared-key-1", "shared-key-2"]
+    replicas = [(APIKeyRotator(keys), QuotaLedger(10_000)) for _ in range(2)]
+    replicas[0][1].record("shared-key-1", 300)
+    replicas[1][1].record("shared-key-1", 200)
+    replicas[1][1].record("shared-key-2", 100)
+    for pool, quota in replicas:
+        await save_key_health(pool, quota)
+    # Spent after the last save stays on top of the shared total
+    replicas[0][1].record("shared-key-1", 100)
+    for pool, quota in replicas:
+        await load_key_health(pool, quota, cooldowns=False)
+
+    assert replicas[0][1].spent("shared-key-1") == 600
+    assert replicas[1][1].spent("shared-key-1") == 500
+    assert replicas[0][1].remaining(keys) == replicas[1][1].remaining(keys) - 100 == 20_000 - 700
+
+
+@pytest.mark.asyncio
+async def test_only_new_edited_or_unenriched_rows_are_looked_up():
+    from app.crud import upsert_videos
+
+    stored, bare = _page("enrich-seen", "enrich-bare")
+    stored.update(duration_seconds=60, view_count=5, like_count=1, tags=[], enriched_at=datetime.now(timezone.utc))
+    async with get_session() as s:
+        await upsert_videos(s, [stored, bare])
+
+    class Recorder:
+        def __init__(self):
+            self.looked_up = []
+
+        async def enrich(self, rows):
+            self.looked_up += [r["video_id"] for r in rows]
+
+    poller = BackgroundPoller()
+    poller.enricher = Recorder()
+    try:
+        seen, edited, unenriched, new = _page("enrich-seen", "enrich-seen", "enrich-bare", "enrich-new")
+        edited["title"] = "Edited"
+        await poller._enrich([seen])
+        await poller._enrich([edited, unenriched, new])
+    finally:
+        await poller._client.close()
+
+    assert poller.enricher.looked_up == ["enrich-seen", "enrich-bare", "enrich-new"]
+    assert poller.enrich_skipped == 1
@@ -1,3 +1,5 @@
+import time
+
 import pytest
 
 from app.youtube_client import APIKeyRotator
@@ -5,7 +7,95 @@ from app.youtube_client import APIKeyRotator
 
 def test_api_key_rotation_basic():
     r = APIKeyRotator(["A", "B", "C"])
-    assert r.pop_available() in {"A", "B", "C"}
-    r.mark_exhausted()  # mark current as exhausted
-    # next available should be one of others (eventually after rotate)
-    assert r.pop_available() in {"A", "B", "C"}
+    # Ready keys are handed out round-robin
+    assert [r.pop_available() for _ in range(4)] == ["A", "B", "C", "A"]
+    # The failing key is cooled down, not whichever happens to be at the head
+    r.mark_exhausted("C")
+    assert [r.pop_available() for _ in range(3)] == ["B", "A", "B"]
+    assert r.dirty and set(r.cooldowns()) == {"C"}
+
+
+def test_api_key_pool_waits_for_soonest_cooldown():
+    r = APIKeyRotator(["A", "B"], cooldown_seconds=60)
+    r.mark_exhausted("A")
+    r.mark_exhausted("B", until=time.time() + 5)
+    assert r.pop_available() is None
+    assert 4 < r.seconds_until_ready() <= 5
+
+    restored = APIKeyRotator(["A", "B"])
+    restored.load(r.cooldowns())
+    assert restored.pop_available() is None
+    assert restored.seconds_until_ready() == pytest.approx(r.seconds_until_ready(), abs=0.5)
+
+
+@pytest.mark.asyncio
+async def test_iter_search_pages_follows_tokens_until_cap():
+    import httpx
+
+    from app.youtube_client import YouTubeClient
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.url.params.get("pageToken")
+        calls.append(token)
+        n = int(token or 0)
+        item = {
+            "id": {"kind": "youtube#video", "videoId": f"p{n}"},
+            "snippet": {"publishedAt": f"2030-01-0{9 - n}T00:00:00Z"},
+        }
+        return httpx.Response(200, json={"items": [item], "nextPageToken": str(n + 1)})
+
+    client = YouTubeClient()
+    client.key_rotator = APIKeyRotator(["K"])
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        pages = [p async for p in client.iter_search_pages(max_pages=3)]
+    finally:
+        await client.close()
+
+    assert [p.items[0]["id"]["videoId"] for p in pages] == ["p0", "p1", "p2"]
+    assert calls == [None, "1", "2"]
+    # The walk stopped at the cap, so the last page still points at more
+    assert pages[-1].next_page_token == "3" and pages[-1].status == 200
+
+
+def test_planner_estimate_compiles_search_predicates_with_bound_params():
+    from sqlalchemy import select
+    from sqlalchemy.dialects.postgresql import asyncpg
+
+    from app.counts import Explain
+    from app.crud import _pg_search_tiers
+    from app.models import Video
+
+    for tier, predicate in _pg_search_tiers("cricket"):
+        compiled = Explain(select(Video.id).where(predicate).params(q="cricket")).compile(
+            dialect=asyncpg.dialect()
+        )
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT"), tier
+        assert "cricket" not in str(compiled) and compiled.params["q"] == "cricket"
+
+
+@pytest.mark.asyncio
+async def test_fts_ready_check_is_per_database_and_refreshed_on_rebuild(tmp_path):
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app.crud import _sqlite_fts_ready
+    from app.db import Base, ensure_sqlite_fts, fts_known_ready
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'fts.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            # No FTS table yet; the shared test database's state must not leak in
+            assert not await _sqlite_fts_ready(session)
+
+        async with engine.begin() as conn:
+            assert await ensure_sqlite_fts(conn)
+        assert fts_known_ready(engine.url)
+        async with AsyncSession(engine) as session:
+            assert await _sqlite_fts_ready(session)
+    finally:
+        await engine.dispose()
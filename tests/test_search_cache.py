@@ -0,0 +1,28 @@
+from app.search_cache import SearchCache
+
+
+def test_generation_bump_invalidates_entries():
+    c = SearchCache(max_bytes=1024, ttl=60)
+    c.put("k", b"body", c.generation)
+    assert c.get("k") == b"body"
+    c.bump_generation()
+    assert c.get("k") is None
+    assert c.stats()["invalidations"] == 1
+
+    # A result computed before the bump must not be stored as current
+    stale_generation = c.generation
+    c.bump_generation()
+    c.put("k", b"body", stale_generation)
+    assert c.get("k") is None
+
+
+def test_byte_bound_evicts_least_recently_used():
+    c = SearchCache(max_bytes=10, ttl=60)
+    c.put("a", b"xxxx", 0)
+    c.put("b", b"yyyy", 0)
+    c.get("a")
+    c.put("c", b"zzzz", 0)
+    assert c.get("b") is None
+    assert c.get("a") == b"xxxx"
+    assert c.stats()["evictions"] == 1
+    assert c.stats()["bytes"] == 8
@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.crud import PollOutcome, get_poll_state
+from app.db import get_session
+from app.models import Video
+from app.poller import BackgroundPoller, FetchedPage, _parse_items
+from app.spool import Spool
+
+
+@pytest.mark.asyncio
+async def test_spool_groups_fsyncs_rotates_and_skips_torn_lines(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=200, fsync_delay=0.01)
+    await spool.open()
+    await asyncio.gather(*(spool.append({"n": n, "pad": "x" * 40}) for n in range(10)))
+    assert spool.fsyncs < spool.appends == 10
+
+    spool.seal()
+    segments = spool.sealed()
+    assert len(segments) > 1
+    # A crash mid-append leaves a partial line at the end of a segment
+    with open(segments[-1], "ab") as fh:
+        fh.write(b'{"n": 99, "pa')
+    assert [r["n"] for path in segments for r in spool.read(path)] == list(range(10))
+
+    spool.remove(segments)
+    await spool.close()
+    assert spool.sealed() == []
+
+
+@pytest.mark.asyncio
+async def test_slots_left_by_workers_that_did_not_return_are_adopted(tmp_path):
+    workers = [Spool(str(tmp_path), segment_bytes=1 << 20) for _ in range(2)]
+    for n, spool in enumerate(workers):
+        await spool.open()
+        await spool.append({"worker": n})
+    for spool in workers:
+        await spool.close()
+
+    # Only one worker comes back; it claims slot 0 and drains slot 1 as well
+    survivor = Spool(str(tmp_path), segment_bytes=1 << 20)
+    await survivor.open()
+    late = Spool(str(tmp_path), segment_bytes=1 << 20)
+    await late.open()
+    try:
+        assert [r["worker"] for path in survivor.sealed() for r in survivor.read(path)] == [1, 0]
+        # A slot held by a live process is left alone
+        assert late.directory.endswith("2") and late.sealed() == []
+    finally:
+        await late.close()
+        await survivor.close()
+
+
+@pytest.mark.asyncio
+async def test_spooled_pages_survive_restart_and_replay(tmp_path, monkeypatch):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "spool_dir", str(tmp_path))
+    page = _parse_items(
+        [
+            {
+                "id": {"kind": "youtube#video", "videoId": f"spool-{n}"},
+                "snippet": {"title": f"Spooled {n}", "publishedAt": "2026-02-01T00:00:00Z"},
+            }
+            for n in range(3)
+        ]
+    )
+    watermark = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+    # Fetched and acknowledged, then the process stops before the database sees it
+    first = BackgroundPoller()
+    await first.spool.open()
+    await first._enqueue(FetchedPage("spool-q", page))
+    await first._enqueue(FetchedPage("spool-q", [], outcome=PollOutcome(watermark, None, 200, None)))
+    await first.spool.close()
+    await first._client.close()
+
+    restarted = BackgroundPoller()
+    await restarted.spool.open()
+    try:
+        assert await restarted.replay_spool() == 3
+        assert await restarted.replay_spool() == 0
+        # Replayed segments are deleted once committed
+        assert restarted.spool.sealed() == []
+    finally:
+        await restarted.spool.close()
+        await restarted._client.close()
+
+    async with get_session() as s:
+        ids = (await s.execute(select(Video.video_id).where(Video.video_id.like("spool-%")))).scalars().all()
+        state = await get_poll_state(s, "spool-q")
+    assert sorted(ids) == ["spool-0", "spool-1", "spool-2"]
+    assert state.published_after.replace(tzinfo=timezone.utc) == watermark
+
+
+@pytest.mark.asyncio
+async def test_close_returns_when_fsync_keeps_failing(tmp_path, monkeypatch):
+    import os
+
+    import app.spool as spool_module
+
+    spool = Spool(str(tmp_path), segment_bytes=10)
+    await spool.open()
+
+    def failing_fsync(fd):
+        raise OSError("disk on fire")
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    monkeypatch.setattr(spool_module, "CLOSE_TIMEOUT_SECONDS", 0.2)
+    # The record rotates the segment, so a closed-but-unsynced file is left pending
+    with pytest.raises(OSError):
+        await spool.append({"n": 1, "pad": "x" * 20})
+    await asyncio.wait_for(spool.close(), 2)
+    assert spool.fsyncs == 0
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.crud import upsert_videos
+from app.db import get_session
+from app.main import app
+from app.models import Video, VideoStatRollup, VideoStatSample
+from app.stats import StatsSampler, compact
+
+
+class _FakeEnricher:
+    """Stands in for the videos.list stage with fixed view counts."""
+
+    def __init__(self):
+        self.views: dict[str, int] = {}
+
+    async def enrich(self, rows):
+        for row in rows:
+            if row["video_id"] in self.views:
+                row.update(view_count=self.views[row["video_id"]], like_count=None)
+        return len(rows)
+
+
+def _video(video_id, published_at):
+    return {
+        "video_id": video_id,
+        "title": video_id,
+        "description": "",
+        "published_at": published_at,
+        "thumbnails": {},
+        "channel_id": "cS",
+        "channel_title": "Stats",
+        "raw_json": {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_sampled_velocity_drives_trending():
+    now = datetime.now(timezone.utc)
+    async with get_session() as s:
+        await upsert_videos(s, [_video("trend-steady", now - timedelta(hours=2)), _video("trend-burst", now - timedelta(hours=2))])
+
+    enricher = _FakeEnricher()
+    sampler = StatsSampler(enricher)
+    enricher.views = {"trend-steady": 1000, "trend-burst": 100}
+    assert await sampler.tick(now) == 2
+    # Not due again until the decayed interval has passed
+    assert await sampler.tick(now + timedelta(minutes=1)) == 0
+
+    enricher.views = {"trend-steady": 1100, "trend-burst": 2100}
+    assert await sampler.tick(now + timedelta(hours=1)) == 2
+
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/videos/trending", params={"hours": 6})
+    items = [i for i in r.json()["items"] if i["video_id"].startswith("trend-")]
+    assert [(i["video_id"], i["views_per_hour"]) for i in items] == [("trend-burst", 2000.0), ("trend-steady", 100.0)]
+    assert items[0]["view_count"] == 2100
+
+
+@pytest.mark.asyncio
+async def test_compact_downsamples_samples_then_hourly_rollups():
+    base = datetime(2026, 1, 10, 12, tzinfo=timezone.utc)
+    async with get_session() as s:
+        await upsert_videos(s, [_video("rollup-1", base)])
+        ref = (await s.execute(select(Video.id).where(Video.video_id == "rollup-1"))).scalar_one()
+        await s.execute(
+            VideoStatSample.__table__.insert(),
+            [
+                {"video_ref": ref, "sampled_at": base + timedelta(minutes=m), "view_count": 10 * m}
+                for m in (0, 20, 40, 70)
+            ],
+        )
+
+    async with get_session() as s:
+        await compact(s, base + timedelta(days=3))
+    async with get_session() as s:
+        left = (await s.execute(select(VideoStatSample).where(VideoStatSample.video_ref == ref))).all()
+        hourly = (
+            await s.execute(
+                select(VideoStatRollup.views_min, VideoStatRollup.views_max, VideoStatRollup.samples)
+                .where(VideoStatRollup.video_ref == ref, VideoStatRollup.granularity == "hour")
+                .order_by(VideoStatRollup.bucket_start)
+            )
+        ).all()
+    assert left == []
+    assert [tuple(r) for r in hourly] == [(0, 400, 3), (700, 700, 1)]
+
+    async with get_session() as s:
+        await compact(s, base + timedelta(days=60))
+    async with get_session() as s:
+        rollups = (
+            await s.execute(
+                select(VideoStatRollup.granularity, VideoStatRollup.views_min, VideoStatRollup.views_max, VideoStatRollup.samples)
+                .where(VideoStatRollup.video_ref == ref)
+            )
+        ).all()
+    assert [tuple(r) for r in rollups] == [("day", 0, 700, 4)]
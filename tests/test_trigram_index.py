@@ -0,0 +1,38 @@
+from app.trigram_index import TrigramIndex, trigrams
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams("Ab") == {"  a", " ab", "ab "}
+    assert trigrams("") == set()
+
+
+def test_search_tolerates_typos_and_ranks_closer_matches_first():
+    idx = TrigramIndex(max_docs=100, max_chars=100)
+    idx.add(1, "Cricket highlights", "Best moments")
+    idx.add(2, "How to cook pasta", "Yum")
+    idx.add(3, "Crime documentary", None)
+
+    ids = [doc_id for doc_id, _ in idx.search("crickt")]
+    assert ids[0] == 1
+    assert 2 not in ids
+
+
+def test_max_docs_evicts_oldest():
+    idx = TrigramIndex(max_docs=2, max_chars=100)
+    for n in range(1, 4):
+        idx.add(n, "cricket", None)
+    assert len(idx) == 2
+    assert sorted(doc_id for doc_id, _ in idx.search("cricket")) == [2, 3]
+
+
+def test_max_docs_keeps_the_most_recently_published():
+    from datetime import datetime, timezone
+
+    idx = TrigramIndex(max_docs=2, max_chars=100)
+    idx.add(1, "cricket", None, datetime(2030, 1, 3, tzinfo=timezone.utc))
+    idx.add(2, "cricket", None, datetime(2030, 1, 2, tzinfo=timezone.utc))
+    # A backfilled older video arrives last but is the one that goes
+    idx.add(3, "cricket", None, datetime(2020, 1, 1, tzinfo=timezone.utc))
+    assert sorted(doc_id for doc_id, _ in idx.search("cricket")) == [1, 2]
+    idx.add(4, "cricket", None, datetime(2030, 1, 4, tzinfo=timezone.utc))
+    assert sorted(doc_id for doc_id, _ in idx.search("cricket")) == [1, 4]